@@ -7,8 +7,21 @@ import time
 
 import pygame
 
+from mslive.core.acquisition import AcquisitionWorker, Sample
+from mslive.core.session import DS2Session
+from mslive.core.stats import format_phase
 from mslive.decoders.ms42_general import decode_general
-from mslive.util.cli import add_common_args, add_port_or_replay, open_ds2_or_exit, resolve_log_path_from_args
+from mslive.util.cli import (
+    add_common_args,
+    add_port_or_replay,
+    add_record_raw_arg,
+    attach_daemon_or_exit,
+    close_record_tap,
+    open_ds2_or_exit,
+    open_record_tap,
+    rate_from_args,
+    resolve_log_path_from_args,
+)
 
 REQ_GENERAL = bytes.fromhex("12 05 0B 03")
 
@@ -75,8 +88,10 @@ def main():
     ap.add_argument("--replay-speed", type=float, default=1.0)
     ap.add_argument("--loop", action=argparse.BooleanOptionalAction, default=True, help="loop replay when used")
 
+    add_record_raw_arg(ap)
     args = ap.parse_args()
 
+    ds2 = None
     if args.replay:
         from mslive.core.replay import ReplayDS2, ReplayConfig
         d = ReplayDS2(
@@ -88,9 +103,13 @@ def main():
             )
         )
         d.open()
+    elif args.daemon:
+        d = attach_daemon_or_exit(args.daemon)  # the daemon owns the port and its recovery
     else:
-        d = open_ds2_or_exit(port=args.port, baud=args.baud, debug=args.debug)
-        d.initialized = True
+        ds2 = open_ds2_or_exit(port=args.port, baud=args.baud, debug=args.debug, low_latency=args.low_latency)
+        ds2.initialized = True
+        d = DS2Session(ds2)  # wake/reopen with bounded backoff on failures
+    tap = open_record_tap(args, ds2)
 
     log_f = None
     log_w = None
@@ -161,79 +180,83 @@ def main():
     ema_oil = EMA(alpha=ta)
     ema_iat = EMA(alpha=min(0.35, ta + 0.05))  # slightly more smoothing for IAT (optional)
 
-    # Scheduling
-    period = 1.0 / max(args.hz, 0.2)
-    next_t = time.time() + period
+    def log_sample(s: Sample) -> None:
+        # runs on the acquisition thread: CSV I/O never stalls rendering
+        if s.resp is None:
+            return
+        resp, g = s.resp, s.decoded
+        log_w.writerow(
+            [s.ts, g.rpm, g.coolant_c, g.oil_c, g.iat_c, g.ign_deg_kw,
+             u16be(resp, 8) / 10.0, resp[23] / 10.0, resp[19] / 2.55, resp[6], resp[7]]
+            + list(resp[:32])
+        )
+        log_f.flush()
 
-    timeout_count = 0
+    # Acquisition runs on its own thread; the render loop only reads the
+    # latest sample, so a slow or silent ECU never freezes the UI.
+    worker = AcquisitionWorker(
+        d,
+        REQ_GENERAL,
+        hz=args.hz,
+        decode=decode_general,
+        on_sample=log_sample if log_w else None,
+        rate=rate_from_args(args),
+    )
+    last_seq = 0
 
     def tick():
-        nonlocal next_t, timeout_count
-
-        try:
-            resp = d.send(REQ_GENERAL)
-
-            # base decoded values
-            g = decode_general(resp)
-
-            # derived channels from your logs
-            maf_kgph = u16be(resp, 8) / 10.0
-            vbatt_v = resp[23] / 10.0
-            load_pct = resp[19] / 2.55  # approx until fully confirmed/scaled
-            thr_raw = resp[6]
-            thr2_raw = resp[7]
-
-            # apply smoothing
-            rpm = int(round(ema_rpm.update(float(g.rpm))))
-            cool = ema_cool.update(g.coolant_c)
-            oil = ema_oil.update(g.oil_c)
-            iat = ema_iat.update(g.iat_c)
-            ign = g.ign_deg_kw
-
-            # update UI
-            vars_["rpm"] = f"{rpm:d}"
-            vars_["cool"] = f"{cool:0.1f}"
-            vars_["oil"] = f"{oil:0.1f}"
-            vars_["iat"] = f"{iat:0.1f}"
-            vars_["ign"] = f"{ign:0.1f}"
-            vars_["maf"] = f"{maf_kgph:0.1f}"
-            vars_["vbatt"] = f"{vbatt_v:0.1f}"
-            vars_["load"] = f"{load_pct:0.1f}"
-            vars_["thr"] = f"{thr_raw:d}"
-            vars_["thr2"] = f"{thr2_raw:d}"
-
-            live["rpm"] = rpm
-            live["cool"] = cool
-            live["oil"] = oil
-            live["iat"] = iat
-            live["vbatt"] = vbatt_v
-            live["ign"] = ign
-            live["resp"] = resp
-
-            vars_["status"] = "OK"
-            vars_["lasterr"] = ""
-
-            if log_w:
-                log_w.writerow(
-                    [time.time(), g.rpm, g.coolant_c, g.oil_c, g.iat_c, g.ign_deg_kw, maf_kgph, vbatt_v, load_pct, thr_raw, thr2_raw]
-                    + list(resp[:32])
-                )
-                log_f.flush()
-
-        except TimeoutError as e:
-            timeout_count += 1
-            vars_["timeouts"] = f"Timeouts: {timeout_count}"
-            vars_["status"] = "ERR: timeout"
-            vars_["lasterr"] = str(e)
-
-        except Exception as e:
-            vars_["status"] = "ERR"
-            vars_["lasterr"] = str(e)
-
-        # stable scheduler (avoid drift)
-        now = time.time()
-        while next_t <= now:
-            next_t += period
+        nonlocal last_seq
+
+        s = worker.slot.latest()
+        if s is None or s.seq == last_seq:
+            return
+        last_seq = s.seq
+        vars_["timeouts"] = f"Timeouts: {s.timeouts}"
+
+        if s.error is not None:
+            vars_["status"] = "ERR: timeout" if s.is_timeout else "ERR"
+            vars_["lasterr"] = s.error
+            return
+
+        resp = s.resp
+        g = s.decoded
+
+        # derived channels from your logs
+        maf_kgph = u16be(resp, 8) / 10.0
+        vbatt_v = resp[23] / 10.0
+        load_pct = resp[19] / 2.55  # approx until fully confirmed/scaled
+        thr_raw = resp[6]
+        thr2_raw = resp[7]
+
+        # apply smoothing
+        rpm = int(round(ema_rpm.update(float(g.rpm))))
+        cool = ema_cool.update(g.coolant_c)
+        oil = ema_oil.update(g.oil_c)
+        iat = ema_iat.update(g.iat_c)
+        ign = g.ign_deg_kw
+
+        # update UI
+        vars_["rpm"] = f"{rpm:d}"
+        vars_["cool"] = f"{cool:0.1f}"
+        vars_["oil"] = f"{oil:0.1f}"
+        vars_["iat"] = f"{iat:0.1f}"
+        vars_["ign"] = f"{ign:0.1f}"
+        vars_["maf"] = f"{maf_kgph:0.1f}"
+        vars_["vbatt"] = f"{vbatt_v:0.1f}"
+        vars_["load"] = f"{load_pct:0.1f}"
+        vars_["thr"] = f"{thr_raw:d}"
+        vars_["thr2"] = f"{thr2_raw:d}"
+
+        live["rpm"] = rpm
+        live["cool"] = cool
+        live["oil"] = oil
+        live["iat"] = iat
+        live["vbatt"] = vbatt_v
+        live["ign"] = ign
+        live["resp"] = resp
+
+        vars_["status"] = "OK"
+        vars_["lasterr"] = ""
 
     def draw_text(text: str, font: pygame.font.Font, color: tuple[int, int, int], x: int, y: int, align_right: bool = False):
         surf = font.render(text, True, color)
@@ -284,6 +307,7 @@ def main():
         w = screen.get_width()
         draw_text_center(f"Page {page_now}/3", font_status, COL_DIM, w // 2, 24)
 
+    worker.start()
     running = True
     while running:
         prev_btn, next_btn = nav_button_rects()
@@ -307,9 +331,7 @@ def main():
                 elif next_btn.collidepoint(event.pos):
                     page = 1 if page == 3 else page + 1
 
-        now = time.time()
-        if now >= next_t:
-            tick()
+        tick()
 
         screen.fill(COL_BG)
 
@@ -423,6 +445,12 @@ def main():
             y += 52
             draw_text(vars_["timeouts"], font_status, COL_DIM, left_x, y)
             y += 30
+            if worker.rate:
+                draw_text(f"Rate: {worker.rate.summary()}", font_status, COL_DIM, left_x, y)
+                y += 30
+            if isinstance(d, DS2Session):
+                draw_text(d.summary(), font_status, COL_DIM, left_x, y)
+                y += 30
             if vars_["lasterr"]:
                 draw_text(vars_["lasterr"], font_status, (140, 140, 140), left_x, y)
                 y += 30
@@ -430,6 +458,25 @@ def main():
                 hexline = " ".join(f"{b:02X}" for b in live["resp"][:32])
                 draw_text("b0..b31", font_label, COL_DIM, left_x, y + 16)
                 draw_text(hexline, font_status, COL_TEXT, left_x, y + 42)
+                y += 80
+            if callable(getattr(d, "stats", None)):
+                # where each request's time goes (live DS2 only)
+                st = d.stats()
+                draw_text("DS2 latency", font_label, COL_DIM, left_x, y + 8)
+                y += 42
+                for name, summary in st["phases"].items():
+                    draw_text(format_phase(name, summary), font_status, COL_TEXT, left_x, y)
+                    y += 26
+                c = st["counters"]
+                draw_text(
+                    f"echo miss {c['echo_misses']}   bad chk {c['bad_checksum']}   "
+                    f"incomplete {c['incomplete']}   no reply {c['timeouts']}   resync {c['resync_bytes']} B"
+                    + (f"   rec drop {c['tap_dropped']}" if c.get("tap_dropped") else ""),
+                    font_status,
+                    COL_DIM,
+                    left_x,
+                    y,
+                )
 
         draw_nav_buttons(page, prev_btn, next_btn)
 
@@ -437,10 +484,12 @@ def main():
         clock.tick(30)
 
     try:
+        worker.stop()
         if log_f:
             log_f.close()
     finally:
         d.close()
+        close_record_tap(tap)
         pygame.quit()
 
 if __name__ == "__main__":
@@ -3,7 +3,19 @@ import argparse
 import csv
 import time
 
-from mslive.util.cli import add_common_args, add_port_or_replay, open_ds2_or_exit, resolve_log_path_from_args
+from mslive.core.daemon import DaemonDS2
+from mslive.core.session import DS2Session
+from mslive.util.cli import (
+    add_common_args,
+    add_port_or_replay,
+    add_record_raw_arg,
+    attach_daemon_or_exit,
+    close_record_tap,
+    open_ds2_or_exit,
+    open_record_tap,
+    rate_from_args,
+    resolve_log_path_from_args,
+)
 
 REQ_GENERAL = bytes.fromhex("12 05 0B 03")  # checksum appended internally by DS2.send()
 
@@ -26,10 +38,12 @@ def main():
     add_common_args(ap, default_baud=9600, default_hz=5.0)
     ap.add_argument("--out", default=None, help="output csv path (default: logs/ms42_log_YYYYmmdd_HHMMSS.csv)")
     ap.add_argument("--seconds", type=float, default=0, help="0 = run until Ctrl+C")
+    add_record_raw_arg(ap)
     args = ap.parse_args()
 
     out = resolve_log_path_from_args(args, "out", "log")
 
+    ds2 = None
     if args.replay:
         from mslive.core.replay import ReplayConfig, ReplayDS2
         d = ReplayDS2(
@@ -41,13 +55,19 @@ def main():
             )
         )
         d.open()
+    elif args.daemon:
+        d = attach_daemon_or_exit(args.daemon)  # the daemon owns the port and its recovery
     else:
-        d = open_ds2_or_exit(port=args.port, baud=args.baud, debug=args.debug)
-        d.initialized = True  # proven-good path
+        ds2 = open_ds2_or_exit(port=args.port, baud=args.baud, debug=args.debug, low_latency=args.low_latency)
+        ds2.initialized = True  # proven-good path
+        d = DS2Session(ds2)  # wake/reopen with bounded backoff on failures
+    tap = open_record_tap(args, ds2)
 
     period = 1.0 / max(args.hz, 0.1)
+    rate = rate_from_args(args)  # None unless --adaptive-hz
     t0 = time.time()
     next_t = t0  # NEW: stable timing
+    errors = 0
 
     with open(out, "w", newline="") as f:
         w = csv.writer(f)
@@ -76,7 +96,27 @@ def main():
                 if args.seconds and (now - t0) >= args.seconds:
                     break
 
-                resp = d.send(REQ_GENERAL)
+                t_req = time.monotonic()
+                try:
+                    resp = d.send(REQ_GENERAL)
+                except (TimeoutError, OSError, RuntimeError) as e:
+                    if not isinstance(d, (DS2Session, DaemonDS2)) and not rate:
+                        raise
+                    # the session (or daemon) recovers the link; adaptive mode backs off
+                    errors += 1
+                    if args.debug:
+                        print(f"[logger] {e}")
+                    if rate:
+                        rate.observe(None, ok=False)
+                        period = rate.period
+                    next_t = max(next_t + period, time.time())
+                    sleep_s = next_t - time.time()
+                    if sleep_s > 0:
+                        time.sleep(sleep_s)
+                    continue
+                if rate:
+                    rate.observe(time.monotonic() - t_req, ok=True)
+                    period = rate.period
 
                 rpm = u16be(resp, 3)
 
@@ -125,7 +165,14 @@ def main():
             pass
         finally:
             d.close()
-
+            close_record_tap(tap)
+
+    if rate:
+        print(f"Rate: {rate.summary()}")
+    if isinstance(d, DS2Session):
+        print(f"Errors: {errors}  {d.summary()}")
+    elif isinstance(d, DaemonDS2):
+        print(f"Errors: {errors}")
     print(f"Wrote {out}")
 
 
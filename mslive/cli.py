@@ -5,12 +5,21 @@ import json
 import sys
 import time
 from pathlib import Path
-from typing import Optional
-
-from .core.record import Recorder, Replayer
-from .core.scheduler import PollItem, PollScheduler
-from .core.transport import SerialConfig, SerialTransport, list_serial_ports
+from typing import BinaryIO, Optional
+
+from .core.framing import DS2FrameParser, xor_checksum
+from .core.record import Recorder, RecorderConfig, Replayer
+from .core.scheduler import DS2Scheduler, JobResult, PollItem, PollScheduler
+from .core.transport import (
+    SerialConfig,
+    SerialTransport,
+    Transport,
+    list_serial_ports,
+    open_transport,
+    read_until_deadline,
+)
 from .core.util import bytes_to_hex, hex_to_bytes
+from .util.cli import add_common_args
 
 
 def cmd_ports(_: argparse.Namespace) -> int:
@@ -34,26 +43,53 @@ def cmd_ports(args: argparse.Namespace) -> int:
 
 
 
-def _read_loop(t: SerialTransport, rec: Optional[Recorder] = None, duration_s: float = 5.0) -> None:
+def _open_recorder(args: argparse.Namespace) -> tuple[Optional[Recorder], Optional[BinaryIO]]:
+    if not args.record:
+        return None, None
+    rec_f = open(args.record, "wb")
+    cfg = RecorderConfig(
+        flush=args.record_flush,
+        fsync_interval_s=args.record_fsync_s,
+        version=2 if args.record_v2 else 1,
+        codec=args.record_codec,
+        delta=args.record_delta,
+        seal_interval_s=args.record_seal_s,
+    )
+    return Recorder(rec_f, cfg), rec_f
+
+
+def _add_record_args(sp: argparse.ArgumentParser, default_flush: str) -> None:
+    sp.add_argument("--record", help="Write raw TX/RX recording file (.mslr)")
+    sp.add_argument("--record-flush", choices=["frame", "interval", "close"], default=default_flush,
+                    help=f"When buffered frames reach the file (default: {default_flush})")
+    sp.add_argument("--record-fsync-s", type=float, default=0.0,
+                    help="Also fsync at most every N seconds (0 = never)")
+    sp.add_argument("--record-v2", action="store_true", help="Write indexed MSLR v2 (seekable)")
+    sp.add_argument("--record-codec", choices=["raw", "zlib", "zstd", "auto"], default="raw",
+                    help="Compress v2 blocks (implies --record-v2; auto = zstd if installed, else zlib)")
+    sp.add_argument("--record-delta", action="store_true",
+                    help="XOR-delta code each frame against the previous one of its kind (implies --record-v2)")
+    sp.add_argument("--record-seal-s", type=float, default=5.0,
+                    help="v2: close a block once it is N seconds old (default: 5); only whole blocks reach the file")
+
+
+def _read_loop(t: Transport, rec: Optional[Recorder] = None, duration_s: float = 5.0) -> None:
     end = time.monotonic() + duration_s
-    while time.monotonic() < end:
-        b = t.read(4096)
-        if b:
-            if rec:
-                rec.write("rx", b)
-            print(f"RX {len(b):4d}: {bytes_to_hex(b)}")
-        time.sleep(0.001)
+    while True:
+        # blocks until bytes arrive; b"" only once the deadline has passed
+        b = read_until_deadline(t, end)
+        if not b:
+            break
+        if rec:
+            rec.write("rx", b)
+        print(f"RX {len(b):4d}: {bytes_to_hex(b)}")
 
 
 def cmd_send(args: argparse.Namespace) -> int:
     payload = hex_to_bytes(args.hex)
-    rec = None
-    rec_f = None
-    if args.record:
-        rec_f = open(args.record, "wb")
-        rec = Recorder(rec_f)
+    rec, rec_f = _open_recorder(args)
 
-    t = SerialTransport(SerialConfig(port=args.port, baud=args.baud, timeout_s=0.05))
+    t = open_transport(args.port, SerialConfig(port=args.port, baud=args.baud, timeout_s=0.05))
     t.open()
     t.flush()
 
@@ -65,7 +101,8 @@ def cmd_send(args: argparse.Namespace) -> int:
     _read_loop(t, rec=rec, duration_s=args.read_for)
 
     t.close()
-    if rec_f:
+    if rec:
+        rec.close()
         rec_f.close()
     return 0
 
@@ -83,20 +120,31 @@ def cmd_poll(args: argparse.Namespace) -> int:
         )
     if not polls:
         raise SystemExit("poll-file has no polls[] entries")
-
-    rec = None
-    rec_f = None
-    if args.record:
-        rec_f = open(args.record, "wb")
-        rec = Recorder(rec_f)
-
-    t = SerialTransport(SerialConfig(port=args.port, baud=args.baud, timeout_s=0.01))
+    if args.ds2:
+        if args.baud is None:
+            args.baud = 9600  # DS2 on the MS42 is 9600 8E1, not the KWP 10400
+        if args.asyncio:
+            import asyncio
+            return asyncio.run(_poll_async(args, poll_obj))
+        return _poll_ds2(args, poll_obj)
+
+    rec, rec_f = _open_recorder(args)
+
+    if args.baud is None:
+        args.baud = 10400
+    t = open_transport(args.port, SerialConfig(port=args.port, baud=args.baud, timeout_s=0.01))
     t.open()
     t.flush()
 
+    # DS2 framing: only complete, checksum-valid frames come out; our own
+    # echo is swallowed and line garbage is skipped byte-by-byte.
+    parser = None if args.raw else DS2FrameParser()
+
     def send_func(payload: bytes) -> None:
         if rec:
             rec.write("tx", payload)
+        if parser:
+            parser.expect_echo(payload)
         t.write(payload)
 
     sched = PollScheduler(items=polls, send_func=send_func)
@@ -112,40 +160,242 @@ def cmd_poll(args: argparse.Namespace) -> int:
                     send_func(it.payload)
                     it.next_due = now + it.interval_s
 
-            # read any inbound
-            b = t.read(4096)
+            # sleep until bytes arrive or the next poll is due
+            wake = min(it.next_due for it in sched.items)
+            if args.stop_after:
+                wake = min(wake, start + args.stop_after)
+            b = read_until_deadline(t, wake)
             if b:
-                if rec:
-                    rec.write("rx", b)
-                if args.print_rx:
-                    print(f"RX {len(b):4d}: {bytes_to_hex(b)}")
+                for fr in (parser.feed(b) if parser else [b]):
+                    if rec:
+                        rec.write("rx", fr)
+                    if args.print_rx:
+                        print(f"RX {len(fr):4d}: {bytes_to_hex(fr)}")
 
             if args.stop_after and (time.monotonic() - start) >= args.stop_after:
                 break
-            time.sleep(0.001)
     except KeyboardInterrupt:
         pass
     finally:
         t.close()
-        if rec_f:
+        if rec:
+            rec.close()
             rec_f.close()
+        if parser and parser.dropped:
+            print(f"Skipped {parser.dropped} garbage byte(s) while resyncing.")
     return 0
 
 
+def _on_job_result(args: argparse.Namespace, rec: Optional[Recorder], request_frame):
+    """Subscriber for --ds2 polling: record the exchange, print the response or a new error."""
+    last_error: dict[str, str] = {}
+
+    def on_result(res: JobResult) -> None:
+        if res.error is not None:
+            if last_error.get(res.job) != res.error:  # an outage is one line, not one per retry
+                print(f"{res.job}: {res.error}")
+            last_error[res.job] = res.error
+            return
+        last_error.pop(res.job, None)
+        if rec:
+            rec.write("tx", request_frame(res.job), res.ts - res.rtt_s)
+            rec.write("rx", res.resp, res.ts)
+        if args.print_rx:
+            print(f"{res.job} {res.rtt_s * 1000:6.1f} ms RX {len(res.resp):4d}: {bytes_to_hex(res.resp)}")
+    return on_result
+
+
+def _poll_ds2(args: argparse.Namespace, poll_obj: dict) -> int:
+    """
+    --ds2: the poll file's jobs on a DS2 session, one request on the K-line
+    at a time, each at its own interval_ms and (optional) priority.
+    """
+    from .core.ds2 import DS2, DS2Config
+    from .core.session import DS2Session
+
+    rec, rec_f = _open_recorder(args)
+    ds2 = DS2(DS2Config(port=args.port, baud=args.baud))
+    ds2.open()
+    if not ds2.init_ecu():
+        print("ECU did not answer init yet; the session keeps retrying.")
+    sched = DS2Scheduler.from_json(poll_obj, DS2Session(ds2))
+    payloads = {job.name: job.payload for job in sched.jobs}
+    on_result = _on_job_result(args, rec, lambda name: ds2.request_frame(payloads[name]))
+    for job in sched.jobs:
+        job.subscribers.append(on_result)
+
+    print(f"Polling {len(sched.jobs)} DS2 jobs on {args.port} @ {args.baud}. Ctrl+C to stop.")
+    try:
+        sched.run(stop_after_s=args.stop_after)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sched.d.close()
+        if rec:
+            rec.close()
+            rec_f.close()
+        for job in sched.jobs:
+            print(f"{job.name}: {job.sent} sent, {job.errors} failed")
+    return 0
+
+
+async def _poll_async(args: argparse.Namespace, poll_obj: dict) -> int:
+    """
+    --ds2 --asyncio: every job is its own task on one AsyncDS2. The client
+    serialises them on the K-line; waits are event-loop waits, not sleeps.
+    """
+    import asyncio
+
+    from .core.aio import AsyncDS2, AsyncSerialTransport
+    from .core.scheduler import DS2Job
+
+    rec, rec_f = _open_recorder(args)
+    d = AsyncDS2(AsyncSerialTransport(args.port, baud=args.baud))
+    await d.open()
+    jobs = DS2Scheduler.from_json(poll_obj, d).jobs
+    payloads = {job.name: job.payload for job in jobs}
+    on_result = _on_job_result(args, rec, lambda name: payloads[name] + bytes([xor_checksum(payloads[name])]))
+
+    async def run_job(job: DS2Job) -> None:
+        loop = asyncio.get_running_loop()
+        next_t = loop.time()
+        while True:
+            t0 = time.monotonic()
+            job.sent += 1
+            try:
+                resp = await d.send(job.payload)
+                res = JobResult(job=job.name, ts=time.time(), rtt_s=time.monotonic() - t0, resp=resp)
+            except (TimeoutError, RuntimeError, OSError) as e:
+                job.errors += 1
+                res = JobResult(job=job.name, ts=time.time(), rtt_s=time.monotonic() - t0, error=str(e))
+            on_result(res)
+            next_t = max(next_t + job.interval_s, loop.time() - job.interval_s)
+            await asyncio.sleep(max(0.0, next_t - loop.time()))
+
+    print(f"Polling {len(jobs)} DS2 jobs on {args.port} @ {args.baud} (asyncio). Ctrl+C to stop.")
+    tasks = [asyncio.create_task(run_job(job)) for job in jobs]
+    try:
+        await asyncio.wait(tasks, timeout=args.stop_after)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await d.close()
+        if rec:
+            rec.close()
+            rec_f.close()
+        for job in jobs:
+            print(f"{job.name}: {job.sent} sent, {job.errors} failed")
+    return 0
+
+
+def _replay_frames(f: BinaryIO, args: argparse.Namespace):
+    """(ts, direction, payload) with the --seek-s/--until-s/--dir filters applied."""
+    want = {"tx": 0, "rx": 1}.get(args.dir)
+    rec = None
+    if f.seekable():
+        try:
+            from .core.mapped import MappedRecording
+            rec = MappedRecording(f)
+        except ImportError:
+            pass  # no NumPy: stream with the Replayer
+        except (OSError, ValueError):
+            f.seek(0)  # cannot map it (empty, special file, ...): the Replayer decides
+    if rec is not None:
+        with rec:
+            t_first = float(rec.ts[0]) if len(rec) else 0.0
+            idx = rec.select(
+                direction=args.dir,
+                t0=t_first + args.seek_s if args.seek_s else None,
+                t1=t_first + args.until_s if args.until_s is not None else None,
+            )
+            for ts, d, payload in rec.frames(idx):
+                try:
+                    yield ts, "rx" if d else "tx", payload
+                finally:
+                    payload.release()  # the map can only close once no view is left
+            if rec.bad_blocks:
+                print(f"Skipped {rec.bad_blocks} damaged block(s); see mslive recover.", file=sys.stderr)
+        return
+
+    rp = Replayer(f)
+    t_first = None
+    if args.seek_s:
+        t_first = rp.frame_at(0).ts if rp.count() else 0.0
+        rp.seek(t_first + args.seek_s)
+    for fr in rp:
+        if t_first is None:
+            t_first = fr.ts
+        if args.until_s is not None and fr.ts >= t_first + args.until_s:
+            break
+        if want is None or (fr.direction == "rx") == bool(want):
+            yield fr.ts, fr.direction, fr.payload
+
+
 def cmd_replay(args: argparse.Namespace) -> int:
     with open(args.file, "rb") as f:
-        rp = Replayer(f)
         last_ts = None
-        for fr in rp:
+        out = sys.stdout.write
+        for ts, direction, payload in _replay_frames(f, args):
             if args.realtime:
                 if last_ts is not None:
-                    dt = fr.ts - last_ts
+                    dt = ts - last_ts
                     if dt > 0:
                         time.sleep(min(dt, 0.25))
-                last_ts = fr.ts
-            print(f"{fr.direction.upper()} {fr.ts:.3f} {len(fr.payload):4d}: {bytes_to_hex(fr.payload)}")
+                last_ts = ts
+            out(f"{direction.upper()} {ts:.3f} {len(payload):4d}: {bytes_to_hex(payload)}\n")
     return 0
     
+def cmd_upgrade(args: argparse.Namespace) -> int:
+    from .core.record import upgrade
+
+    out = args.out or str(Path(args.file).with_suffix(".v2.mslr"))
+    with open(args.file, "rb") as src, open(out, "wb") as dst:
+        n = upgrade(src, dst, block_size=args.block_size, codec=args.codec, delta=args.delta)
+    print(f"Wrote {out}: {n} frames (MSLR v2, indexed, {args.codec}{', delta' if args.delta else ''}).")
+    return 0
+
+
+def cmd_convert(args: argparse.Namespace) -> int:
+    from .core.convert import convert_paths
+
+    results = convert_paths(args.paths, out_dir=args.out, fmt=args.format, codec=args.codec,
+                            delta=args.delta, jobs=args.jobs, force=args.force)
+    if not results:
+        print("No CSV files found.")
+        return 1
+    failed = 0
+    for r in results:
+        if r.status == "error":
+            failed += 1
+            print(f"{r.src}: error: {r.error}")
+        elif r.status == "converted":
+            extra = f", {r.bad_rows} rows skipped" if r.bad_rows else ""
+            print(f"{r.src} -> {r.out}: {r.frames} frames ({r.schema}{extra})")
+        elif r.status == "no-frames":
+            print(f"{r.src}: no frame data ({r.schema or 'unknown schema'}), skipped")
+        else:
+            print(f"{r.src}: {r.status}")
+    return 1 if failed else 0
+
+
+def cmd_recover(args: argparse.Namespace) -> int:
+    from .core.record import recover
+
+    out = args.out or str(Path(args.file).with_suffix(".recovered.mslr"))
+    if Path(out).resolve() == Path(args.file).resolve():
+        print("--out must differ from --file.")
+        return 2
+    with open(args.file, "rb") as src, open(out, "wb") as dst:
+        try:
+            rep = recover(src, dst, block_size=args.block_size)
+        except ValueError as e:
+            print(f"{args.file}: {e}")
+            return 1
+    print(f"Wrote {out}: {rep.summary()}.")
+    return 0
+
+
 def cmd_open(args: argparse.Namespace) -> int:
     t = SerialTransport(SerialConfig(port=args.port, baud=args.baud, timeout_s=0.2))
     t.open()
@@ -154,6 +404,154 @@ def cmd_open(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_emulate(args: argparse.Namespace) -> int:
+    from .core.emulator import EmulatorConfig, MS42Emulator, PtyECU, TcpECU, load_seed_frames
+
+    frames = load_seed_frames(args.seed or [], limit=args.limit)
+    emu = MS42Emulator(frames)
+    cfg = EmulatorConfig(baud=args.baud, response_delay_s=args.delay_ms / 1000.0, echo=not args.no_echo)
+    if args.tcp:
+        host, _, port = args.tcp.rpartition(":")
+        ecu = TcpECU(emu, cfg, host=host or "127.0.0.1", port=int(port))
+        where = ecu.url
+    else:
+        ecu = PtyECU(emu, cfg)
+        where = ecu.slave_name
+    print(f"MS42 emulator on {where} @ {args.baud} ({len(frames)} seeded GEN frames). Ctrl+C to stop.")
+    print(f"  python -m mslive.apps.dash_pygame --port {where}")
+    try:
+        ecu.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ecu.stop()
+        print(f"Answered {ecu.emu.requests} requests.")
+    return 0
+
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+    from .core.daemon import DaemonServer
+    from .core.session import DS2Session
+    from .decoders.ms42_general import decode_general
+    from .util.cli import open_ds2_or_exit, rate_from_args
+
+    ring = None
+    if args.shm:
+        import dataclasses
+        from .core.shmring import SampleRing
+        from .decoders.ms42_general import Ms42General
+        channels = [] if args.no_decode else [f.name for f in dataclasses.fields(Ms42General)]
+        ring = SampleRing.create(args.shm, args.shm_size, channels)
+
+    ds2 = open_ds2_or_exit(port=args.port, baud=args.baud, debug=args.debug, low_latency=args.low_latency)
+    if not ds2.init_ecu():
+        print("ECU did not answer init yet; the session keeps retrying.")
+    srv = DaemonServer(
+        DS2Session(ds2),
+        hex_to_bytes(args.hex),
+        hz=args.hz,
+        socket_path=args.socket,
+        backlog=args.backlog,
+        decode=decode_general if not args.no_decode else None,
+        rate=rate_from_args(args),
+        ring=ring,
+    )
+    try:
+        srv.start()
+    except RuntimeError as exc:
+        ds2.close()
+        if ring:
+            ring.close()
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"mslive daemon polling {args.port} @ {args.hz} Hz on {srv.socket_path}. Ctrl+C to stop.")
+    if ring:
+        print(f"  shared-memory ring '{ring.name}': {ring.capacity} samples")
+    try:
+        while True:
+            time.sleep(args.status_every or 3600)
+            if args.status_every:
+                print(srv.summary())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.stop()
+        ds2.close()
+        if ring:
+            ring.close()
+        print(srv.summary())
+    return 0
+
+
+def _attach_shm(args: argparse.Namespace) -> int:
+    from .core.shmring import SampleRing
+
+    try:
+        ring = SampleRing.attach(args.shm)
+    except (FileNotFoundError, ValueError) as exc:
+        print(f"Failed to attach to ring '{args.shm}': {exc}", file=sys.stderr)
+        return 1
+    print(f"Attached to ring '{ring.name}' ({ring.capacity} samples). Ctrl+C to stop.")
+    last = ring.write_seq
+    n = 0
+    try:
+        while not args.count or n < args.count:
+            time.sleep(0.1)
+            for seq in range(last + 1, ring.write_seq + 1):
+                rec = ring.read(seq)
+                last = seq
+                if rec is None:
+                    continue
+                n += 1
+                if args.raw or not ring.channels:
+                    print(f"#{rec.seq} {rec.ts:.3f} {len(rec.resp):4d}: {bytes_to_hex(rec.resp)}")
+                else:
+                    vals = "  ".join(f"{k}={v:g}" for k, v in zip(ring.channels, rec.values))
+                    print(f"#{rec.seq} {rec.ts:.3f} {vals}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if ring.overruns:
+            print(f"{ring.overruns} sample(s) overwritten before they were read.")
+        ring.close()
+    return 0
+
+
+def cmd_attach(args: argparse.Namespace) -> int:
+    from .core.daemon import DaemonClient
+
+    if args.shm:
+        return _attach_shm(args)
+
+    c = DaemonClient(args.socket)
+    try:
+        c.open()
+    except (OSError, TimeoutError) as exc:
+        print(f"Failed to attach to '{c.socket_path}': {exc}", file=sys.stderr)
+        return 1
+    print(f"Attached to {c.socket_path} (polling {bytes_to_hex(c.payload)}). Ctrl+C to stop.")
+    n = 0
+    try:
+        while not args.count or n < args.count:
+            s = c.recv(timeout_s=5.0)
+            n += 1
+            if s.error is not None:
+                print(f"#{s.seq} {s.ts:.3f} ERR {s.error}")
+            elif args.raw or not s.decoded:
+                print(f"#{s.seq} {s.ts:.3f} {len(s.resp):4d}: {bytes_to_hex(s.resp)}")
+            else:
+                vals = "  ".join(f"{k}={v:g}" for k, v in s.decoded.items())
+                print(f"#{s.seq} {s.ts:.3f} {vals}")
+    except KeyboardInterrupt:
+        pass
+    except (ConnectionError, TimeoutError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    finally:
+        c.close()
+    return 0
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(prog="mslive")
     sub = ap.add_subparsers(dest="cmd", required=True)
@@ -173,23 +571,85 @@ def main() -> None:
     sp.add_argument("--baud", type=int, default=10400)
     sp.add_argument("--hex", required=True, help='e.g. "80 10 F1 3E 00"')
     sp.add_argument("--read-for", type=float, default=2.0)
-    sp.add_argument("--record", help="Write raw TX/RX recording file (.mslr)")
+    _add_record_args(sp, default_flush="frame")
     sp.set_defaults(func=cmd_send)
 
     sp = sub.add_parser("poll", help="Poll request(s) from a JSON file")
     sp.add_argument("--port", required=True)
-    sp.add_argument("--baud", type=int, default=10400)
+    sp.add_argument("--baud", type=int, default=None, help="Default: 9600 with --ds2, else 10400")
     sp.add_argument("--poll-file", required=True)
-    sp.add_argument("--record", help="Write raw TX/RX recording file (.mslr)")
+    _add_record_args(sp, default_flush="interval")
     sp.add_argument("--print-rx", action="store_true", help="Print RX frames as hex")
+    sp.add_argument("--raw", action="store_true", help="Pass RX bytes through as read (no DS2 framing)")
+    sp.add_argument("--ds2", action="store_true",
+                    help="DS2 jobs: hex without checksum, wait for each response before the next "
+                         "request (optional per-poll \"priority\")")
+    sp.add_argument("--asyncio", action="store_true",
+                    help="With --ds2: run each job as a task on the asyncio client (serial ports only)")
     sp.add_argument("--stop-after", type=float, default=None, help="Stop after N seconds")
     sp.set_defaults(func=cmd_poll)
 
     sp = sub.add_parser("replay", help="Replay a .mslr recording")
     sp.add_argument("--file", required=True)
     sp.add_argument("--realtime", action="store_true", help="Sleep to approximate original timing")
+    sp.add_argument("--seek-s", type=float, default=0.0, help="Start N seconds into the recording")
+    sp.add_argument("--until-s", type=float, default=None, help="Stop N seconds into the recording")
+    sp.add_argument("--dir", choices=["tx", "rx"], default=None, help="Only frames in this direction")
     sp.set_defaults(func=cmd_replay)
 
+    sp = sub.add_parser("upgrade", help="Rewrite a .mslr recording as indexed MSLR v2")
+    sp.add_argument("--file", required=True)
+    sp.add_argument("--out", help="Output path (default: <file>.v2.mslr)")
+    sp.add_argument("--block-size", type=int, default=64 * 1024)
+    sp.add_argument("--codec", choices=["raw", "zlib", "zstd", "auto"], default="raw",
+                    help="Block compression (auto = zstd if installed, else zlib)")
+    sp.add_argument("--delta", action="store_true", help="XOR-delta code frames (see --record-delta)")
+    sp.set_defaults(func=cmd_upgrade)
+
+    sp = sub.add_parser("convert", help="Convert CSV logs (files or directories) to MSLR or columnar MSCF")
+    sp.add_argument("paths", nargs="+", help="CSV files or directories of *.csv")
+    sp.add_argument("--out", help="Output directory (default: next to each CSV)")
+    sp.add_argument("--format", choices=["mslr", "mscf"], default="mslr")
+    sp.add_argument("--codec", choices=["raw", "zlib", "zstd", "auto"], default="raw", help="MSLR block compression")
+    sp.add_argument("--delta", action="store_true", help="XOR-delta code MSLR frames")
+    sp.add_argument("--jobs", type=int, default=None, help="Worker processes (default: one per CPU)")
+    sp.add_argument("--force", action="store_true", help="Convert even files that are up to date")
+    sp.set_defaults(func=cmd_convert)
+
+    sp = sub.add_parser("recover", help="Copy the intact part of a damaged .mslr recording to a clean file")
+    sp.add_argument("--file", required=True)
+    sp.add_argument("--out", help="Output path (default: <file>.recovered.mslr)")
+    sp.add_argument("--block-size", type=int, default=64 * 1024, help="Block size when re-encoding a v1 file")
+    sp.set_defaults(func=cmd_recover)
+
+    sp = sub.add_parser("emulate", help="Emulate an MS42 on a pseudo-terminal (Linux)")
+    sp.add_argument("--seed", nargs="*", help="CSV logs (or dirs) with raw_hex or b0..b31 to replay as GEN responses")
+    sp.add_argument("--limit", type=int, default=0, help="Max seed frames to load (0 = all)")
+    sp.add_argument("--baud", type=int, default=9600)
+    sp.add_argument("--delay-ms", type=float, default=10.0, help="ECU response delay after each request")
+    sp.add_argument("--no-echo", action="store_true", help="Do not echo TX bytes (non-K-line adapters)")
+    sp.add_argument("--tcp", help="Serve on TCP HOST:PORT (ser2net-style) instead of a pty")
+    sp.set_defaults(func=cmd_emulate)
+
+    sp = sub.add_parser("daemon", help="Own the DS2 port, poll once and serve samples on a Unix socket")
+    add_common_args(sp, default_baud=9600, default_hz=10.0)
+    sp.add_argument("--port", required=True)
+    sp.add_argument("--hex", default="12 05 0B 03", help="DS2 request to poll, without checksum")
+    sp.add_argument("--socket", default=None, help="Unix socket path (default: $XDG_RUNTIME_DIR/mslive.sock)")
+    sp.add_argument("--backlog", type=int, default=256, help="Samples queued per client before the oldest are dropped")
+    sp.add_argument("--no-decode", action="store_true", help="Serve raw frames only")
+    sp.add_argument("--status-every", type=float, default=0, help="Print a status line every N seconds")
+    sp.add_argument("--shm", metavar="NAME", help="Also publish samples to a shared-memory ring (e.g. mslive)")
+    sp.add_argument("--shm-size", type=int, default=4096, help="Ring capacity in samples")
+    sp.set_defaults(func=cmd_daemon)
+
+    sp = sub.add_parser("attach", help="Print samples from a running mslive daemon")
+    sp.add_argument("--socket", default=None)
+    sp.add_argument("--count", type=int, default=0, help="Stop after N samples (0 = run until Ctrl+C)")
+    sp.add_argument("--raw", action="store_true", help="Print raw frames instead of decoded channels")
+    sp.add_argument("--shm", metavar="NAME", help="Read the daemon's shared-memory ring instead of the socket")
+    sp.set_defaults(func=cmd_attach)
+
     args = ap.parse_args()
     rc = args.func(args)
     raise SystemExit(rc)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Optional, Protocol, TypeVar
+
+from .ratectl import AdaptiveRate
+
+T = TypeVar("T")
+
+
+class Requester(Protocol):
+    """Anything with DS2's send(): DS2, ReplayDS2, ..."""
+    def send(self, payload_no_chk: bytes) -> bytes: ...
+
+
+@dataclass(frozen=True)
+class Sample:
+    seq: int
+    ts: float                       # wall clock (time.time()) when the response arrived
+    mono: float                     # time.monotonic() at the same moment
+    resp: Optional[bytes] = None
+    decoded: Any = None
+    error: Optional[str] = None
+    is_timeout: bool = False
+    timeouts: int = 0               # running count, so readers never miss one
+
+
+class LatestSlot(Generic[T]):
+    """
+    Single-slot mailbox. The writer replaces the item, readers take the newest.
+    Reference assignment is atomic under the GIL, so neither side locks and
+    the reader never blocks on the writer.
+    """
+    def __init__(self) -> None:
+        self._item: Optional[T] = None
+
+    def publish(self, item: T) -> None:
+        self._item = item
+
+    def latest(self) -> Optional[T]:
+        return self._item
+
+
+class AcquisitionWorker(threading.Thread):
+    """
+    Polls one DS2 request on a background thread and publishes every result
+    (response or error) as a Sample into `slot`. Uses the same drift-free
+    next_t scheduling as the apps did inline.
+
+    on_sample runs on the worker thread, which keeps things like CSV writes
+    off the caller's (render) loop. With `rate` set, the period follows the
+    AdaptiveRate controller instead of the fixed hz.
+    """
+    def __init__(
+        self,
+        d: Requester,
+        payload: bytes,
+        hz: float,
+        decode: Optional[Callable[[bytes], Any]] = None,
+        on_sample: Optional[Callable[[Sample], None]] = None,
+        rate: Optional[AdaptiveRate] = None,
+    ):
+        super().__init__(name="mslive-acq", daemon=True)
+        self.d = d
+        self.payload = payload
+        self.period = 1.0 / max(hz, 0.2)
+        self.decode = decode
+        self.on_sample = on_sample
+        self.rate = rate
+        self.slot: LatestSlot[Sample] = LatestSlot()
+        self.timeouts = 0
+        self._stop_evt = threading.Event()
+
+    def stop(self, join_timeout: Optional[float] = None) -> None:
+        """
+        Stop polling. By default waits for the thread to finish, so a send()
+        still in flight (up to its timeout plus any recovery backoff) and the
+        on_sample call after it are done before the caller closes logs.
+        """
+        self._stop_evt.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(join_timeout)
+
+    def poll_once(self, seq: int) -> Sample:
+        t0 = time.monotonic()
+        try:
+            resp = self.d.send(self.payload)
+            if self.rate:
+                self.rate.observe(time.monotonic() - t0, ok=True)
+            decoded = self.decode(resp) if self.decode else None
+            return Sample(seq=seq, ts=time.time(), mono=time.monotonic(), resp=resp,
+                          decoded=decoded, timeouts=self.timeouts)
+        except TimeoutError as e:
+            self.timeouts += 1
+            if self.rate:
+                self.rate.observe(None, ok=False)
+            return Sample(seq=seq, ts=time.time(), mono=time.monotonic(), error=str(e),
+                          is_timeout=True, timeouts=self.timeouts)
+        except Exception as e:
+            return Sample(seq=seq, ts=time.time(), mono=time.monotonic(), error=str(e),
+                          timeouts=self.timeouts)
+
+    def run(self) -> None:
+        seq = 0
+        next_t = time.monotonic()
+        while not self._stop_evt.is_set():
+            seq += 1
+            s = self.poll_once(seq)
+            self.slot.publish(s)
+            if self.on_sample:
+                try:
+                    self.on_sample(s)
+                except Exception as e:
+                    print(f"[acq] on_sample failed: {e}")
+
+            if self.rate:
+                self.period = self.rate.period
+
+            # stable scheduler (avoid drift); after a long stall (timeout)
+            # restart from now instead of bursting to catch up
+            next_t += self.period
+            now = time.monotonic()
+            if next_t < now - self.period:
+                next_t = now
+            if next_t > now:
+                self._stop_evt.wait(next_t - now)
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Optional, Protocol
+
+import serial
+
+from .framing import DS2FrameParser, xor_checksum
+
+
+class AsyncTransport(Protocol):
+    async def open(self) -> None: ...
+    async def close(self) -> None: ...
+    def write(self, data: bytes) -> None: ...
+    async def drain(self) -> None: ...
+    async def read(self, max_bytes: int = 4096) -> bytes: ...
+    def read_nowait(self, max_bytes: int = 4096) -> bytes: ...
+
+
+class AsyncSerialTransport:
+    """
+    pyserial port driven by the event loop.
+
+    On POSIX the port fd is registered with loop.add_reader(), so a read()
+    waits without a thread or a polling sleep. Ports without a fileno()
+    (Windows) fall back to a short blocking read in the default executor.
+    Line settings default to DS2's 8E1.
+    """
+    def __init__(self, port: str, baud: int = 9600, parity: str = serial.PARITY_EVEN):
+        self.port = port
+        self.baud = baud
+        self.parity = parity
+        self.ser: Optional[serial.Serial] = None
+        self._fd: Optional[int] = None
+
+    async def open(self) -> None:
+        if self.ser and self.ser.is_open:
+            return
+        self.ser = serial.Serial(
+            port=self.port,
+            baudrate=self.baud,
+            bytesize=serial.EIGHTBITS,
+            parity=self.parity,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=0,  # non-blocking; waiting is the loop's job
+        )
+        try:
+            self._fd = self.ser.fileno()
+        except Exception:
+            self._fd = None
+            self.ser.timeout = 0.05
+
+    async def close(self) -> None:
+        if self.ser:
+            try:
+                self.ser.close()
+            finally:
+                self.ser = None
+                self._fd = None
+
+    def write(self, data: bytes) -> None:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        self.ser.write(data)
+
+    async def drain(self) -> None:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        # tcdrain() blocks until the UART is empty: keep it off the loop
+        await asyncio.get_running_loop().run_in_executor(None, self.ser.flush)
+
+    def read_nowait(self, max_bytes: int = 4096) -> bytes:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        waiting = self.ser.in_waiting
+        return self.ser.read(min(max_bytes, waiting)) if waiting else b""
+
+    async def read(self, max_bytes: int = 4096) -> bytes:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._fd is None:
+                data = await loop.run_in_executor(None, self.ser.read, max_bytes)
+            else:
+                data = self.read_nowait(max_bytes)
+            if data:
+                return data
+            if self._fd is not None:
+                await self._readable(loop)
+
+    async def _readable(self, loop: asyncio.AbstractEventLoop) -> None:
+        assert self._fd is not None
+        fut: asyncio.Future[None] = loop.create_future()
+
+        def _wake() -> None:
+            if not fut.done():
+                fut.set_result(None)
+
+        loop.add_reader(self._fd, _wake)
+        try:
+            await fut
+        finally:
+            loop.remove_reader(self._fd)
+
+
+class MemoryTransport:
+    """
+    In-memory stand-in for the cable, for tests and zero-I/O runs.
+
+    Everything written is echoed back (like the K-line) and then handed to
+    `responder`, whose return value is delivered as the ECU's reply.
+    feed() injects arbitrary bytes (garbage, late frames, ...).
+    """
+    def __init__(self, responder: Optional[Callable[[bytes], bytes]] = None, echo: bool = True):
+        self.responder = responder
+        self.echo = echo
+        self.written: list[bytes] = []
+        self._rx = bytearray()
+        self._evt = asyncio.Event()
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        self._rx.clear()
+
+    def feed(self, data: bytes) -> None:
+        if data:
+            self._rx += data
+            self._evt.set()
+
+    def write(self, data: bytes) -> None:
+        self.written.append(bytes(data))
+        if self.echo:
+            self.feed(data)
+        if self.responder:
+            self.feed(self.responder(bytes(data)))
+
+    async def drain(self) -> None:
+        pass
+
+    def read_nowait(self, max_bytes: int = 4096) -> bytes:
+        out = bytes(self._rx[:max_bytes])
+        del self._rx[:max_bytes]
+        if not self._rx:
+            self._evt.clear()
+        return out
+
+    async def read(self, max_bytes: int = 4096) -> bytes:
+        while not self._rx:
+            await self._evt.wait()
+        return self.read_nowait(max_bytes)
+
+
+class AsyncDS2:
+    """
+    asyncio flavour of mslive.core.ds2.DS2: same framing, checksum and echo
+    rules (via DS2FrameParser), but send() is awaitable, so K-line waits can
+    overlap with other tasks in the same loop.
+
+    The K-line is half-duplex: concurrent send() calls are serialised.
+    Cancelling a send() is safe; leftovers of its reply are dropped as stale
+    (or resynced past) by the next one.
+    """
+    def __init__(self, transport: AsyncTransport, timeout: float = 1.5, debug: bool = False):
+        self.transport = transport
+        self.timeout = timeout
+        self.debug = debug
+        self.initialized = False
+        self.parser = DS2FrameParser()
+        self._lock = asyncio.Lock()
+        self._init_lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        await self.transport.open()
+
+    async def close(self) -> None:
+        await self.transport.close()
+
+    def _drain_stale(self) -> None:
+        while True:
+            data = self.transport.read_nowait()
+            if not data:
+                return
+            for fr in self.parser.feed(data):
+                if self.debug:
+                    print(f"[AsyncDS2] Dropping stale frame: {fr.hex(' ')}")
+
+    async def _recv(self, addr: int) -> bytes:
+        while True:
+            data = await self.transport.read(self.parser.wanted())
+            for resp in self.parser.feed(data):
+                if resp[0] == addr:
+                    return resp
+                if self.debug:
+                    print(f"[AsyncDS2] Ignoring frame from 0x{resp[0]:02X}: {resp.hex(' ')}")
+
+    async def _transact(self, frame: bytes, timeout: Optional[float], fresh: bool = False) -> bytes:
+        async with self._lock:
+            if fresh:
+                self.parser.clear()  # new session: nothing buffered is worth keeping
+            self._drain_stale()
+            self.parser.cancel_echoes()
+            self.parser.expect_echo(frame)
+            if self.debug:
+                print(f"[AsyncDS2] TX ({len(frame)} bytes): {frame.hex(' ')}")
+            self.transport.write(frame)
+            await self.transport.drain()
+            try:
+                resp = await asyncio.wait_for(self._recv(frame[0]), self.timeout if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                # same last resort as DS2: rescan a stalled partial frame
+                pending = self.parser.pending
+                while self.parser.pending:
+                    for resp in self.parser.resync():
+                        if resp[0] == frame[0]:
+                            return resp
+                if pending:
+                    raise TimeoutError(f"Incomplete DS2 response: {pending} bytes pending") from None
+                raise TimeoutError("No DS2 response header received") from None
+            if self.debug:
+                print(f"[AsyncDS2] RX ({len(resp)} bytes): {resp.hex(' ')}")
+            return resp
+
+    async def init_ecu(self) -> bool:
+        init_msg = bytes([0x12, 0x04, 0x81, 0x12 ^ 0x04 ^ 0x81])
+        try:
+            await self._transact(init_msg, None, fresh=True)
+        except TimeoutError:
+            return False
+        self.initialized = True
+        return True
+
+    async def send(self, payload_no_chk: bytes, timeout: Optional[float] = None) -> bytes:
+        """
+        Send a DS2 request and await the response.
+        payload_no_chk: [dest_addr] [service] [data...]
+        """
+        if not self.initialized:
+            async with self._init_lock:  # concurrent first sends: one init
+                if not self.initialized and not await self.init_ecu():
+                    raise RuntimeError("Failed to initialize ECU communication")
+        frame = payload_no_chk + bytes([xor_checksum(payload_no_chk)])
+        return await self._transact(frame, timeout)
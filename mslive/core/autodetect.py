@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .ds2 import DS2, DS2Config
+from .lowlatency import ADAPTER_VIDS
+from .transport import list_serial_ports
+
+REQ_IDENT = bytes.fromhex("12 04 00")  # ECU identification, answered with 12 xx A0 ...
+
+
+@dataclass
+class ProbeConfig:
+    baud: int = 9600
+    settle_s: float = 0.1     # much shorter than a normal open; a miss only costs a retry
+    timeout_s: float = 0.4    # IDENT round trip is ~30 ms at 9600 baud
+    max_workers: int = 8
+    low_latency: bool = False
+
+
+@dataclass
+class ProbeResult:
+    port: str
+    ident: bytes
+    rtt_s: float
+    d: Optional[DS2] = None   # still open: the caller keeps using it
+
+
+def cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "mslive" / "last_port"
+
+
+def load_cached_port() -> Optional[str]:
+    try:
+        port = cache_path().read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return port or None
+
+
+def save_cached_port(port: str) -> None:
+    p = cache_path()
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(port + "\n", encoding="utf-8")
+    except OSError:
+        pass  # read-only home: autodetect still works, just without the head start
+
+
+def rank_candidates(ports: Optional[list[dict]] = None, cached: Optional[str] = None) -> list[str]:
+    """
+    Probe order: last good port, then known K+DCAN chips (FTDI, CH340),
+    then other USB serial devices, then the rest.
+    """
+    if ports is None:
+        ports = list_serial_ports()
+
+    def _rank(p: dict) -> tuple[int, str]:
+        dev = p.get("device") or ""
+        if cached and dev == cached:
+            return (0, dev)
+        if p.get("vid") in ADAPTER_VIDS:
+            return (1, dev)
+        if p.get("vid") is not None:
+            return (2, dev)
+        return (3, dev)
+
+    return [p["device"] for p in sorted(ports, key=_rank) if p.get("device")]
+
+
+def probe(port: str, cfg: Optional[ProbeConfig] = None, debug: bool = False) -> Optional[ProbeResult]:
+    """Open `port`, ask for identification once. Keeps the port open on success."""
+    cfg = cfg or ProbeConfig()
+    d = DS2(DS2Config(
+        port=port,
+        baud=cfg.baud,
+        timeout=cfg.timeout_s,
+        settle_s=cfg.settle_s,
+        low_latency=cfg.low_latency,
+        debug=debug,
+    ))
+    try:
+        d.open()
+        d.initialized = True  # IDENT itself proves the ECU talks
+        t0 = time.monotonic()
+        resp = d.send(REQ_IDENT)
+        rtt = time.monotonic() - t0
+    except Exception:
+        # busy, missing, not a tty (termios.error), silent: just not this one
+        d.close()
+        return None
+    if len(resp) < 4 or resp[0] != REQ_IDENT[0] or resp[2] != 0xA0:
+        d.close()
+        return None
+    return ProbeResult(port=port, ident=resp, rtt_s=rtt, d=d)
+
+
+def autodetect(
+    cfg: Optional[ProbeConfig] = None,
+    ports: Optional[list[dict]] = None,
+    use_cache: bool = True,
+    debug: bool = False,
+) -> Optional[ProbeResult]:
+    """
+    Probe every candidate port at once and return the first whose ECU
+    answers IDENT (its DS2 left open), or None. On ties the better-ranked
+    port wins. The winner is cached so the next start ranks it first.
+    """
+    cfg = cfg or ProbeConfig()
+    cached = load_cached_port() if use_cache else None
+    candidates = rank_candidates(ports, cached)
+    if not candidates:
+        return None
+    if debug:
+        print(f"[autodetect] probing {', '.join(candidates)}")
+
+    winner: Optional[ProbeResult] = None
+    pool = ThreadPoolExecutor(max_workers=max(1, min(cfg.max_workers, len(candidates))), thread_name_prefix="mslive-probe")
+    futures = {pool.submit(probe, port, cfg, debug): i for i, port in enumerate(candidates)}
+    pending = set(futures)
+    try:
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            hits = [(futures[f], f.result()) for f in done if f.result() is not None]
+            if hits:
+                hits.sort(key=lambda x: x[0])
+                winner = hits[0][1]
+                for _, r in hits[1:]:
+                    r.d.close()
+    finally:
+        # the losers still probing finish within one timeout; close any hit
+        for f in pending:
+            f.add_done_callback(lambda f: f.result() and f.result().d.close())
+        pool.shutdown(wait=False)
+
+    if winner is not None and use_cache:
+        save_cached_port(winner.port)
+    return winner
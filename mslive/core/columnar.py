@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Sequence
+
+# MSCF: frames stored column by column, for analysis tools that want whole
+# columns at once (one read, or np.frombuffer, per column):
+#
+#   header  HDR: "MSCF" u16 version u16 width u32 n_rows u32 reserved
+#   ts      n_rows x f64   (seconds since epoch)
+#   len     n_rows x u8    (frame length, <= width)
+#   raw     n_rows x width (each frame zero padded to width)
+MAGIC = b"MSCF"
+VERSION = 1
+HDR = struct.Struct("<4sHHII")
+
+
+def write_columnar(f: BinaryIO, ts: Sequence[float], frames: Sequence[bytes]) -> int:
+    """Write the frames (all at most 255 bytes) as MSCF. Returns the number of bytes written."""
+    if len(ts) != len(frames):
+        raise ValueError("ts and frames differ in length")
+    width = max((len(fr) for fr in frames), default=0)
+    if width > 255:
+        raise ValueError("MSCF frames are at most 255 bytes (one DS2 frame)")
+    n = f.write(HDR.pack(MAGIC, VERSION, width, len(frames), 0))
+    col = array("d", ts)
+    if struct.pack("=d", 1.0) != struct.pack("<d", 1.0):
+        col.byteswap()
+    n += f.write(col.tobytes())
+    n += f.write(bytes(len(fr) for fr in frames))
+    n += f.write(b"".join(fr.ljust(width, b"\0") for fr in frames))
+    return n
+
+
+@dataclass
+class ColumnarFrames:
+    width: int
+    ts: array          # array("d")
+    lens: bytes
+    raw: bytes         # n x width
+
+    @classmethod
+    def read(cls, f: BinaryIO) -> "ColumnarFrames":
+        head = f.read(HDR.size)
+        if len(head) != HDR.size or head[:4] != MAGIC:
+            raise ValueError("Not an MSCF file (bad magic)")
+        _, version, width, n, _ = HDR.unpack(head)
+        if version != VERSION:
+            raise ValueError(f"Unsupported MSCF version {version}")
+        ts = array("d")
+        ts.frombytes(f.read(8 * n))
+        if struct.pack("=d", 1.0) != struct.pack("<d", 1.0):
+            ts.byteswap()
+        lens = f.read(n)
+        raw = f.read(n * width)
+        if len(ts) != n or len(lens) != n or len(raw) != n * width:
+            raise ValueError("Corrupt MSCF file (truncated)")
+        return cls(width=width, ts=ts, lens=lens, raw=raw)
+
+    def __len__(self) -> int:
+        return len(self.lens)
+
+    def frame(self, i: int) -> bytes:
+        off = i * self.width
+        return self.raw[off:off + self.lens[i]]
+
+    def __iter__(self) -> Iterator[tuple[float, bytes]]:
+        w = self.width
+        for i, (t, ln) in enumerate(zip(self.ts, self.lens)):
+            yield t, self.raw[i * w:i * w + ln]
+
+    def numpy(self):
+        """(ts, lens, raw) as NumPy arrays; raw is n x width. Zero-copy views."""
+        import numpy as np  # optional dependency
+        n = len(self)
+        return (
+            np.frombuffer(self.ts, dtype="=f8"),
+            np.frombuffer(self.lens, dtype="u1"),
+            np.frombuffer(self.raw, dtype="u1").reshape(n, self.width),
+        )
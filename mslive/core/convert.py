@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .columnar import write_columnar
+from .framing import gen_frame_from_b, xor_checksum
+from .record import Recorder, RecorderConfig
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+REQ_GENERAL_FRAME = REQ_GENERAL + bytes([xor_checksum(REQ_GENERAL)])  # as sent on the wire
+MANIFEST = ".mslive-convert.json"
+EXTENSIONS = {"mslr": ".mslr", "mscf": ".mscf"}
+_B_COLS = [f"b{i}" for i in range(32)]
+
+
+def detect_schema(header: Iterable[str]) -> Optional[str]:
+    """
+    Which CSV layout a log uses, from its header row:
+      raw_hex  full GEN responses as hex (early captures)
+      logger   b0..b31 next to t_raw_a/t_raw_b (logger_csv)
+      dash     b0..b31 next to coolant_c/oil_c (dash_pygame)
+      b        any other file with b0..b31
+    None if there is no frame data to pull out.
+    """
+    cols = set(header)
+    if "raw_hex" in cols:
+        return "raw_hex"
+    if not cols.issuperset(_B_COLS):
+        return None
+    if "t_raw_a" in cols:
+        return "logger"
+    if "coolant_c" in cols:
+        return "dash"
+    return "b"
+
+
+def read_csv_frames(path: str | Path) -> tuple[Optional[str], list[float], list[bytes], int]:
+    """(schema, timestamps, GEN responses, rows skipped) of one CSV log."""
+    ts: list[float] = []
+    frames: list[bytes] = []
+    bad = 0
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        r = csv.reader(f)
+        header = next(r, [])
+        schema = detect_schema(header)
+        if schema is None:
+            return None, ts, frames, 0
+        col = {name: i for i, name in enumerate(header)}
+        i_ts = col.get("ts")
+        i_hex = col.get("raw_hex")
+        i_b = [col[c] for c in _B_COLS] if schema != "raw_hex" else []
+        for row in r:
+            try:
+                if i_hex is not None:
+                    fr = bytes.fromhex(row[i_hex])
+                    if len(fr) < 3 or fr[1] != len(fr) or xor_checksum(fr) != 0:
+                        raise ValueError("bad frame")
+                else:
+                    fr = gen_frame_from_b(int(row[i]) for i in i_b)
+                t = float(row[i_ts]) if i_ts is not None else float(len(ts))
+            except (ValueError, IndexError):
+                bad += 1  # torn last line, header repeated after a restart, ...
+                continue
+            ts.append(t)
+            frames.append(fr)
+    return schema, ts, frames, bad
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class ConvertResult:
+    src: str
+    out: str
+    status: str               # converted, up-to-date, unchanged (same hash), no-frames, error
+    options: str
+    schema: Optional[str] = None
+    frames: int = 0
+    bad_rows: int = 0
+    sha256: str = ""
+    mtime_ns: int = 0
+    size: int = 0
+    error: str = ""
+
+
+def convert_file(src: str, out: str, fmt: str = "mslr", codec: str = "raw", delta: bool = False,
+                 known_sha256: str = "") -> ConvertResult:
+    """
+    Convert one CSV log. A process-pool worker: takes and returns plain data.
+    When the file still hashes to `known_sha256` the output is left alone.
+    """
+    res = ConvertResult(src=src, out=out, status="converted", options=_options(fmt, codec, delta))
+    tmp = out + ".tmp"
+    try:
+        st = os.stat(src)
+        res.mtime_ns, res.size = st.st_mtime_ns, st.st_size
+        res.sha256 = file_sha256(src)
+        if known_sha256 and res.sha256 == known_sha256:
+            res.status = "unchanged"
+            return res
+        schema, ts, frames, bad = read_csv_frames(src)
+        res.schema, res.frames, res.bad_rows = schema, len(frames), bad
+        if not frames:
+            res.status = "no-frames"
+            return res
+        with open(tmp, "wb") as f:
+            if fmt == "mscf":
+                write_columnar(f, ts, frames)
+            else:
+                with Recorder(f, RecorderConfig(flush="close", version=2, codec=codec, delta=delta)) as rec:
+                    # the request/response pairs a live `mslive poll --record` would have written
+                    rec.write_many(x for t, fr in zip(ts, frames) for x in (("tx", REQ_GENERAL_FRAME, t), ("rx", fr, t)))
+        os.replace(tmp, out)  # never leave a half-written file under the final name
+    except (OSError, ValueError, csv.Error) as e:
+        res.status = "error"
+        res.error = str(e)
+        try:
+            os.remove(tmp)  # no half-written output left behind either
+        except OSError:
+            pass
+    return res
+
+
+def _options(fmt: str, codec: str, delta: bool) -> str:
+    return f"{fmt}:{codec if fmt == 'mslr' else '-'}:{'delta' if delta and fmt == 'mslr' else '-'}"
+
+
+def _load_manifest(out_dir: Path) -> dict:
+    try:
+        return json.loads((out_dir / MANIFEST).read_text(encoding="utf-8")).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir: Path, files: dict) -> None:
+    p = out_dir / MANIFEST
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": 1, "files": files}, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def collect_csvs(paths: Iterable[str | Path]) -> list[Path]:
+    out: list[Path] = []
+    for p in paths:
+        p = Path(p)
+        out.extend(sorted(p.glob("*.csv")) if p.is_dir() else [p])
+    return out
+
+
+def convert_paths(
+    paths: Iterable[str | Path],
+    out_dir: Optional[str | Path] = None,
+    fmt: str = "mslr",
+    codec: str = "raw",
+    delta: bool = False,
+    jobs: Optional[int] = None,
+    force: bool = False,
+) -> list[ConvertResult]:
+    """
+    Convert CSV logs (files or directories of *.csv) to MSLR or MSCF, next
+    to each source or into `out_dir`, across a process pool.
+
+    A manifest in each output directory remembers the (mtime, size, sha256)
+    of the source of every file converted there: sources whose mtime and
+    size still match are skipped without being read, ones that were only
+    touched are hashed and skipped if the content is the same.
+    """
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown output format {fmt!r} ({', '.join(EXTENSIONS)})")
+    options = _options(fmt, codec, delta)
+    manifests: dict[Path, dict] = {}
+    results: list[ConvertResult] = []
+    todo: list[tuple[str, str, str]] = []
+    for src in collect_csvs(paths):
+        od = Path(out_dir) if out_dir is not None else src.parent
+        od.mkdir(parents=True, exist_ok=True)
+        files = manifests.setdefault(od, _load_manifest(od))
+        out = od / (src.stem + EXTENSIONS[fmt])
+        key = out.name
+        ent = files.get(key)
+        known = ""
+        if ent and not force and ent.get("options") == options and ent.get("status") != "error" \
+                and (out.exists() or ent.get("status") == "no-frames"):
+            try:
+                st = src.stat()
+            except OSError:
+                st = None  # gone: convert_file reports it
+            if st is not None and ent.get("mtime_ns") == st.st_mtime_ns and ent.get("size") == st.st_size:
+                results.append(ConvertResult(**{**ent, "status": "up-to-date"}))
+                continue
+            known = ent.get("sha256", "")
+        todo.append((str(src), str(out), known))
+
+    if todo:
+        if jobs == 1 or len(todo) == 1:
+            done = [convert_file(s, o, fmt, codec, delta, k) for s, o, k in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                n = len(todo)
+                done = list(pool.map(convert_file, [t[0] for t in todo], [t[1] for t in todo], [fmt] * n,
+                                     [codec] * n, [delta] * n, [t[2] for t in todo]))
+        for res in done:
+            od = Path(res.out).parent
+            key = Path(res.out).name
+            if res.status == "unchanged":
+                # content as before: keep the old entry, just note the new mtime
+                ent = manifests[od][key]
+                ent.update(mtime_ns=res.mtime_ns, size=res.size)
+            elif res.status != "error":
+                manifests[od][key] = asdict(res)
+            results.append(res)
+
+    for od, files in manifests.items():
+        _save_manifest(od, files)
+    return results
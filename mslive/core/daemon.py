@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import selectors
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from .acquisition import AcquisitionWorker, Requester, Sample
+from .ratectl import AdaptiveRate
+from .shmring import SampleRing
+
+# Wire format (Unix stream socket, little-endian), every message:
+#   u16 body length, u8 type, body
+# HELLO  (server -> client on attach, again once channels are known): u8 version, u8 payload len, payload,
+#        channel names as utf-8, comma separated
+# SAMPLE: u8 flags, u32 seq, f64 ts, f64 mono, u32 timeouts, u8 n_channels,
+#         u16 data len, n_channels x f32, data (raw response, or error text)
+PROTO_VERSION = 1
+MSG_HELLO = 1
+MSG_SAMPLE = 2
+
+FLAG_TIMEOUT = 0x01
+FLAG_ERROR = 0x02
+
+_HDR = struct.Struct("<HB")
+_SAMPLE = struct.Struct("<BIddIBH")
+
+
+def default_socket_path() -> str:
+    run = os.environ.get("XDG_RUNTIME_DIR")
+    if run:
+        return os.path.join(run, "mslive.sock")
+    return os.path.join(tempfile.gettempdir(), f"mslive-{os.getuid()}.sock")
+
+
+def channel_names(decoded: Any) -> list[str]:
+    """Numeric fields of a decoder result (dataclass or dict), in order."""
+    if decoded is None:
+        return []
+    items = dataclasses.asdict(decoded) if dataclasses.is_dataclass(decoded) else dict(decoded)
+    return [k for k, v in items.items() if isinstance(v, (int, float))]
+
+
+def encode_hello(payload: bytes, channels: list[str]) -> bytes:
+    body = bytes([PROTO_VERSION, len(payload)]) + payload + ",".join(channels).encode("utf-8")
+    return _HDR.pack(len(body), MSG_HELLO) + body
+
+
+def encode_sample(s: Sample, channels: list[str]) -> bytes:
+    flags = 0
+    if s.is_timeout:
+        flags |= FLAG_TIMEOUT
+    if s.error is not None:
+        flags |= FLAG_ERROR
+        data = s.error.encode("utf-8", "replace")[:1024]
+        values: list[float] = []
+    else:
+        data = s.resp or b""
+        d = s.decoded
+        values = [float(getattr(d, c) if not isinstance(d, dict) else d[c]) for c in channels] if d is not None else []
+    body = (
+        _SAMPLE.pack(flags, s.seq & 0xFFFFFFFF, s.ts, s.mono, s.timeouts, len(values), len(data))
+        + struct.pack(f"<{len(values)}f", *values)
+        + data
+    )
+    return _HDR.pack(len(body), MSG_SAMPLE) + body
+
+
+def decode_sample(body: bytes, channels: list[str]) -> Sample:
+    flags, seq, ts, mono, timeouts, n, ln = _SAMPLE.unpack_from(body)
+    off = _SAMPLE.size
+    values = struct.unpack_from(f"<{n}f", body, off)
+    data = bytes(body[off + 4 * n: off + 4 * n + ln])
+    if flags & FLAG_ERROR:
+        return Sample(seq=seq, ts=ts, mono=mono, error=data.decode("utf-8", "replace"),
+                      is_timeout=bool(flags & FLAG_TIMEOUT), timeouts=timeouts)
+    return Sample(seq=seq, ts=ts, mono=mono, resp=data,
+                  decoded=dict(zip(channels, values)) if n else None, timeouts=timeouts)
+
+
+class _Client:
+    """One attached socket: a bounded backlog of encoded messages, oldest dropped first."""
+    def __init__(self, sock: socket.socket, backlog: int):
+        self.sock = sock
+        self.queue: deque[bytes] = deque(maxlen=backlog)
+        self.cur: Optional[memoryview] = None
+        self.dropped = 0
+
+    def push(self, msg: bytes) -> None:
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(msg)
+
+    @property
+    def pending(self) -> bool:
+        return self.cur is not None or bool(self.queue)
+
+    def flush(self) -> None:
+        """Send what the socket takes without blocking (raises OSError when the peer is gone)."""
+        while True:
+            if self.cur is None:
+                if not self.queue:
+                    return
+                self.cur = memoryview(self.queue.popleft())
+            try:
+                n = self.sock.send(self.cur)
+            except BlockingIOError:
+                return
+            self.cur = self.cur[n:] if n < len(self.cur) else None
+
+
+class DaemonServer:
+    """
+    Owns the DS2 link: one AcquisitionWorker polls `payload`, every Sample is
+    encoded once and queued to each attached client. A single selector thread
+    accepts clients and writes without blocking; a slow client only loses
+    its own oldest samples (`backlog` deep), never stalls the bus.
+    """
+    def __init__(
+        self,
+        d: Requester,
+        payload: bytes,
+        hz: float,
+        socket_path: Optional[str] = None,
+        backlog: int = 256,
+        decode: Optional[Callable[[bytes], Any]] = None,
+        rate: Optional[AdaptiveRate] = None,
+        ring: Optional[SampleRing] = None,
+    ):
+        self.payload = payload
+        self.ring = ring  # optional shared-memory copy for same-host readers
+        self.socket_path = socket_path or default_socket_path()
+        self.backlog = backlog
+        self.decode = decode
+        self.channels: Optional[list[str]] = None
+        self.clients: list[_Client] = []
+        self.sent = 0
+        self._last: Optional[Sample] = None  # newest sample fanned out, for clients attaching
+        self.worker = AcquisitionWorker(d, payload, hz=hz, decode=decode, on_sample=self._fanout, rate=rate)
+        self._lock = threading.Lock()
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._listener: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._io: Optional[threading.Thread] = None
+
+    def start(self) -> "DaemonServer":
+        if os.path.exists(self.socket_path):
+            # a live daemon answers; a stale socket file from a crash does not
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise RuntimeError(f"mslive daemon already running on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+        ls = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        ls.bind(self.socket_path)
+        ls.listen(16)
+        ls.setblocking(False)
+        self._listener = ls
+        self._sel.register(ls, selectors.EVENT_READ, "accept")
+        self._sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._io = threading.Thread(target=self._io_loop, name="mslive-daemon-io", daemon=True)
+        self._io.start()
+        self.worker.start()
+        return self
+
+    def stop(self) -> None:
+        self.worker.stop()
+        self._stop.set()
+        self._wake()
+        if self._io:
+            self._io.join(2.0)
+        for c in list(self.clients):
+            c.sock.close()
+        self.clients.clear()
+        if self._listener:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        self._sel.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # already pending, or shutting down
+
+    def _hello(self) -> bytes:
+        return encode_hello(self.payload, self.channels or [])
+
+    def _fanout(self, s: Sample) -> None:
+        # acquisition thread: encode once, queue everywhere, let the I/O thread write
+        if self.ring is not None:
+            self.ring.write_sample(s)
+        with self._lock:
+            hello = None
+            if self.channels is None and s.decoded is not None:
+                # first decoded sample names the channels; tell clients already attached
+                self.channels = channel_names(s.decoded)
+                hello = self._hello()
+            msg = encode_sample(s, self.channels or [])
+            self._last = s
+            for c in self.clients:
+                if hello:
+                    c.push(hello)
+                c.push(msg)
+        self.sent += 1
+        self._wake()
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        c = _Client(sock, self.backlog)
+        # under the fan-out lock: channels, newest sample and registration agree,
+        # so no sample falls between the snapshot and the first fan-out
+        with self._lock:
+            c.push(self._hello())
+            if self._last is not None:
+                # attaching is instant: the newest sample goes out right away
+                c.push(encode_sample(self._last, self.channels or []))
+            self.clients.append(c)
+        self._sel.register(sock, selectors.EVENT_READ, c)
+
+    def _drop(self, c: _Client) -> None:
+        with self._lock:
+            if c in self.clients:
+                self.clients.remove(c)
+        try:
+            self._sel.unregister(c.sock)
+        except (KeyError, ValueError):
+            pass
+        c.sock.close()
+
+    def _io_loop(self) -> None:
+        while not self._stop.is_set():
+            for key, mask in self._sel.select(0.5):
+                if key.data == "accept":
+                    self._accept()
+                elif key.data == "wake":
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif mask & selectors.EVENT_READ:
+                    # clients never talk; readable means closed (or junk to discard)
+                    try:
+                        if not key.fileobj.recv(4096):
+                            self._drop(key.data)
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        self._drop(key.data)
+            with self._lock:
+                clients = list(self.clients)
+            for c in clients:
+                try:
+                    c.flush()
+                except OSError:
+                    self._drop(c)
+                    continue
+                events = selectors.EVENT_READ | (selectors.EVENT_WRITE if c.pending else 0)
+                try:
+                    self._sel.modify(c.sock, events, c)
+                except (KeyError, ValueError):
+                    pass
+
+    def summary(self) -> str:
+        with self._lock:
+            n = len(self.clients)
+            dropped = sum(c.dropped for c in self.clients)
+        return f"{self.sent} samples, {n} client(s), {dropped} dropped for slow clients"
+
+
+class DaemonClient:
+    """Attach to a running daemon; recv() returns Samples as they are published."""
+    def __init__(self, socket_path: Optional[str] = None, timeout_s: float = 2.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout_s = timeout_s
+        self.sock: Optional[socket.socket] = None
+        self.payload = b""
+        self.channels: list[str] = []
+        self._buf = bytearray()
+
+    def open(self) -> None:
+        if self.sock:
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        try:
+            mtype, body = self._recv_msg(self.timeout_s)
+            if mtype != MSG_HELLO or body[0] != PROTO_VERSION:
+                raise ConnectionError("Not an mslive daemon (or protocol version mismatch)")
+        except (OSError, TimeoutError):
+            self.close()
+            raise
+        self._hello(body)
+
+    def _hello(self, body: bytes) -> None:
+        n = body[1]
+        self.payload = bytes(body[2:2 + n])
+        names = bytes(body[2 + n:]).decode("utf-8")
+        self.channels = names.split(",") if names else []
+
+    def close(self) -> None:
+        if self.sock:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+        self._buf.clear()
+
+    def _recv_msg(self, timeout_s: float) -> tuple[int, bytes]:
+        if not self.sock:
+            raise RuntimeError("Daemon client not open")
+        deadline = time.monotonic() + timeout_s
+        while True:
+            if len(self._buf) >= _HDR.size:
+                ln, mtype = _HDR.unpack_from(self._buf)
+                end = _HDR.size + ln
+                if len(self._buf) >= end:
+                    body = bytes(self._buf[_HDR.size:end])
+                    del self._buf[:end]
+                    return mtype, body
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("No sample from mslive daemon")
+            self.sock.settimeout(remaining)
+            try:
+                chunk = self.sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not chunk:
+                raise ConnectionError("mslive daemon closed the connection")
+            self._buf += chunk
+
+    def _take(self, mtype: int, body: bytes) -> Optional[Sample]:
+        if mtype == MSG_SAMPLE:
+            return decode_sample(body, self.channels)
+        if mtype == MSG_HELLO:
+            self._hello(body)
+        return None
+
+    def recv(self, timeout_s: Optional[float] = None) -> Sample:
+        """Next sample in order (the daemon drops the oldest if we fall behind)."""
+        while True:
+            s = self._take(*self._recv_msg(self.timeout_s if timeout_s is None else timeout_s))
+            if s is not None:
+                return s
+
+    def recv_latest(self, timeout_s: Optional[float] = None) -> Sample:
+        """Newest sample: skips whatever queued up since the last call, waits only if nothing did."""
+        s = self.recv(timeout_s)
+        self.sock.setblocking(False)
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    break
+                self._buf += chunk
+        except BlockingIOError:
+            pass
+        while len(self._buf) >= _HDR.size and len(self._buf) >= _HDR.size + _HDR.unpack_from(self._buf)[0]:
+            s = self._take(*self._recv_msg(0.0)) or s
+        return s
+
+
+class DaemonDS2:
+    """
+    Drop-in for DS2 in the apps (open/close/send). send() returns the newest
+    response the daemon polled since the last call (waiting for a fresh one
+    if there is none yet), so an app never polls faster than the daemon and
+    never lags behind it. The daemon's own Sample (timestamps, decoded
+    channels) is in `last_sample`.
+    """
+    def __init__(self, socket_path: Optional[str] = None, timeout_s: float = 2.0):
+        self.client = DaemonClient(socket_path, timeout_s=timeout_s)
+        self.last_sample: Optional[Sample] = None
+
+    def open(self) -> None:
+        self.client.open()
+
+    def close(self) -> None:
+        self.client.close()
+
+    def send(self, payload_no_chk: bytes) -> bytes:
+        if self.client.sock is None:
+            self.client.open()  # re-attach after the daemon went away
+        if bytes(payload_no_chk) != self.client.payload:
+            raise ValueError(
+                f"Daemon polls {self.client.payload.hex(' ')}, not {bytes(payload_no_chk).hex(' ')}"
+            )
+        try:
+            s = self.client.recv_latest()
+        except ConnectionError:
+            self.client.close()
+            raise
+        self.last_sample = s
+        if s.is_timeout:
+            raise TimeoutError(s.error or "DS2 timeout (daemon)")
+        if s.error is not None:
+            raise RuntimeError(s.error)
+        return s.resp or b""
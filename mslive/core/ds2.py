@@ -1,12 +1,13 @@
 import time
 from dataclasses import dataclass
-import serial
+from typing import Optional
 
-def xor_checksum(data: bytes) -> int:
-    x = 0
-    for b in data:
-        x ^= b
-    return x
+from .framing import DS2FrameParser, xor_checksum
+from .stats import LatencyHistogram
+from .transport import SerialConfig, Transport, open_transport
+
+# send() phases, in order: write+flush, our echo back, response header, rest of response
+PHASES = ("tx", "echo", "header", "body", "total")
 
 @dataclass
 class DS2Config:
@@ -14,203 +15,310 @@ class DS2Config:
     baud: int = 9600
     timeout: float = 1.5
     inter_byte_timeout: float = 0.05
+    low_latency: bool = False  # tune FTDI/CH340 receive latency on open (Linux)
+    settle_s: float = 0.5      # K+DCAN cables want ~0.5 s after open
     debug: bool = False
 
 class DS2:
     """
     BMW DS2 over ISO9141 K-line via K+DCAN cable.
+
+    Talks through a Transport: by default one is made from cfg.port on
+    open() (serial 8E1, or tcp://host:port for a network bridge). Pass one
+    in to run over anything else, e.g. a LoopbackTransport.
     """
-    def __init__(self, cfg: DS2Config):
+    def __init__(self, cfg: DS2Config, transport: Optional[Transport] = None):
         self.cfg = cfg
-        self.ser: serial.Serial | None = None
+        self.transport: Optional[Transport] = transport
+        self._own_transport = transport is None
+        self.is_open = False
         self.initialized = False
+        self.parser = DS2FrameParser()
+        self._frames: dict[bytes, bytes] = {}  # payload -> payload + checksum
+        self.hist = {name: LatencyHistogram() for name in PHASES}
+        self.counters = {"requests": 0, "ok": 0, "timeouts": 0, "incomplete": 0, "echo_misses": 0}
+        self.tap = None  # optional RecordingTap: gets every TX frame and every RX frame seen
 
     def open(self) -> None:
-        self.ser = serial.Serial(
-            port=self.cfg.port,
-            baudrate=self.cfg.baud,
-            bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_EVEN,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=self.cfg.timeout,
-            inter_byte_timeout=self.cfg.inter_byte_timeout,
-        )
+        if self.transport is None or self._own_transport:
+            self.transport = open_transport(
+                self.cfg.port,
+                SerialConfig.ds2(
+                    self.cfg.port,
+                    baud=self.cfg.baud,
+                    timeout_s=self.cfg.timeout,
+                    inter_byte_timeout_s=self.cfg.inter_byte_timeout,
+                    low_latency=self.cfg.low_latency,
+                    settle_s=self.cfg.settle_s,
+                ),
+            )
+        # serial transports sleep their settle time (cfg.settle_s)
+        self.transport.open()
+        self.is_open = True
+        self.parser.clear()
         if self.cfg.debug:
             print(f"[DS2] Opened {self.cfg.port} at {self.cfg.baud} baud")
-        
-        # Give cable time to settle
-        time.sleep(0.5)
+            if self.low_latency_report:
+                print(f"[DS2] Low latency: {self.low_latency_report.summary()}")
+
+    @property
+    def low_latency_report(self):
+        """What --low-latency changed on the port (None when not requested or not serial)."""
+        return getattr(self.transport, "low_latency_report", None)
 
     def close(self) -> None:
-        if self.ser:
-            self.ser.close()
-            self.ser = None
+        if self.transport and self.is_open:
+            self.transport.close()
+        self.is_open = False
 
-    def _read_exact(self, n: int) -> bytes:
-        if not self.ser:
+    def _t(self) -> Transport:
+        if not self.is_open or self.transport is None:
             raise RuntimeError("Serial not open")
-        buf = bytearray()
-        start_time = time.time()
-        while len(buf) < n:
-            chunk = self.ser.read(n - len(buf))
-            if not chunk:
-                if time.time() - start_time > self.cfg.timeout:
-                    if self.cfg.debug:
-                        print(f"[DS2] Timeout reading {n} bytes, got {len(buf)}: {buf.hex(' ') if buf else '(empty)'}")
-                    break
-            else:
-                buf += chunk
-        return bytes(buf)
+        return self.transport
+
+    def _drain_stale(self) -> None:
+        """
+        Push whatever is already buffered through the parser and drop the
+        complete frames (late answers to an earlier request). A trailing
+        partial frame is kept: the parser resyncs past it if it is garbage.
+        """
+        t = self._t()
+        waiting = t.available()
+        if not waiting:
+            return
+        stale = self.parser.feed(t.read(waiting))
+        if self.tap is not None:
+            now = time.monotonic()
+            for fr in stale:
+                self.tap.rx(fr, now)
+        if self.cfg.debug and stale:
+            for fr in stale:
+                print(f"[DS2] Dropping stale frame: {fr.hex(' ')}")
+
+    def _transact(self, frame: bytes) -> memoryview:
+        """
+        Write one frame and return the first valid non-echo frame from the ECU.
+        No fixed sleeps: bytes are read as they arrive, sized by what the parser
+        still needs, until cfg.timeout runs out.
+
+        Bytes are read straight into the parser's buffer; the returned view is
+        only valid until the next request. Each phase is timed into self.hist.
+        """
+        t = self._t()
+        parser = self.parser
+        hist = self.hist
+        tap = self.tap
+        self.counters["requests"] += 1
+        self._drain_stale()
+        parser.cancel_echoes()  # one exchange at a time: an echo still missing never comes
+        parser.expect_echo(frame)
+        if parser.addrs is None or frame[0] not in parser.addrs:
+            parser.addrs = {frame[0]}  # only the addressed ECU answers: anything else is noise
+        echoes0 = parser.echoes
+
+        t0 = time.monotonic()
+        t.write(frame)
+        t.drain()
+        t_tx = time.monotonic()
+        hist["tx"].record(t_tx - t0)
+        if tap is not None:
+            tap.tx(frame, t0)
+        t_echo = t_hdr = None
+
+        deadline = t_tx + self.cfg.timeout
+        while True:
+            n = parser.wanted()
+            got = t.readinto(parser.recv_view(n)) or 0
+            frames = parser.commit(got)
+            if (
+                not frames
+                and got < n
+                and parser.pending >= 2
+                and not t.wait_readable(min(deadline, time.monotonic() + self.cfg.inter_byte_timeout))
+            ):
+                # the line went quiet short of what the length byte promised (noise,
+                # or a corrupt length): look past it instead of waiting out the timeout
+                frames = parser.salvage()
+            now = time.monotonic()
+            if t_echo is None and parser.echoes != echoes0:
+                t_echo = now
+                hist["echo"].record(now - t_tx)
+                if tap is not None:
+                    tap.rx(frame, now)  # the K-line echo is our own frame coming back
+            if t_hdr is None and (frames or (t_echo is not None and parser.pending >= 2)):
+                t_hdr = now
+                hist["header"].record(now - (t_echo or t_tx))
+            for resp in frames:
+                if tap is not None:
+                    tap.rx(resp, now)
+                if resp[0] == frame[0]:
+                    if t_echo is None:
+                        self.counters["echo_misses"] += 1
+                    hist["body"].record(now - t_hdr)
+                    hist["total"].record(now - t0)
+                    self.counters["ok"] += 1
+                    return resp
+                if self.cfg.debug:
+                    print(f"[DS2] Ignoring frame from 0x{resp[0]:02X}: {resp.hex(' ')}")
+            if now >= deadline:
+                break
+
+        # A corrupt length byte can leave the parser waiting for bytes that
+        # never come; rescan what we have before giving up.
+        pending = parser.pending
+        while parser.pending:
+            for fr in parser.resync():
+                if tap is not None:
+                    tap.rx(fr, time.monotonic())
+                if fr[0] == frame[0]:
+                    self.counters["ok"] += 1
+                    return memoryview(fr)
+
+        if self.cfg.debug:
+            print(f"[DS2] ERROR: No valid response ({pending} bytes pending, {parser.dropped} dropped so far)")
+        if t_echo is None:
+            self.counters["echo_misses"] += 1
+        if pending:
+            self.counters["incomplete"] += 1
+            raise TimeoutError(f"Incomplete DS2 response: {pending} bytes pending")
+        self.counters["timeouts"] += 1
+        raise TimeoutError("No DS2 response header received")
+
+    def stats(self) -> dict:
+        """
+        Per-phase latency summaries (count, p50/p95/p99/mean/max in ms) and
+        error counters since open (or reset_stats()).
+        """
+        counters = dict(self.counters)
+        counters["bad_checksum"] = self.parser.bad_checksum
+        counters["bad_length"] = self.parser.bad_length
+        counters["resync_bytes"] = self.parser.dropped
+        counters["tap_dropped"] = self.tap.dropped if self.tap is not None else 0
+        return {"phases": {k: h.summary() for k, h in self.hist.items()}, "counters": counters}
+
+    def reset_stats(self) -> None:
+        for h in self.hist.values():
+            h.reset()
+        for k in self.counters:
+            self.counters[k] = 0
+        self.parser.dropped = self.parser.bad_checksum = self.parser.bad_length = 0
 
     def init_ecu(self) -> bool:
         """
         Initialize communication with ECU.
         DS2 typically uses start communication request.
         """
-        if not self.ser:
-            raise RuntimeError("Serial not open")
-        
+        t = self._t()
+
         if self.cfg.debug:
             print("[DS2] Starting ECU init...")
-        
-        # Clear buffers
-        self.ser.reset_input_buffer()
-        self.ser.reset_output_buffer()
-        
+
+        # Fresh session: nothing buffered is worth keeping
+        t.flush()
+        self.parser.clear()
+
         # DS2 Start Communication: 0x81 (addr 0x12 + 0x81 service)
         # Format: [dest_addr] [length] [service] [checksum]
         init_msg = bytes([0x12, 0x04, 0x81, 0x12 ^ 0x04 ^ 0x81])
-        
+
         if self.cfg.debug:
             print(f"[DS2] Init TX: {init_msg.hex(' ')}")
-        
-        self.ser.write(init_msg)
-        self.ser.flush()
-        time.sleep(0.05)
-        
-        # Discard echo
-        waiting = self.ser.in_waiting if self.ser else 0
-        if waiting >= len(init_msg):
-            echo = self._read_exact(len(init_msg))
+
+        try:
+            resp = self._transact(init_msg)
+        except TimeoutError:
+            resp = None
+        if resp is not None:
             if self.cfg.debug:
-                print(f"[DS2] Init echo: {echo.hex(' ')}")
-        
-        # Wait for response
-        time.sleep(0.1)
-        
-        waiting = self.ser.in_waiting if self.ser else 0
-        if self.cfg.debug:
-            print(f"[DS2] Bytes waiting after init: {waiting}")
-        
-        if waiting > 0:
-            # Read header
-            hdr = self._read_exact(2)
-            if len(hdr) == 2:
-                addr, total_len = hdr[0], hdr[1]
-                if self.cfg.debug:
-                    print(f"[DS2] Init response header: addr=0x{addr:02X}, len={total_len}")
-                
-                # Read rest of message
-                rest = self._read_exact(total_len - 2)
-                resp = hdr + rest
-                
-                if self.cfg.debug:
-                    print(f"[DS2] Init response: {resp.hex(' ')}")
-                
-                # If we got a valid response, consider initialized
-                if len(resp) == total_len:
-                    self.initialized = True
-                    return True
-        
+                print(f"[DS2] Init response: {resp.hex(' ')}")
+            self.initialized = True
+            return True
+
         if self.cfg.debug:
             print("[DS2] Init failed - no response")
         
         return False
 
-    def send(self, payload_no_chk: bytes) -> bytes:
+    def slow_init_5baud(self, addr: int = 0x12) -> None:
         """
-        Send a DS2 request and receive response.
-        payload_no_chk: [dest_addr] [service] [data...]
+        Bit-bang 5-baud init using the break condition (serial transports only).
+        Works on many FTDI K-line setups to wake ECU after a key-cycle.
         """
-        if not self.ser:
-            raise RuntimeError("Serial not open")
-        
+        t = self._t()
+        set_break = getattr(t, "set_break", None)
+        if set_break is None:
+            if self.cfg.debug:
+                print("[DS2] 5-baud init not possible on this transport")
+            return
+
+        bit_time = 0.200  # 5 baud
+
+        try:
+            set_break(False)
+            time.sleep(0.300)
+
+            t.flush()
+            self.parser.clear()
+
+            # Start bit (0) => low
+            set_break(True)
+            time.sleep(bit_time)
+
+            # 8 data bits LSB-first
+            for i in range(8):
+                bit = (addr >> i) & 1
+                set_break(bit == 0)
+                time.sleep(bit_time)
+
+            # Stop bit (1) => high
+            set_break(False)
+            time.sleep(bit_time)
+
+            time.sleep(0.300)
+
+            # Drain anything (sync bytes etc.)
+            t.flush()
+        except (OSError, ValueError) as e:
+            # If break_condition isn't supported by that driver, just ignore
+            if self.cfg.debug:
+                print(f"[DS2] 5-baud init not possible: {e}")
+
+    def request_frame(self, payload_no_chk: bytes) -> bytes:
+        """payload + checksum, built once per distinct payload."""
+        frame = self._frames.get(payload_no_chk)
+        if frame is None:
+            frame = bytes(payload_no_chk) + bytes([xor_checksum(payload_no_chk)])
+            self._frames[bytes(payload_no_chk)] = frame
+        return frame
+
+    def send_view(self, payload_no_chk: bytes) -> memoryview:
+        """
+        Like send(), without copying the response: returns a memoryview into
+        the receive buffer, valid until the next request. Use bytes(view) to keep it.
+        """
+        self._t()
+
         if not self.initialized:
             if self.cfg.debug:
                 print("[DS2] Not initialized, attempting init...")
             if not self.init_ecu():
                 raise RuntimeError("Failed to initialize ECU communication")
 
-        frame = payload_no_chk + bytes([xor_checksum(payload_no_chk)])
-        
+        frame = self.request_frame(payload_no_chk)
+
         if self.cfg.debug:
             print(f"[DS2] TX ({len(frame)} bytes): {frame.hex(' ')}")
-        
-        # Clear stale data
-        self.ser.reset_input_buffer()
-        
-        # Write frame
-        self.ser.write(frame)
-        self.ser.flush()
-        
-        # Wait for echo/response
-        time.sleep(0.05)
-        
-        if self.cfg.debug:
-            waiting = self.ser.in_waiting if self.ser else 0
-            print(f"[DS2] Bytes waiting after TX: {waiting}")
-        
-        # Handle echo
-        waiting = self.ser.in_waiting if self.ser else 0
-        if waiting >= len(frame):
-            echo = self._read_exact(len(frame))
-            if self.cfg.debug:
-                print(f"[DS2] Echo ({len(echo)} bytes): {echo.hex(' ')}")
-            waiting -= len(frame)
-        
-        # Wait a bit more for ECU response
-        if waiting == 0:
-            time.sleep(0.1)
-        
-        if self.cfg.debug:
-            waiting = self.ser.in_waiting if self.ser else 0
-            print(f"[DS2] Bytes waiting before RX: {waiting}")
-        
-        # Read response header
-        hdr = self._read_exact(2)
-        if len(hdr) < 2:
-            if self.cfg.debug:
-                print(f"[DS2] ERROR: No response header (got {len(hdr)} bytes)")
-                extra = self.ser.read(100)
-                if extra:
-                    print(f"[DS2] Raw buffer: {extra.hex(' ')}")
-            raise TimeoutError("No DS2 response header received")
-        
-        addr, total_len = hdr[0], hdr[1]
-        
-        if self.cfg.debug:
-            print(f"[DS2] Response header: addr=0x{addr:02X}, len={total_len}")
-        
-        if total_len < 3 or total_len > 255:
-            raise ValueError(f"Invalid response length: {total_len}")
-        
-        rest = self._read_exact(total_len - 2)
-        resp = hdr + rest
-        
-        if len(resp) != total_len:
-            if self.cfg.debug:
-                print(f"[DS2] Incomplete response: {resp.hex(' ')}")
-            raise TimeoutError(f"Incomplete DS2 response: got {len(resp)}/{total_len} bytes")
-        
+
+        resp = self._transact(frame)
+
         if self.cfg.debug:
             print(f"[DS2] RX ({len(resp)} bytes): {resp.hex(' ')}")
-        
-        # Verify checksum
-        expected_chk = xor_checksum(resp[:-1])
-        actual_chk = resp[-1]
-        if expected_chk != actual_chk:
-            if self.cfg.debug:
-                print(f"[DS2] Checksum error: expected 0x{expected_chk:02X}, got 0x{actual_chk:02X}")
-            raise ValueError(f"Bad checksum: resp={resp.hex(' ')}")
-        
-        return resp
\ No newline at end of file
+
+        return resp
+
+    def send(self, payload_no_chk: bytes) -> bytes:
+        """
+        Send a DS2 request and receive response.
+        payload_no_chk: [dest_addr] [service] [data...]
+        """
+        return bytes(self.send_view(payload_no_chk))
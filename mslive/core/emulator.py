@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import csv
+import os
+import select
+import socket
+import threading
+import time
+import tty
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .framing import _GEN_LEN, DS2FrameParser, gen_frame_from_b, xor_checksum
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+REQ_IDENT = bytes.fromhex("12 04 00")
+REQ_INIT = bytes.fromhex("12 04 81")
+
+# Identification answer: A0 + ASCII part number / versions (emulator values).
+_IDENT_DATA = bytes([0xA0]) + b"7519308" + b"42" + b"0" + b"13" + b"22" + b"05" + b"03"
+_ACK_DATA = bytes([0xA0])
+_NAK_DATA = bytes([0xA2])  # "rejected / unknown job"
+
+
+def ds2_frame(addr: int, data: bytes) -> bytes:
+    """Build [addr] [len] [data...] [chk]."""
+    body = bytes([addr, len(data) + 3]) + data
+    return body + bytes([xor_checksum(body)])
+
+
+def load_seed_frames(paths: Iterable[str | Path], limit: int = 0) -> list[bytes]:
+    """
+    GEN responses from CSV logs: rows with a raw_hex column are used as-is
+    (when the checksum is valid), rows with b0..b31 are padded to 38 bytes.
+    """
+    out: list[bytes] = []
+    cols = [f"b{i}" for i in range(32)]
+    for p in paths:
+        p = Path(p)
+        files = sorted(p.glob("*.csv")) if p.is_dir() else [p]
+        for fp in files:
+            with fp.open("r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    fr = None
+                    raw_hex = row.get("raw_hex")
+                    if raw_hex:
+                        try:
+                            raw = bytes.fromhex(raw_hex)
+                        except ValueError:
+                            raw = b""
+                        if len(raw) >= 3 and raw[1] == len(raw) and xor_checksum(raw) == 0:
+                            fr = raw
+                    elif all(row.get(c) not in (None, "") for c in cols):
+                        try:
+                            fr = gen_frame_from_b(int(row[c]) for c in cols)
+                        except ValueError:
+                            fr = None
+                    if fr is not None:
+                        out.append(fr)
+                        if limit and len(out) >= limit:
+                            return out
+    return out
+
+
+@dataclass
+class EmulatorConfig:
+    baud: int = 9600
+    bits_per_byte: int = 11          # 8E1: start + 8 data + parity + stop
+    response_delay_s: float = 0.010  # ECU think time (P2) after the request
+    echo: bool = True
+    chunk: int = 8                   # bytes written per timing step
+
+
+class MS42Emulator:
+    """
+    Answers DS2 requests the way an MS42 does: GEN (12 05 0B 03) walks
+    through the seeded frames, IDENT (12 04 00) and init (12 04 81) get
+    fixed answers, anything else a NAK.
+    """
+    def __init__(self, frames: list[bytes]):
+        if not frames:
+            frames = [gen_frame_from_b([0x12, _GEN_LEN, 0xA0] + [0] * 29)]
+        self.frames = frames
+        self.i = 0
+        self.requests = 0
+
+    def respond(self, req: bytes) -> bytes:
+        self.requests += 1
+        payload = bytes(req[:-1])
+        if payload == REQ_GENERAL:
+            fr = self.frames[self.i]
+            self.i = (self.i + 1) % len(self.frames)
+            return fr
+        if payload == REQ_IDENT:
+            return ds2_frame(req[0], _IDENT_DATA)
+        if payload == REQ_INIT:
+            return ds2_frame(req[0], _ACK_DATA)
+        return ds2_frame(req[0], _NAK_DATA)
+
+
+class _ECULink(ABC):
+    """
+    Shared K-line behaviour: echo what the tester sent, then answer each
+    complete request. Subclasses provide the wire (_out, serve_forever, stop).
+    """
+    def __init__(self, emu: MS42Emulator, cfg: Optional[EmulatorConfig]):
+        self.emu = emu
+        self.cfg = cfg or EmulatorConfig()
+        self.parser = DS2FrameParser()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def byte_time_s(self) -> float:
+        return self.cfg.bits_per_byte / float(self.cfg.baud) if self.cfg.baud else 0.0
+
+    @abstractmethod
+    def _out(self, data: bytes) -> None:
+        """Write bytes to the tester."""
+
+    def _write_paced(self, data: bytes) -> None:
+        if not self.byte_time_s:
+            self._out(data)
+            return
+        step = max(1, self.cfg.chunk)
+        for i in range(0, len(data), step):
+            part = data[i:i + step]
+            time.sleep(len(part) * self.byte_time_s)
+            self._out(part)
+
+    def handle(self, data: bytes) -> None:
+        if self.cfg.echo:
+            self._write_paced(data)
+        for req in self.parser.feed(data):
+            resp = self.emu.respond(req)
+            if self.cfg.response_delay_s:
+                time.sleep(self.cfg.response_delay_s)
+            self._write_paced(resp)
+
+    @abstractmethod
+    def serve_forever(self) -> None:
+        """Feed everything the tester sends to handle() until stopped."""
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Stop serving and release the wire."""
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mslive-ecu-emu", daemon=True)
+        self._thread.start()
+        return self
+
+    def _join(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+
+
+class PtyECU(_ECULink):
+    """
+    MS42 on a Linux pseudo-terminal. Open `slave_name` (e.g. /dev/pts/5)
+    with DS2 like a real K+DCAN cable: TX bytes come back as echo, then the
+    emulated ECU answers, paced at the configured baud rate.
+    """
+    def __init__(self, emu: MS42Emulator, cfg: Optional[EmulatorConfig] = None):
+        super().__init__(emu, cfg)
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.slave_name = os.ttyname(self.slave)
+
+    def _out(self, data: bytes) -> None:
+        os.write(self.master, data)
+
+    def serve_forever(self) -> None:
+        while not self._stop.is_set():
+            r, _, _ = select.select([self.master], [], [], 0.2)
+            if not r:
+                continue
+            try:
+                data = os.read(self.master, 512)
+            except OSError:
+                # no client attached right now (EIO on Linux); keep waiting
+                time.sleep(0.05)
+                continue
+            self.handle(data)
+
+    def stop(self) -> None:
+        self._join()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class TcpECU(_ECULink):
+    """
+    MS42 behind a ser2net-style raw TCP bridge: connect DS2 with
+    --port tcp://host:port. One client at a time, like the real cable.
+    Port 0 picks a free port (see .port).
+    """
+    def __init__(self, emu: MS42Emulator, cfg: Optional[EmulatorConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(emu, cfg)
+        self.server = socket.create_server((host, port))
+        self.server.settimeout(0.2)
+        self.host, self.port = self.server.getsockname()[:2]
+        self._conn: Optional[socket.socket] = None
+
+    @property
+    def url(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    def _out(self, data: bytes) -> None:
+        if self._conn:
+            self._conn.sendall(data)
+
+    def serve_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self.server.accept()
+            except (socket.timeout, OSError):
+                continue
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.settimeout(0.2)
+            self._conn = conn
+            self.parser.clear()
+            try:
+                while not self._stop.is_set():
+                    try:
+                        data = conn.recv(512)
+                    except socket.timeout:
+                        continue
+                    if not data:
+                        break
+                    self.handle(data)
+            except OSError:
+                pass
+            finally:
+                self._conn = None
+                conn.close()
+
+    def stop(self) -> None:
+        self._join()
+        self.server.close()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# USB vendor IDs of the chips found in K+DCAN cables
+ADAPTER_VIDS = {
+    0x0403: "FTDI",
+    0x1A86: "CH340",
+}
+
+# ftdi_sio holds RX bytes for latency_timer ms (default 16) before handing
+# them to the host; 1 ms is the lowest the chip accepts.
+DEFAULT_LATENCY_MS = 1
+
+
+@dataclass
+class LowLatencyReport:
+    port: str
+    adapter: Optional[str] = None               # "FTDI", "CH340" or None (unknown)
+    async_low_latency: Optional[bool] = None    # None = not attempted
+    latency_timer_before: Optional[int] = None  # ms, None = no sysfs knob
+    latency_timer_after: Optional[int] = None
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.async_low_latency) or (
+            self.latency_timer_after is not None and self.latency_timer_after != self.latency_timer_before
+        )
+
+    def summary(self) -> str:
+        parts = [f"{self.port}: {self.adapter or 'unknown adapter'}"]
+        if self.async_low_latency is not None:
+            parts.append(f"ASYNC_LOW_LATENCY {'on' if self.async_low_latency else 'failed'}")
+        if self.latency_timer_before is not None:
+            after = self.latency_timer_after if self.latency_timer_after is not None else self.latency_timer_before
+            parts.append(f"latency_timer {self.latency_timer_before} -> {after} ms")
+        return ", ".join(parts + self.notes)
+
+
+def tty_name(port: str) -> str:
+    """/dev/ttyUSB0 (or a /dev/serial/by-id symlink to it) -> ttyUSB0."""
+    return os.path.basename(os.path.realpath(port))
+
+
+def detect_adapter(port: str, ports: Optional[list[dict]] = None) -> Optional[str]:
+    """
+    Adapter family of `port` from the VID that list_serial_ports() reports,
+    or None when it is not a known K+DCAN chip (or not listed at all).
+    """
+    if ports is None:
+        from .transport import list_serial_ports
+        ports = list_serial_ports(include_all=True)
+    name = tty_name(port)
+    for p in ports:
+        dev = p.get("device") or ""
+        if dev == port or tty_name(dev) == name:
+            return ADAPTER_VIDS.get(p.get("vid") or -1)
+    return None
+
+
+def latency_timer_path(port: str, sysfs_root: str = "/sys") -> str:
+    return os.path.join(sysfs_root, "bus", "usb-serial", "devices", tty_name(port), "latency_timer")
+
+
+def read_latency_timer(port: str, sysfs_root: str = "/sys") -> Optional[int]:
+    try:
+        with open(latency_timer_path(port, sysfs_root), "r", encoding="ascii") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def apply_low_latency(
+    ser: Any,
+    port: str,
+    *,
+    latency_ms: int = DEFAULT_LATENCY_MS,
+    sysfs_root: str = "/sys",
+    ports: Optional[list[dict]] = None,
+) -> LowLatencyReport:
+    """
+    Best-effort receive-latency tuning for an open pyserial port. Never
+    raises: whatever could not be changed is listed in the report's notes.
+
+    - ASYNC_LOW_LATENCY via ser.set_low_latency_mode() (Linux, pyserial >= 3.1)
+    - FTDI: write `latency_ms` to sysfs latency_timer if it is writable
+      (usually needs root or a udev rule)
+    """
+    rep = LowLatencyReport(port=port, adapter=detect_adapter(port, ports))
+    if rep.adapter is None:
+        rep.notes.append("not an FTDI/CH340 adapter, left alone")
+        return rep
+
+    # ftdi_sio only; other drivers have no such file
+    rep.latency_timer_before = read_latency_timer(port, sysfs_root)
+
+    set_mode = getattr(ser, "set_low_latency_mode", None)
+    if set_mode is None:
+        rep.notes.append("ASYNC_LOW_LATENCY not supported on this platform")
+    else:
+        try:
+            set_mode(True)
+            rep.async_low_latency = True
+        except (OSError, ValueError, NotImplementedError) as exc:
+            rep.async_low_latency = False
+            rep.notes.append(f"ASYNC_LOW_LATENCY: {exc}")
+
+    if rep.latency_timer_before is None:
+        if rep.adapter == "FTDI":
+            rep.notes.append("no latency_timer in sysfs")
+        return rep
+
+    # newer kernels already drop the timer to 1 ms with ASYNC_LOW_LATENCY
+    current = read_latency_timer(port, sysfs_root)
+    if current is not None and current > latency_ms:
+        path = latency_timer_path(port, sysfs_root)
+        try:
+            with open(path, "w", encoding="ascii") as f:
+                f.write(str(latency_ms))
+        except OSError as exc:
+            rep.notes.append(f"latency_timer not writable ({exc.strerror or exc}); try a udev rule")
+        current = read_latency_timer(port, sysfs_root)
+    rep.latency_timer_after = current
+    return rep
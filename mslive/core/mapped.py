@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import mmap
+import zlib
+from array import array
+from typing import BinaryIO, Iterator, Optional, Union
+
+from . import mslr
+from .record import _FILE_MAGIC, _REC_HDR
+
+# One row per frame. `buf` 0 is the file map itself; blocks that had to be
+# decoded (not stored raw) get their own buffer, numbered from 1.
+INDEX_FIELDS = (("offset", "<u8"), ("ts", "<f8"), ("dir", "u1"), ("len", "<u4"), ("buf", "<u2"))
+
+
+class MappedRecording:
+    """
+    Read-only, memory-mapped view of an MSLR recording (v1 or v2) for batch
+    work. One pass over the record headers builds `index`, a NumPy
+    structured array of (offset, ts, dir, len, buf); payloads come back as
+    memoryview slices of the map, so no per-frame objects are created
+    until you ask for them.
+
+    `clock` is the recording's (wall, monotonic) anchor, if it has one (see
+    Replayer).
+
+    Blocks that fail their CRC (or do not decode) are skipped and counted
+    in `bad_blocks`, as the Replayer skips them; torn v1 tails are left out.
+
+    Needs NumPy. Use it as a context manager (or close()): views handed out
+    must be released before the map can close. Empty files and streams that
+    cannot be mapped raise ValueError / OSError.
+    """
+    def __init__(self, path_or_file: Union[str, BinaryIO]):
+        try:
+            import numpy as np  # optional dependency
+        except ImportError as e:
+            raise ImportError("MappedRecording needs NumPy: pip install 'mslive[mapped]'") from e
+
+        self._np = np
+        self._own = isinstance(path_or_file, str)
+        self.f = open(path_or_file, "rb") if self._own else path_or_file
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.mv = memoryview(self.mm)
+        self.bufs: list[memoryview] = [self.mv]
+        self.bad_blocks = 0
+        self.clock = None
+        if self.mm[:4] != _FILE_MAGIC:
+            self.close()
+            raise ValueError("Not a valid MSLR recording (bad magic)")
+
+        offs, ts, dirs, lens, bufs = array("Q"), array("d"), array("B"), array("I"), array("H")
+        if mslr.is_v2_header(self.mm[:mslr.FILE_HDR.size]):
+            self.version = 2
+            self.f.seek(mslr.FILE_HDR.size)
+            self.clock, start = mslr.read_clock(self.f, mslr.FILE_HDR.unpack_from(self.mm)[3])
+            self._index_v2(start, offs, ts, dirs, lens, bufs)
+        else:
+            self.version = 1
+            self._index_records(self.mv, len(_FILE_MAGIC), len(self.mm), 0, offs, ts, dirs, lens, bufs)
+
+        n = len(offs)
+        idx = np.empty(n, dtype=list(INDEX_FIELDS))
+        idx["offset"] = np.frombuffer(offs, dtype="<u8") if n else 0
+        idx["ts"] = np.frombuffer(ts, dtype="<f8") if n else 0
+        idx["dir"] = np.frombuffer(dirs, dtype="u1") if n else 0
+        idx["len"] = np.frombuffer(lens, dtype="<u4") if n else 0
+        idx["buf"] = np.frombuffer(bufs, dtype="<u2") if n else 0
+        self.index = idx
+
+    @staticmethod
+    def _index_records(mv, off: int, end: int, buf: int, offs, ts, dirs, lens, bufs) -> None:
+        unpack = _REC_HDR.unpack_from
+        hsz = _REC_HDR.size
+        while off + hsz <= end:
+            t, d, ln = unpack(mv, off)
+            off += hsz
+            if off + ln > end:
+                break  # torn last record: keep what is whole
+            offs.append(off)
+            ts.append(t)
+            dirs.append(d)
+            lens.append(ln)
+            bufs.append(buf)
+            off += ln
+
+    def _index_v2(self, first_block: int, offs, ts, dirs, lens, bufs) -> None:
+        blocks = mslr.read_index(self.f)
+        if blocks is None:
+            blocks = mslr.scan_blocks(self.f, first_block)
+        mv = self.mv
+        hsz = mslr.BLOCK_HDR.size
+        for b in blocks:
+            if b.offset + hsz > len(mv):
+                self.bad_blocks += 1
+                continue
+            magic, codec, flags, _, _, raw_len, data_len, _, _, crc = mslr.BLOCK_HDR.unpack_from(mv, b.offset)
+            start = b.offset + hsz
+            data = mv[start:start + data_len]
+            if magic != mslr.BLOCK_MAGIC or len(data) != data_len or \
+                    zlib.crc32(data, zlib.crc32(mv[b.offset:start - 4])) != crc:
+                self.bad_blocks += 1
+                continue
+            if codec == mslr.CODEC_RAW and not flags:
+                self._index_records(mv, start, start + data_len, 0, offs, ts, dirs, lens, bufs)
+            else:
+                try:
+                    raw = mslr.decode_block_data(codec, flags, bytes(data), raw_len)
+                except ValueError:
+                    self.bad_blocks += 1
+                    continue
+                self.bufs.append(memoryview(raw))
+                self._index_records(self.bufs[-1], 0, len(raw), len(self.bufs) - 1, offs, ts, dirs, lens, bufs)
+
+    def close(self) -> None:
+        self.index = None
+        self.bufs = []
+        if self.mv is not None:
+            self.mv.release()
+            self.mv = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self._own:
+            self.f.close()
+
+    def __enter__(self) -> "MappedRecording":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    # columns (views into the index, no copies)
+    @property
+    def ts(self):
+        return self.index["ts"]
+
+    @property
+    def dir(self):
+        return self.index["dir"]
+
+    @property
+    def lengths(self):
+        return self.index["len"]
+
+    def payload(self, i: int) -> memoryview:
+        row = self.index[i]
+        off = int(row["offset"])
+        return self.bufs[int(row["buf"])][off:off + int(row["len"])]
+
+    def select(
+        self,
+        direction: Optional[str] = None,
+        t0: Optional[float] = None,
+        t1: Optional[float] = None,
+        length: Optional[int] = None,
+    ):
+        """
+        Indices of frames matching all given filters (direction "tx"/"rx",
+        t0 <= ts < t1, payload length), computed with array ops.
+        """
+        np = self._np
+        mask = np.ones(len(self.index), dtype=bool)
+        if direction is not None:
+            mask &= self.index["dir"] == (0 if direction == "tx" else 1)
+        if t0 is not None:
+            mask &= self.index["ts"] >= t0
+        if t1 is not None:
+            mask &= self.index["ts"] < t1
+        if length is not None:
+            mask &= self.index["len"] == length
+        return np.flatnonzero(mask)
+
+    def frames(self, indices=None) -> Iterator[tuple[float, int, memoryview]]:
+        """(ts, dir, payload view) for the given indices (default: all)."""
+        idx = self.index if indices is None else self.index[indices]
+        bufs = self.bufs
+        for off, t, d, ln, b in zip(idx["offset"].tolist(), idx["ts"].tolist(), idx["dir"].tolist(),
+                                    idx["len"].tolist(), idx["buf"].tolist()):
+            yield t, d, bufs[b][off:off + ln]
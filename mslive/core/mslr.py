@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+# MSLR v2 container. Frames use the v1 record encoding (REC_HDR + payload),
+# grouped into blocks, with an index of all blocks at the end of the file:
+#
+#   file header   FILE_HDR: "MSLR" "BLK2" u16 version u16 flags u32 block_size
+#                 [CLOCK_HDR if flags & FILE_FLAG_CLOCK]
+#   block ...     BLOCK_HDR + data (data = the block's records, see codec)
+#   index         INDEX_ENTRY per block
+#   trailer       TRAILER: u64 index offset, u32 n_blocks, u32 index crc32, "MSIX"
+#
+# The block CRC covers the block header (up to the crc field) and its data.
+# The codec byte says how data is stored: as is, or zlib/zstd compressed
+# (raw_len is then the size after decompression). Block flag FLAG_XDELTA
+# means the (decompressed) records are delta coded, see xdelta_records.
+# FILE_FLAG_CLOCK: the header is followed by the wall and monotonic clock
+# read at one instant. Frame timestamps are then that monotonic clock moved
+# onto wall time (ts = mono + wall - mono_at_anchor), so intervals are
+# exact and the monotonic reading of every frame can be had back.
+# A v1 file is "MSLR" directly followed by records; the "BLK2" tag tells
+# them apart (as bytes 4..8 of a v1 file it would be the low half of the
+# first timestamp's mantissa).
+MAGIC = b"MSLR"
+V2_TAG = b"BLK2"
+VERSION = 2
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+REC_HDR = struct.Struct("<dBI")                # ts, dir (0=tx, 1=rx), len
+FILE_HDR = struct.Struct("<4s4sHHI")
+BLOCK_MAGIC = b"MSBK"
+BLOCK_HDR = struct.Struct("<4sBBHIIIddI")     # magic, codec, flags, reserved, n_frames,
+                                              # raw_len, data_len, first_ts, last_ts, crc32
+INDEX_ENTRY = struct.Struct("<QddI")          # block offset, first_ts, last_ts, n_frames
+TRAILER = struct.Struct("<QII4s")
+CLOCK_HDR = struct.Struct("<dd")              # wall time, monotonic time (same instant)
+FILE_FLAG_CLOCK = 0x0001
+INDEX_MAGIC = b"MSIX"
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {"raw": CODEC_RAW, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+# XOR-delta frame coding (block flag FLAG_XDELTA). Frames are chained by
+# (direction, length): repeated requests, their echoes and the answers to one
+# job each form a chain, and every frame is XORed with the previous frame of
+# its chain (the first one against nothing, so it is stored as is). The
+# block is stored as
+#
+#   u32 n_frames
+#   n_frames x REC_HDR   ts, dir, len, as in plain records, in record order
+#   bitmaps              per frame (len + 7) // 8 bytes: bit i of byte i // 8
+#                        set if byte i of the frame's XOR is non-zero
+#   values               the non-zero XOR bytes
+#
+# with bitmaps and values laid out chain by chain (chains in order of
+# len * 2 + dir, frames in record order within one), so a chain decodes as
+# one frames x len array. Every block starts with no history, so each block
+# (the seek unit) decodes on its own.
+FLAG_XDELTA = 0x02
+_XD_COUNT = struct.Struct("<I")
+_NONZERO_01 = bytes([0x30] + [0x31] * 255)  # translate table: byte -> b"0" / b"1"
+_SCATTER: dict[tuple[int, bytes], tuple[struct.Struct, int]] = {}
+
+
+def _zstd():
+    """(compress(data, level), decompress(data, raw_len)) or None without a zstd module."""
+    try:
+        from compression import zstd  # 3.14+
+        return (lambda data, level: zstd.compress(data, level=level)), (lambda data, _n: zstd.decompress(data))
+    except ImportError:
+        pass
+    try:
+        import zstandard  # optional dependency
+    except ImportError:
+        return None
+    return (
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        lambda data, n: zstandard.ZstdDecompressor().decompress(data, max_output_size=n),
+    )
+
+
+def resolve_codec(name: str) -> int:
+    """Codec id for "raw", "zlib", "zstd" or "auto" (zstd when installed, else zlib)."""
+    if name == "auto":
+        return CODEC_ZSTD if _zstd() is not None else CODEC_ZLIB
+    if name not in CODECS:
+        raise ValueError(f"Unknown MSLR codec {name!r} (raw, zlib, zstd, auto)")
+    if CODECS[name] == CODEC_ZSTD and _zstd() is None:
+        raise ValueError("zstd codec needs the 'zstandard' package (or Python 3.14+)")
+    return CODECS[name]
+
+
+def compress_data(codec: int, records: bytes, level: int = -1) -> bytes:
+    if codec == CODEC_RAW:
+        return records
+    if codec == CODEC_ZLIB:
+        return zlib.compress(records, level)
+    if codec == CODEC_ZSTD:
+        zs = _zstd()
+        if zs is None:
+            raise ValueError("zstd codec needs the 'zstandard' package (or Python 3.14+)")
+        return zs[0](records, 3 if level < 0 else level)
+    raise ValueError(f"Unsupported MSLR block codec {codec}")
+
+
+@dataclass
+class BlockInfo:
+    offset: int
+    first_ts: float
+    last_ts: float
+    n_frames: int
+
+
+def file_header(block_size: int = DEFAULT_BLOCK_SIZE, flags: int = 0,
+                clock: Optional[tuple[float, float]] = None) -> bytes:
+    """File header; with `clock` (wall, monotonic) the FILE_FLAG_CLOCK anchor is appended."""
+    if clock is None:
+        return FILE_HDR.pack(MAGIC, V2_TAG, VERSION, flags & ~FILE_FLAG_CLOCK, block_size)
+    return FILE_HDR.pack(MAGIC, V2_TAG, VERSION, flags | FILE_FLAG_CLOCK, block_size) + CLOCK_HDR.pack(*clock)
+
+
+def read_clock(f: BinaryIO, flags: int) -> tuple[Optional[tuple[float, float]], int]:
+    """
+    (clock anchor or None, offset of the first block) for a v2 file whose
+    FILE_HDR (with these flags) was just read from `f`.
+    """
+    if not flags & FILE_FLAG_CLOCK:
+        return None, FILE_HDR.size
+    raw = f.read(CLOCK_HDR.size)
+    if len(raw) != CLOCK_HDR.size:
+        raise ValueError("Corrupt recording (truncated file header)")
+    return CLOCK_HDR.unpack(raw), FILE_HDR.size + CLOCK_HDR.size
+
+
+def is_v2_header(head: bytes) -> bool:
+    return len(head) >= FILE_HDR.size and head[:4] == MAGIC and head[4:8] == V2_TAG
+
+
+def encode_block(records: bytes, n_frames: int, first_ts: float, last_ts: float,
+                 codec: int = CODEC_RAW, flags: int = 0, level: int = -1) -> bytes:
+    if flags & FLAG_XDELTA:
+        records = xdelta_encode(records)
+    data = compress_data(codec, records, level)
+    if codec != CODEC_RAW and len(data) >= len(records):
+        codec, data = CODEC_RAW, records  # incompressible: not worth a decode on read
+    head = BLOCK_HDR.pack(BLOCK_MAGIC, codec, flags, 0, n_frames, len(records), len(data), first_ts, last_ts, 0)[:-4]
+    crc = zlib.crc32(data, zlib.crc32(head))
+    return head + struct.pack("<I", crc) + data
+
+
+def _decompress(codec: int, flags: int, data: bytes, raw_len: int) -> bytes:
+    if flags & ~FLAG_XDELTA:
+        raise ValueError(f"Unsupported MSLR block flags {flags:#x}")
+    if codec == CODEC_RAW:
+        raw = data
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(data, bufsize=max(raw_len, 1))
+    elif codec == CODEC_ZSTD:
+        zs = _zstd()
+        if zs is None:
+            raise ValueError("Recording uses zstd blocks: install 'zstandard' to read it")
+        raw = zs[1](data, raw_len)
+    else:
+        raise ValueError(f"Unsupported MSLR block codec {codec}")
+    if len(raw) != raw_len:
+        raise ValueError("Corrupt recording (block decompressed to the wrong size)")
+    return raw
+
+
+def decode_block_data(codec: int, flags: int, data: bytes, raw_len: int) -> bytes:
+    """The block's plain records: decompressed, and delta coding undone."""
+    raw = _decompress(codec, flags, data, raw_len)
+    if flags:
+        pack = REC_HDR.pack
+        return b"".join(pack(ts, d, len(p)) + p for ts, d, p in xdelta_records(raw))
+    return raw
+
+
+def _numpy():
+    try:
+        import numpy  # optional dependency: the pure-Python coder is used without it
+    except ImportError:
+        return None
+    return numpy
+
+
+def _scatter(ln: int, bitmap: bytes) -> tuple[struct.Struct, int]:
+    """
+    (Struct that packs the changed bytes to their positions with zeros
+    elsewhere, number of changed bytes), cached per bitmap.
+    """
+    key = (ln, bitmap)
+    hit = _SCATTER.get(key)
+    if hit is None:
+        if len(_SCATTER) >= 4096:
+            _SCATTER.clear()
+        m = int.from_bytes(bitmap, "little")
+        fmt = "".join("B" if m >> i & 1 else "x" for i in range(ln))
+        hit = _SCATTER[key] = (struct.Struct("<" + fmt), fmt.count("B"))
+    return hit
+
+
+def _xd_chains(keys: list[int]) -> list[tuple[int, list[int]]]:
+    """(len * 2 + dir, record indices) of each chain, in storage order."""
+    chains: dict[int, list[int]] = {}
+    for i, k in enumerate(keys):
+        chains.setdefault(k, []).append(i)
+    return sorted(chains.items())
+
+
+def xdelta_encode(records: bytes) -> bytes:
+    """FLAG_XDELTA form of a block's plain records."""
+    hdrs = bytearray()
+    offs: list[int] = []
+    keys: list[int] = []
+    unpack = REC_HDR.unpack_from
+    hsz = REC_HDR.size
+    off = 0
+    while off < len(records):
+        _, d, ln = unpack(records, off)
+        hdrs += records[off:off + hsz]
+        off += hsz
+        offs.append(off)
+        keys.append(ln * 2 + d)
+        off += ln
+    bm, vals = [], []
+    np = _numpy()
+    if np is not None:
+        src = np.frombuffer(records, np.uint8)
+        for key, rows in _xd_chains(keys):
+            ln = key >> 1
+            if not ln:
+                continue
+            full = src[np.array([offs[i] for i in rows])[:, None] + np.arange(ln)]
+            x = full.copy()
+            x[1:] ^= full[:-1]
+            nz = x != 0
+            bm.append(np.packbits(nz, axis=1, bitorder="little").tobytes())
+            vals.append(x[nz].tobytes())
+    else:
+        for key, rows in _xd_chains(keys):
+            ln = key >> 1
+            if not ln:
+                continue
+            p = 0
+            for i in rows:
+                v = int.from_bytes(records[offs[i]:offs[i] + ln], "little")
+                x = (v ^ p).to_bytes(ln, "little")
+                p = v
+                bm.append(int(x.translate(_NONZERO_01)[::-1], 2).to_bytes((ln + 7) >> 3, "little"))
+                vals.append(x.replace(b"\0", b""))
+    return _XD_COUNT.pack(len(offs)) + hdrs + b"".join(bm) + b"".join(vals)
+
+
+def _xdelta_records_np(np, data: bytes) -> list[tuple[float, int, bytes]]:
+    n, = _XD_COUNT.unpack_from(data)
+    if not n:
+        return []
+    hdr = np.frombuffer(data, np.dtype([("ts", "<f8"), ("dir", "u1"), ("len", "<u4")]), n, _XD_COUNT.size)
+    lens = hdr["len"].astype(np.int64)
+    keys = lens * 2 + hdr["dir"]
+    order = np.argsort(keys, kind="stable")
+    sk = keys[order]
+    cuts = np.flatnonzero(sk[1:] != sk[:-1]) + 1
+    bm = _XD_COUNT.size + n * REC_HDR.size
+    vo = bm + int(((lens + 7) >> 3).sum())
+    buf = np.frombuffer(data, np.uint8)
+    payloads: list[bytes] = []
+    for a, b in zip([0, *cuts.tolist()], [*cuts.tolist(), n]):
+        ln = int(sk[a]) >> 1
+        m = b - a
+        if not ln:
+            payloads += [b""] * m
+            continue
+        nb = (ln + 7) >> 3
+        nz = np.unpackbits(buf[bm:bm + m * nb].reshape(m, nb), axis=1, count=ln, bitorder="little").view(bool)
+        bm += m * nb
+        k = int(np.count_nonzero(nz))
+        full = np.zeros((m, ln), np.uint8)
+        full[nz] = buf[vo:vo + k]
+        vo += k
+        np.bitwise_xor.accumulate(full, axis=0, out=full)
+        changed = nz.any(axis=1)
+        changed[0] = True
+        if changed.all():
+            raw = full.tobytes()
+            payloads += [raw[i:i + ln] for i in range(0, m * ln, ln)]
+        else:  # repeats (requests, echoes) share one bytes object
+            raw = full[changed].tobytes()
+            distinct = [raw[i:i + ln] for i in range(0, len(raw), ln)]
+            payloads += [distinct[i] for i in (np.cumsum(changed) - 1).tolist()]
+    if vo != len(data):
+        raise ValueError("value count does not match the bitmaps")
+    inv = np.empty(n, np.int64)
+    inv[order] = np.arange(n)
+    return list(zip(hdr["ts"].tolist(), hdr["dir"].tolist(), [payloads[i] for i in inv.tolist()]))
+
+
+def _xdelta_records_py(data: bytes) -> list[tuple[float, int, bytes]]:
+    n, = _XD_COUNT.unpack_from(data)
+    start = _XD_COUNT.size + n * REC_HDR.size
+    hdrs = list(REC_HDR.iter_unpack(data[_XD_COUNT.size:start]))
+    bm = start
+    off = start + sum((ln + 7) >> 3 for _, _, ln in hdrs)
+    payloads: list[bytes] = [b""] * n
+    scatter = _SCATTER
+    from_bytes = int.from_bytes
+    for key, rows in _xd_chains([ln * 2 + d for _, d, ln in hdrs]):
+        ln = key >> 1
+        if not ln:
+            continue
+        nb = (ln + 7) >> 3
+        payload, v = bytes(ln), 0
+        for i in rows:
+            bitmap = data[bm:bm + nb]
+            bm += nb
+            st, k = scatter.get((ln, bitmap)) or _scatter(ln, bitmap)
+            if k:
+                v ^= from_bytes(st.pack(*data[off:off + k]), "little")
+                off += k
+                payload = v.to_bytes(ln, "little")
+            payloads[i] = payload  # unchanged (a repeated request) reuses the last one
+    if off != len(data):
+        raise ValueError("value count does not match the bitmaps")
+    return [(ts, d, p) for (ts, d, _), p in zip(hdrs, payloads)]
+
+
+def xdelta_records(data: bytes) -> list[tuple[float, int, bytes]]:
+    """(ts, dir, payload) for each record of a delta-coded (decompressed) block."""
+    try:
+        np = _numpy()
+        return _xdelta_records_np(np, data) if np is not None else _xdelta_records_py(data)
+    except (KeyError, IndexError, ValueError, struct.error) as e:
+        raise ValueError(f"Corrupt recording (bad delta-coded block: {e.__class__.__name__})") from None
+
+
+def _read_stored_block(f: BinaryIO, offset: int) -> tuple[tuple, bytes]:
+    f.seek(offset)
+    head = f.read(BLOCK_HDR.size)
+    if len(head) != BLOCK_HDR.size:
+        raise ValueError("Corrupt recording (truncated block header)")
+    h = BLOCK_HDR.unpack(head)
+    if h[0] != BLOCK_MAGIC:
+        raise ValueError(f"Corrupt recording (no block at offset {offset})")
+    data = f.read(h[6])
+    if len(data) != h[6] or zlib.crc32(data, zlib.crc32(head[:-4])) != h[9]:
+        raise ValueError(f"Corrupt recording (bad block at offset {offset})")
+    return h, data
+
+
+def read_block(f: BinaryIO, offset: int) -> tuple[tuple, bytes]:
+    """Header fields and the decoded records of the block at `offset` (ValueError if damaged)."""
+    h, data = _read_stored_block(f, offset)
+    return h, decode_block_data(h[1], h[2], data, h[5])
+
+
+def read_block_records(f: BinaryIO, offset: int) -> tuple[tuple, list[tuple[float, int, bytes]]]:
+    """Like read_block(), but the records come as (ts, dir, payload) tuples."""
+    h, data = _read_stored_block(f, offset)
+    codec, flags, raw_len = h[1], h[2], h[5]
+    raw = _decompress(codec, flags, data, raw_len)
+    if flags:
+        return h, xdelta_records(raw)
+    return h, list(iter_records(raw))
+
+
+def iter_records(raw: bytes) -> Iterator[tuple[float, int, bytes]]:
+    """(ts, dir, payload) for each record in a block's decoded data."""
+    off = 0
+    end = len(raw)
+    while off < end:
+        ts, dir_b, ln = REC_HDR.unpack_from(raw, off)
+        off += REC_HDR.size
+        yield ts, dir_b, raw[off:off + ln]
+        off += ln
+
+
+def encode_index(blocks: list[BlockInfo], index_offset: int) -> bytes:
+    body = b"".join(INDEX_ENTRY.pack(b.offset, b.first_ts, b.last_ts, b.n_frames) for b in blocks)
+    return body + TRAILER.pack(index_offset, len(blocks), zlib.crc32(body), INDEX_MAGIC)
+
+
+def read_index(f: BinaryIO) -> Optional[list[BlockInfo]]:
+    """Block list from the footer, or None if the file has no (valid) footer."""
+    f.seek(0, 2)
+    size = f.tell()
+    if size < FILE_HDR.size + TRAILER.size:
+        return None
+    f.seek(size - TRAILER.size)
+    index_off, n, crc, magic = TRAILER.unpack(f.read(TRAILER.size))
+    if magic != INDEX_MAGIC or index_off + n * INDEX_ENTRY.size != size - TRAILER.size:
+        return None
+    f.seek(index_off)
+    body = f.read(n * INDEX_ENTRY.size)
+    if zlib.crc32(body) != crc:
+        return None
+    return [BlockInfo(*INDEX_ENTRY.unpack_from(body, i * INDEX_ENTRY.size)) for i in range(n)]
+
+
+MAX_BLOCK_DATA = 16 * 1024 * 1024  # anything claiming more is damage, not a block
+_SCAN_CHUNK = 256 * 1024
+
+
+def _find_block_magic(f: BinaryIO, start: int) -> Optional[int]:
+    """Offset of the next BLOCK_MAGIC at or after `start`, reading forward in chunks."""
+    keep = len(BLOCK_MAGIC) - 1
+    pos = start
+    tail = b""
+    while True:
+        f.seek(pos)
+        chunk = f.read(_SCAN_CHUNK)
+        if not chunk:
+            return None
+        buf = tail + chunk
+        i = buf.find(BLOCK_MAGIC)
+        if i >= 0:
+            return pos - len(tail) + i
+        tail = buf[-keep:]
+        pos += len(chunk)
+
+
+def iter_blocks(f: BinaryIO, start: int = FILE_HDR.size, resync: bool = True
+                ) -> Iterator[tuple[int, tuple, bytes, bytes]]:
+    """
+    (offset, header fields, header bytes, stored data) of every intact block
+    from `start` on, without decoding. With resync, damage is skipped by
+    searching forward for the next block magic whose CRC checks out, so
+    blocks after a torn or garbled region are still found. The file is
+    read front to back, a chunk at a time.
+    """
+    off = start
+    while True:
+        f.seek(off)
+        head = f.read(BLOCK_HDR.size)
+        if len(head) < BLOCK_HDR.size:
+            return
+        h = BLOCK_HDR.unpack(head)
+        data_len = h[6]
+        if h[0] == BLOCK_MAGIC and data_len <= MAX_BLOCK_DATA:
+            data = f.read(data_len)
+            if len(data) == data_len and zlib.crc32(data, zlib.crc32(head[:-4])) == h[9]:
+                yield off, h, head, data
+                off += BLOCK_HDR.size + data_len
+                continue
+        if not resync:
+            return
+        nxt = _find_block_magic(f, off + 1)
+        if nxt is None:
+            return
+        off = nxt
+
+
+def scan_blocks(f: BinaryIO, start: int = FILE_HDR.size, resync: bool = True) -> list[BlockInfo]:
+    """
+    Block list by walking the blocks themselves (no footer, e.g. after a
+    crash). Damaged regions are skipped (resync) or end the scan.
+    """
+    return [BlockInfo(off, h[7], h[8], h[4]) for off, h, _, _ in iter_blocks(f, start, resync)]
+
+
+class BlockBuilder:
+    """
+    Collects records into blocks of about `block_size` bytes and keeps the
+    index. seal() encodes in place; take() + encode_block() + sealed() do the
+    same in steps, so the (compression) work can happen on another thread.
+    """
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE, codec: int = CODEC_RAW, level: int = -1,
+                 delta: bool = False):
+        self.block_size = block_size
+        self.codec = codec
+        self.level = level
+        self.flags = FLAG_XDELTA if delta else 0  # applied when the block is encoded
+        self.blocks: list[BlockInfo] = []
+        self._records = bytearray()
+        self._n = 0
+        self._first_ts = 0.0
+        self._last_ts = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._records)
+
+    def add(self, ts: float, dir_b: int, payload: bytes) -> bool:
+        """Append one record; True once the open block is full (call seal())."""
+        if not self._n:
+            self._first_ts = ts
+        self._last_ts = ts
+        self._records += REC_HDR.pack(ts, dir_b, len(payload))
+        self._records += payload
+        self._n += 1
+        return len(self._records) >= self.block_size
+
+    def take(self) -> Optional[tuple[bytes, int, float, float]]:
+        """Detach the open block as (records, n_frames, first_ts, last_ts); None if empty."""
+        if not self._n:
+            return None
+        out = (bytes(self._records), self._n, self._first_ts, self._last_ts)
+        self._records.clear()
+        self._n = 0
+        return out
+
+    def sealed(self, offset: int, n_frames: int, first_ts: float, last_ts: float) -> None:
+        """Record in the index that a block taken earlier now sits at `offset`."""
+        self.blocks.append(BlockInfo(offset, first_ts, last_ts, n_frames))
+
+    def seal(self, offset: int) -> bytes:
+        """Encode the open block, to be written at file `offset`. b"" if it is empty."""
+        blk = self.take()
+        if blk is None:
+            return b""
+        records, n, first_ts, last_ts = blk
+        self.sealed(offset, n, first_ts, last_ts)
+        return encode_block(records, n, first_ts, last_ts, self.codec, self.flags, self.level)
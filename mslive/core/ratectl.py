@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RateConfig:
+    start_hz: float = 5.0
+    min_hz: float = 0.5
+    max_hz: float = 20.0
+    add_hz: float = 0.5          # additive increase ...
+    increase_every: int = 4      # ... after this many clean round trips
+    decrease: float = 0.7        # multiplicative decrease on congestion
+    headroom: float = 1.15       # period must exceed RTT by this factor
+    ewma_alpha: float = 0.2
+
+
+class AdaptiveRate:
+    """
+    AIMD poll-rate controller for a request/response bus.
+
+    Feed it one observe() per request. Clean round trips slowly raise the
+    target rate; a timeout, or an RTT that no longer fits inside the period,
+    cuts it multiplicatively. The loop keeps its drift-free next_t scheduling
+    and just reads `period` each cycle.
+    """
+    def __init__(self, cfg: Optional[RateConfig] = None):
+        self.cfg = cfg = cfg or RateConfig()
+        self.hz = min(max(cfg.start_hz, cfg.min_hz), cfg.max_hz)
+        self.rtt_s: Optional[float] = None      # EWMA of good round trips
+        self.timeout_rate = 0.0                 # EWMA of timeouts (0..1)
+        self.achieved_hz = 0.0                  # EWMA of completed requests/s
+        self.ok = 0
+        self.timeouts = 0
+        self._streak = 0
+        self._last_t: Optional[float] = None
+
+    @property
+    def period(self) -> float:
+        return 1.0 / self.hz
+
+    def _clamp(self, hz: float) -> float:
+        return min(max(hz, self.cfg.min_hz), self.cfg.max_hz)
+
+    def _cut(self) -> None:
+        self.hz = self._clamp(self.hz * self.cfg.decrease)
+        self._streak = 0
+
+    def observe(self, rtt_s: Optional[float], ok: bool = True, now: Optional[float] = None) -> None:
+        """rtt_s: request round trip (None/ignored on failure)."""
+        a = self.cfg.ewma_alpha
+        now = time.monotonic() if now is None else now
+        if self._last_t is not None:
+            dt = now - self._last_t
+            if dt > 0:
+                self.achieved_hz = (1.0 / dt) if self.achieved_hz == 0 else a * (1.0 / dt) + (1 - a) * self.achieved_hz
+        self._last_t = now
+
+        self.timeout_rate = a * (0.0 if ok else 1.0) + (1 - a) * self.timeout_rate
+        if not ok or rtt_s is None:
+            self.timeouts += 1
+            self._cut()
+            return
+
+        self.ok += 1
+        self.rtt_s = rtt_s if self.rtt_s is None else a * rtt_s + (1 - a) * self.rtt_s
+
+        # the bus can't sustain this period: back off before requests pile up
+        if self.rtt_s * self.cfg.headroom > self.period:
+            self._cut()
+            self.hz = self._clamp(min(self.hz, 1.0 / (self.rtt_s * self.cfg.headroom)))
+            return
+
+        self._streak += 1
+        if self._streak >= self.cfg.increase_every:
+            self._streak = 0
+            hz = self.hz + self.cfg.add_hz
+            # never aim past what the measured RTT allows
+            hz = min(hz, 1.0 / (self.rtt_s * self.cfg.headroom))
+            self.hz = self._clamp(max(hz, self.hz))
+
+    def summary(self) -> str:
+        rtt = f"{self.rtt_s * 1000:.0f} ms" if self.rtt_s is not None else "n/a"
+        return (
+            f"{self.achieved_hz:.1f} Hz achieved (target {self.hz:.1f} Hz), "
+            f"RTT {rtt}, timeouts {self.timeout_rate * 100:.0f}%"
+        )
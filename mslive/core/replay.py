@@ -2,13 +2,20 @@
 from __future__ import annotations
 
 import csv
+import queue
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, TextIO
 
 REQ_GENERAL = bytes.fromhex("12 05 0B 03")
 
+# markers the streaming reader thread puts between frames
+_LOOP = "loop"    # wrapped around to the first row
+_END = "end"      # no more rows (loop off)
+_EMPTY = "empty"  # a whole pass without a single valid row
+
 @dataclass
 class ReplayConfig:
     csv_path: str
@@ -17,6 +24,9 @@ class ReplayConfig:
     speed: float = 1.0        # 2.0 = 2x faster than recorded time
     ts_column: str = "ts"
     b_prefix: str = "b"       # columns b0..b31
+    streaming: bool = True    # parse rows on a reader thread as they are needed (flat memory);
+                              # False: load the whole CSV on open()
+    read_ahead: int = 256     # streaming: rows parsed ahead of send()
 
 class ReplayDS2:
     """
@@ -27,6 +37,13 @@ class ReplayDS2:
 
     It replays recorded DS2 responses from CSV columns b0..b31.
     Currently supports REQ_GENERAL only; extend with mapping if you add more jobs later.
+
+    By default rows are parsed lazily: a reader thread keeps up to
+    cfg.read_ahead frames ready and seeks back to the first row to loop, so
+    open() returns as soon as the first row is parsed and memory does not
+    grow with the log. streaming=False loads everything into frames/ts.
+    If the reader fails (undecodable bytes, the file going away), open() or
+    send() raises its exception, and keeps raising it.
     """
     def __init__(self, cfg: ReplayConfig):
         self.cfg = cfg
@@ -35,11 +52,21 @@ class ReplayDS2:
         self.i = 0
         self._t0_real: Optional[float] = None
         self._t0_log: Optional[float] = None
+        # streaming
+        self._q: Optional[queue.Queue] = None
+        self._reader: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last: Optional[tuple[float, bytes]] = None
+        self._ended = False
+        self._error: Optional[BaseException] = None
 
     def open(self) -> None:
         p = Path(self.cfg.csv_path)
         if not p.exists():
             raise FileNotFoundError(self.cfg.csv_path)
+        if self.cfg.streaming:
+            self._open_streaming(p)
+            return
 
         with p.open("r", newline="", encoding="utf-8") as f:
             r = csv.DictReader(f)
@@ -76,7 +103,131 @@ class ReplayDS2:
         self._t0_real = time.time()
         self._t0_log = self.ts[0]
 
+    # --- streaming ------------------------------------------------------------
+
+    def _open_streaming(self, p: Path) -> None:
+        f = p.open("r", newline="", encoding="utf-8")
+        header = next(csv.reader(f), [])
+        col = {name: i for i, name in enumerate(header)}
+        needed = [f"{self.cfg.b_prefix}{i}" for i in range(32)]
+        if any(c not in col for c in needed):
+            f.close()
+            raise ValueError("No valid frames found in CSV (need b0..b31 columns).")
+        self._stop.clear()
+        self._ended = False
+        self._error = None
+        self._last = None
+        self._q = queue.Queue(maxsize=max(1, self.cfg.read_ahead))
+        self._reader = threading.Thread(
+            target=self._read_rows,
+            args=(f, col.get(self.cfg.ts_column), [col[c] for c in needed]),
+            name="mslive-replay",
+            daemon=True,
+        )
+        self._reader.start()
+
+        try:
+            first = self._get()
+        except BaseException:
+            self.close()
+            raise
+        if first == _EMPTY:
+            self.close()
+            raise ValueError("No valid frames found in CSV (need b0..b31 columns).")
+        self._last = first
+        self._t0_real = time.time()
+        self._t0_log = first[0]
+
+    def _put(self, item) -> bool:
+        """Queue one item, waiting while the buffer is full; False once close() was called."""
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_rows(self, f: TextIO, i_ts: Optional[int], i_b: list[int]) -> None:
+        try:
+            while not self._stop.is_set():
+                n = 0
+                r = csv.reader(f)
+                for row in r:
+                    try:
+                        t = float(row[i_ts]) if i_ts is not None else float(n)
+                    except (ValueError, IndexError):
+                        t = float(n)  # same fallback as the list mode
+                    try:
+                        fr = bytes(int(row[i]) & 0xFF for i in i_b)
+                    except (ValueError, IndexError):
+                        continue
+                    n += 1
+                    if not self._put((t, fr)):
+                        return
+                if not n:
+                    self._put(_EMPTY)
+                    return
+                if not self.cfg.loop:
+                    self._put(_END)
+                    return
+                # loop: back to the first row, nothing kept in memory
+                f.seek(0)
+                next(csv.reader(f), None)
+                if not self._put(_LOOP):
+                    return
+        except Exception as e:
+            self._put(e)  # re-raised by send() / open()
+        finally:
+            f.close()
+
+    def _get(self):
+        """Next item from the reader; raises what the reader raised, or if it died without a word."""
+        while True:
+            try:
+                item = self._q.get(timeout=0.5)
+            except queue.Empty:
+                if self._reader is None or self._reader.is_alive():
+                    continue
+                try:
+                    item = self._q.get_nowait()  # put just before it exited
+                except queue.Empty:
+                    raise RuntimeError("Replay reader stopped unexpectedly") from None
+            if isinstance(item, BaseException):
+                self._error = item
+                raise item
+            return item
+
+    def _next_streamed(self) -> bytes:
+        if self._q is None or self._last is None:
+            raise RuntimeError("ReplayDS2 not opened")
+        if self._error is not None:
+            raise self._error
+        if self.i == 0:
+            item = self._last  # open() already took the first row
+        elif self._ended:
+            return self._last[1]  # hold last frame
+        else:
+            item = self._get()
+            if item == _LOOP:
+                item = self._get()
+                if isinstance(item, tuple):
+                    self._t0_real = time.time()
+                    self._t0_log = item[0]
+            if not isinstance(item, tuple):  # _END, or the file emptied under us
+                self._ended = True
+                return self._last[1]
+        self._last = item
+        self.i += 1
+        self._sleep_until(item[0])
+        return item[1]
+
     def close(self) -> None:
+        if self._reader is not None:
+            self._stop.set()
+            self._reader.join()
+            self._reader = None
+            self._q = None
         self.frames = []
         self.ts = []
         self.i = 0
@@ -84,12 +235,15 @@ class ReplayDS2:
         self._t0_log = None
 
     def _sleep_to_match_time(self, idx: int) -> None:
+        self._sleep_until(self.ts[idx])
+
+    def _sleep_until(self, t_log: float) -> None:
         if not self.cfg.realtime:
             return
         assert self._t0_real is not None and self._t0_log is not None
 
         # target log elapsed, scaled
-        log_elapsed = (self.ts[idx] - self._t0_log) / max(self.cfg.speed, 1e-6)
+        log_elapsed = (t_log - self._t0_log) / max(self.cfg.speed, 1e-6)
         target_real = self._t0_real + log_elapsed
         now = time.time()
         dt = target_real - now
@@ -103,6 +257,9 @@ class ReplayDS2:
                 f"ReplayDS2 only supports REQ_GENERAL for now. Got: {payload_no_chk.hex(' ')}"
             )
 
+        if self.cfg.streaming:
+            return self._next_streamed()
+
         if not self.frames:
             raise RuntimeError("ReplayDS2 not opened")
 
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
-from typing import Callable, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 
 from .util import hex_to_bytes
 
@@ -58,3 +58,130 @@ class PollScheduler:
 def raise_if_empty(items: list[PollItem]) -> None:
     if not items:
         raise ValueError("Poll list is empty")
+
+
+@dataclass(frozen=True)
+class JobResult:
+    job: str
+    ts: float                       # time.time() when the response arrived
+    rtt_s: float                    # request -> response round trip
+    resp: Optional[bytes] = None
+    decoded: Any = None
+    error: Optional[str] = None
+
+
+@dataclass
+class DS2Job:
+    name: str
+    payload: bytes                  # DS2 payload without checksum
+    interval_s: float               # 0 = as often as the bus allows
+    priority: int = 0               # higher wins when several jobs are due
+    decode: Optional[Callable[[bytes], Any]] = None
+    subscribers: list[Callable[[JobResult], None]] = field(default_factory=list)
+    next_due: float = 0.0
+    sent: int = 0
+    errors: int = 0
+
+
+class DS2Scheduler:
+    """
+    Multi-rate, half-duplex DS2 poller.
+
+    Owns one DS2 session (anything with send()). Each step picks the most
+    urgent due job, sends it, waits for its response and hands the result to
+    the job's subscribers before the next request goes out, so requests
+    never overlap on the K-line.
+
+    Urgency: a job more than `slack` of its interval late (starving) goes
+    first, then higher priority, then the job that has been due longest.
+    That lets an RPM job with interval 0 run every cycle while slower jobs
+    still keep their rate by taking the odd cycle.
+    """
+    def __init__(self, d: Any, jobs: list[DS2Job], max_idle_s: float = 0.05, slack: float = 0.25):
+        raise_if_empty(jobs)
+        self.d = d
+        self.jobs = jobs
+        self.max_idle_s = max_idle_s
+        self.slack = slack
+        self._stop = False
+        now = time.monotonic()
+        for job in self.jobs:
+            job.next_due = now
+
+    @staticmethod
+    def from_json(obj: dict, d: Any) -> "DS2Scheduler":
+        jobs: list[DS2Job] = []
+        for it in obj.get("polls", []):
+            jobs.append(
+                DS2Job(
+                    name=str(it["name"]),
+                    payload=hex_to_bytes(str(it["hex"])),
+                    interval_s=float(it["interval_ms"]) / 1000.0,
+                    priority=int(it.get("priority", 0)),
+                )
+            )
+        return DS2Scheduler(d, jobs)
+
+    def job(self, name: str) -> DS2Job:
+        for job in self.jobs:
+            if job.name == name:
+                return job
+        raise KeyError(name)
+
+    def subscribe(self, name: str, fn: Callable[[JobResult], None]) -> None:
+        self.job(name).subscribers.append(fn)
+
+    def stop(self) -> None:
+        self._stop = True
+
+    def _pick(self, now: float) -> Optional[DS2Job]:
+        best: Optional[DS2Job] = None
+        best_key: tuple = ()
+        for job in self.jobs:
+            late = now - job.next_due
+            if late < 0:
+                continue
+            starving = job.interval_s > 0 and late > job.interval_s * self.slack
+            key = (starving, job.priority, late)
+            if best is None or key > best_key:
+                best, best_key = job, key
+        return best
+
+    def _run_job(self, job: DS2Job) -> JobResult:
+        t0 = time.monotonic()
+        job.sent += 1
+        try:
+            resp = self.d.send(job.payload)
+            decoded = job.decode(resp) if job.decode else None
+            res = JobResult(job=job.name, ts=time.time(), rtt_s=time.monotonic() - t0, resp=resp, decoded=decoded)
+        except Exception as e:
+            job.errors += 1
+            res = JobResult(job=job.name, ts=time.time(), rtt_s=time.monotonic() - t0, error=str(e))
+
+        # drift-free, but don't try to catch up a backlog after a stall
+        job.next_due += job.interval_s
+        now = time.monotonic()
+        if job.next_due < now - job.interval_s:
+            job.next_due = now
+
+        for fn in job.subscribers:
+            fn(res)
+        return res
+
+    def step(self) -> Optional[JobResult]:
+        """Run the most urgent due job, or sleep until one is due (at most max_idle_s)."""
+        now = time.monotonic()
+        job = self._pick(now)
+        if job is None:
+            wait = min(j.next_due for j in self.jobs) - now
+            time.sleep(min(max(wait, 0.0), self.max_idle_s))
+            return None
+        return self._run_job(job)
+
+    def run(self, stop_after_s: Optional[float] = None) -> None:
+        self._stop = False
+        start = time.monotonic()
+        while not self._stop:
+            if stop_after_s is not None and (time.monotonic() - start) >= stop_after_s:
+                return
+            self.step()
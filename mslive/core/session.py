@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+from .ds2 import DS2
+
+
+class LinkState(str, Enum):
+    CONNECTED = "connected"
+    DEGRADED = "degraded"      # requests failing, retrying with backoff
+    WAKING = "waking"          # re-running ECU init / 5-baud wake
+    REOPENING = "reopening"    # closing and reopening the serial port
+
+
+@dataclass
+class SessionConfig:
+    wake_after: int = 3            # consecutive failures before waking the ECU
+    reopen_after: int = 6          # ... before reopening the port
+    backoff_initial_s: float = 0.1
+    backoff_factor: float = 2.0
+    backoff_max_s: float = 2.0
+    wake_addr: int = 0x12
+    # run the wake/reopen steps (seconds: 5-baud wake, init timeouts, port
+    # settle) on a helper thread; send() fails fast meanwhile
+    background_recovery: bool = True
+
+
+@dataclass
+class RecoveryStats:
+    outages: int = 0
+    wakes: int = 0
+    reopens: int = 0
+    last_recover_s: Optional[float] = None
+    max_recover_s: float = 0.0
+    total_dead_s: float = 0.0
+    recent_recover_s: deque = field(default_factory=lambda: deque(maxlen=32))
+
+
+class DS2Session:
+    """
+    DS2 with bounded-latency recovery.
+
+    Drop-in for DS2 in the apps (send/close). Failures walk a small state
+    machine:
+
+      connected -> degraded   first failure; retry after an exponential,
+                              capped backoff
+      degraded  -> waking     after wake_after failures: init_ecu(), and the
+                              5-baud wake if that gets no answer
+      waking    -> reopening  after reopen_after failures: close and reopen
+                              the port (cable unplugged / adapter reset)
+
+    Any good response returns to connected and records how long the outage
+    lasted (`recovery`; stats() is the DS2 latency report, as on DS2).
+
+    send() still raises on failure so callers can count errors. The wake
+    and reopen steps take seconds, so by default they run on a helper
+    thread and send() raises RuntimeError at once until they finish: a
+    send() then never blocks longer than one timeout plus one backoff
+    (backoff_max_s). With background_recovery=False they run inline and a
+    failing send() can also take one whole wake or reopen.
+    """
+    def __init__(self, d: DS2, cfg: Optional[SessionConfig] = None):
+        self.d = d
+        self.cfg = cfg or SessionConfig()
+        self.state = LinkState.CONNECTED
+        self.failures = 0
+        self.recovery = RecoveryStats()
+        self._outage_t0: Optional[float] = None
+        self._recovering: Optional[threading.Thread] = None
+
+    @property
+    def recovering(self) -> bool:
+        """A wake/reopen is running on the helper thread."""
+        t = self._recovering
+        return t is not None and t.is_alive()
+
+    def close(self) -> None:
+        if self._recovering is not None:
+            self._recovering.join()  # it owns the port until it is done
+            self._recovering = None
+        self.d.close()
+
+    def stats(self) -> dict:
+        return self.d.stats()
+
+    def backoff_s(self) -> float:
+        if self.failures <= 0:
+            return 0.0
+        b = self.cfg.backoff_initial_s * (self.cfg.backoff_factor ** (self.failures - 1))
+        return min(b, self.cfg.backoff_max_s)
+
+    def _debug(self, msg: str) -> None:
+        if self.d.cfg.debug:
+            print(f"[Session] {msg}")
+
+    def _recovered(self) -> None:
+        if self._outage_t0 is not None:
+            dt = time.monotonic() - self._outage_t0
+            self.recovery.last_recover_s = dt
+            self.recovery.max_recover_s = max(self.recovery.max_recover_s, dt)
+            self.recovery.total_dead_s += dt
+            self.recovery.recent_recover_s.append(dt)
+            self._debug(f"recovered after {dt:.2f}s from {self.state.value}")
+        self._outage_t0 = None
+        self.failures = 0
+        self.state = LinkState.CONNECTED
+
+    def _wake(self) -> None:
+        self.state = LinkState.WAKING
+        self.recovery.wakes += 1
+        self._debug("waking ECU")
+        if self.d.init_ecu():
+            return
+        self.d.slow_init_5baud(self.cfg.wake_addr)
+        self.d.init_ecu()
+
+    def _reopen(self) -> None:
+        self.state = LinkState.REOPENING
+        self.recovery.reopens += 1
+        self._debug("reopening port")
+        self.d.close()
+        self.d.open()
+        self.d.init_ecu()
+
+    def _step(self, fn) -> None:
+        try:
+            fn()
+        except (OSError, RuntimeError) as e:
+            # port gone / not open: stay in this state, next failure retries
+            self._debug(f"{self.state.value} failed: {e}")
+
+    def _escalate(self) -> None:
+        self.failures += 1
+        if self._outage_t0 is None:
+            self._outage_t0 = time.monotonic()
+            self.recovery.outages += 1
+
+        time.sleep(self.backoff_s())
+        if self.failures >= self.cfg.reopen_after:
+            fn = self._reopen
+        elif self.failures >= self.cfg.wake_after:
+            fn = self._wake
+        else:
+            self.state = LinkState.DEGRADED
+            return
+        if not self.cfg.background_recovery:
+            self._step(fn)
+            return
+        self.state = LinkState.REOPENING if fn == self._reopen else LinkState.WAKING
+        self._recovering = threading.Thread(target=self._step, args=(fn,), name="mslive-recover", daemon=True)
+        self._recovering.start()
+
+    def send(self, payload_no_chk: bytes) -> bytes:
+        if self.recovering:
+            raise RuntimeError(f"DS2 link {self.state.value}: recovery in progress")
+        try:
+            resp = self.d.send(payload_no_chk)
+        except (TimeoutError, OSError, RuntimeError):
+            self._escalate()
+            raise
+        if self.state is not LinkState.CONNECTED or self._outage_t0 is not None:
+            self._recovered()
+        return resp
+
+    def summary(self) -> str:
+        s = self.recovery
+        last = f"{s.last_recover_s:.1f}s" if s.last_recover_s is not None else "-"
+        return f"Link: {self.state.value}  outages {s.outages}  last recover {last}  max {s.max_recover_s:.1f}s"
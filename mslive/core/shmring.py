@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import math
+import struct
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Iterable, Optional, Sequence
+
+# Shared-memory layout (little-endian):
+#   header (HEADER_SIZE bytes):
+#     4s magic, u16 version, u16 n_channels, u32 capacity, u32 record_size,
+#     u32 raw_size, 4x, u64 write_seq (last completed record, 0 = none),
+#     then channel names (utf-8, comma separated, NUL padded)
+#   capacity records of record_size bytes:
+#     u64 seq, f64 mono, f64 ts, u8 len, raw_size bytes raw, pad to 4,
+#     n_channels x f32, pad to 8
+# A record's seq is zeroed while the writer fills it and set last, so a
+# reader that sees the seq it expected before and after copying has a
+# consistent record (seqlock); anything else was overwritten (overrun).
+MAGIC = b"MSRG"
+VERSION = 1
+HEADER_SIZE = 320
+RAW_SIZE = 40  # GEN responses are 38 bytes
+
+_HDR = struct.Struct("<4sHHIII4xQ")
+_SEQ = struct.Struct("<Q")
+_WSEQ_OFF = 24
+_NAMES_OFF = _HDR.size
+_NAMES_MAX = HEADER_SIZE - _HDR.size
+
+
+def _layout(n_channels: int, raw_size: int) -> tuple[struct.Struct, int, int]:
+    head = 8 + 8 + 8 + 1 + raw_size
+    pad = -head % 4
+    rec = struct.Struct(f"<QddB{raw_size}s{pad}x{n_channels}f")
+    size = rec.size + (-rec.size % 8)
+    return rec, size, head + pad
+
+
+@dataclass(frozen=True)
+class RingRecord:
+    seq: int
+    mono: float
+    ts: float
+    resp: bytes
+    values: tuple[float, ...]
+
+
+class SampleRing:
+    """
+    Single-writer, many-reader ring of fixed-size sample records in
+    multiprocessing.shared_memory. The writer never waits for readers;
+    readers never lock: they pick records by sequence number and detect
+    the ones the writer lapped (counted in `overruns`).
+
+    SampleRing.create(...) in the acquisition process, SampleRing.attach(name)
+    everywhere else. With NumPy installed, `records` is a zero-copy
+    structured view of the whole ring and latest()/since() return arrays.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        magic, ver, n_ch, cap, rec_size, raw_size, _ = _HDR.unpack_from(self.buf, 0)
+        if magic != MAGIC or ver != VERSION:
+            raise ValueError(f"{shm.name}: not an mslive sample ring (v{VERSION})")
+        self.capacity = cap
+        self.raw_size = raw_size
+        names = bytes(self.buf[_NAMES_OFF:HEADER_SIZE]).rstrip(b"\0").decode("utf-8")
+        self.channels = names.split(",") if names else []
+        self._rec, self.record_size, self._ch_off = _layout(n_ch, raw_size)
+        if rec_size != self.record_size:
+            raise ValueError(f"{shm.name}: record size {rec_size} != {self.record_size}")
+        self._seq = self.write_seq
+        self._nan = (math.nan,) * n_ch
+        self._np_view = None
+        self.overruns = 0
+
+    @classmethod
+    def create(
+        cls,
+        name: Optional[str],
+        capacity: int,
+        channels: Sequence[str] = (),
+        raw_size: int = RAW_SIZE,
+    ) -> "SampleRing":
+        names = ",".join(channels).encode("utf-8")
+        if len(names) > _NAMES_MAX:
+            raise ValueError("Too many channel names for the ring header")
+        _, rec_size, _ = _layout(len(channels), raw_size)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity * rec_size)
+        except FileExistsError:
+            # left behind by a crashed writer: we are the writer now
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity * rec_size)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _HDR.pack_into(shm.buf, 0, MAGIC, VERSION, len(channels), capacity, rec_size, raw_size, 0)
+        shm.buf[_NAMES_OFF:_NAMES_OFF + len(names)] = names
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SampleRing":
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            # before 3.13 the resource tracker would unlink the writer's
+            # segment when this reader exits
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self) -> None:
+        self._np_view = None
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # --- writer -----------------------------------------------------------
+
+    def write(self, mono: float, ts: float, resp: bytes, values: Iterable[float] = ()) -> int:
+        """Append one record, overwriting the oldest. Returns its seq."""
+        seq = self._seq + 1
+        off = HEADER_SIZE + ((seq - 1) % self.capacity) * self.record_size
+        vals = tuple(values)
+        n = len(self._nan)
+        if len(vals) != n:
+            vals = (vals + self._nan)[:n]
+        _SEQ.pack_into(self.buf, off, 0)  # busy
+        self._rec.pack_into(self.buf, off, 0, mono, ts, min(len(resp), self.raw_size), resp, *vals)
+        _SEQ.pack_into(self.buf, off, seq)
+        _SEQ.pack_into(self.buf, _WSEQ_OFF, seq)
+        self._seq = seq
+        return seq
+
+    def write_sample(self, s: Any) -> None:
+        """AcquisitionWorker on_sample hook: responses only, channels taken from s.decoded."""
+        if s.resp is None:
+            return
+        d = s.decoded
+        if d is None:
+            vals: tuple[float, ...] = ()
+        elif isinstance(d, dict):
+            vals = tuple(float(d.get(c, math.nan)) for c in self.channels)
+        else:
+            vals = tuple(float(getattr(d, c, math.nan)) for c in self.channels)
+        self.write(s.mono, s.ts, s.resp, vals)
+
+    # --- readers ----------------------------------------------------------
+
+    @property
+    def write_seq(self) -> int:
+        """Seq of the newest complete record (0 while empty)."""
+        return _SEQ.unpack_from(self.buf, _WSEQ_OFF)[0]
+
+    def read(self, seq: int) -> Optional[RingRecord]:
+        """One record by seq (pure Python), None if it was overwritten or not written yet."""
+        w = self.write_seq
+        if seq < 1 or seq > w or seq <= w - self.capacity:
+            return None
+        off = HEADER_SIZE + ((seq - 1) % self.capacity) * self.record_size
+        raw = bytes(self.buf[off:off + self._rec.size])
+        got, mono, ts, ln, resp, *vals = self._rec.unpack(raw)
+        if got != seq or _SEQ.unpack_from(self.buf, off)[0] != seq:
+            self.overruns += 1
+            return None
+        return RingRecord(seq=got, mono=mono, ts=ts, resp=resp[:ln], values=tuple(vals))
+
+    def dtype(self):
+        import numpy as np  # optional dependency, only for the array API
+        n = len(self._nan)
+        return np.dtype({
+            "names": ["seq", "mono", "ts", "len", "raw", "ch"],
+            "formats": ["<u8", "<f8", "<f8", "u1", ("u1", (self.raw_size,)), ("<f4", (n,))],
+            "offsets": [0, 8, 16, 24, 25, self._ch_off],
+            "itemsize": self.record_size,
+        })
+
+    @property
+    def records(self):
+        """Zero-copy structured array over all slots (slot i holds seq i+1 mod capacity)."""
+        if self._np_view is None:
+            import numpy as np
+            self._np_view = np.ndarray((self.capacity,), dtype=self.dtype(), buffer=self.buf, offset=HEADER_SIZE)
+        return self._np_view
+
+    def _gather(self, first: int, last: int):
+        import numpy as np
+        if last < first:
+            return self.records[:0].copy()
+        seqs = np.arange(first, last + 1, dtype=np.uint64)
+        out = self.records[(seqs - 1) % self.capacity]  # fancy index: one copy of just these
+        # drop what the writer lapped while we copied
+        ok = out["seq"] == seqs
+        ok &= self.records["seq"][(seqs - 1) % self.capacity] == seqs
+        bad = int(len(ok) - ok.sum())
+        if bad:
+            self.overruns += bad
+            out = out[ok]
+        return out
+
+    def latest(self, n: int):
+        """Newest n records, oldest first, as a structured array."""
+        w = self.write_seq
+        return self._gather(max(1, w - n + 1, w - self.capacity + 1), w)
+
+    def since(self, seq: int):
+        """
+        Records after `seq` (e.g. the last one a logger handled). Anything
+        already overwritten is skipped and counted in `overruns`.
+        """
+        w = self.write_seq
+        first = max(seq + 1, w - self.capacity + 1, 1)
+        if first > seq + 1:
+            self.overruns += first - (seq + 1)
+        return self._gather(first, w)
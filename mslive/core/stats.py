@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Optional
+
+# Bucket upper bounds in milliseconds (1-2-5 steps, 50 us .. 5 s).
+# Anything slower lands in the overflow bucket.
+DEFAULT_BOUNDS_MS = (
+    0.05, 0.1, 0.2, 0.5,
+    1.0, 2.0, 5.0,
+    10.0, 20.0, 50.0,
+    100.0, 200.0, 500.0,
+    1000.0, 2000.0, 5000.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram. record() is O(log buckets) with no
+    allocation; percentiles interpolate linearly inside the bucket, so they
+    are approximate but stable enough for a live status line.
+    """
+    def __init__(self, bounds_ms: tuple[float, ...] = DEFAULT_BOUNDS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.counts[bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @property
+    def mean_ms(self) -> Optional[float]:
+        return self.total_ms / self.count if self.count else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p in 0..100, result in ms (None when empty)."""
+        if not self.count:
+            return None
+        target = self.count * p / 100.0
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                lo = self.bounds_ms[i - 1] if i > 0 else 0.0
+                hi = self.bounds_ms[i] if i < len(self.bounds_ms) else self.max_ms
+                frac = (target - seen) / c
+                return min(lo + (hi - lo) * frac, self.max_ms)
+            seen += c
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "mean_ms": self.mean_ms,
+            "max_ms": self.max_ms if self.count else None,
+        }
+
+
+def format_phase(name: str, s: dict) -> str:
+    """One status line: 'hdr  n=120  p50 12.3  p95 20.1  p99 40.2 ms'."""
+    if not s.get("count"):
+        return f"{name:6s} n=0"
+
+    def f(v: Optional[float]) -> str:
+        return "-" if v is None else f"{v:.1f}"
+
+    return f"{name:6s} n={s['count']}  p50 {f(s['p50_ms'])}  p95 {f(s['p95_ms'])}  p99 {f(s['p99_ms'])} ms"
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import BinaryIO
+
+from .record import Recorder, RecorderConfig
+
+# Dash/logger sessions: blocks closed every second, fsync every 5 s, so a
+# power cut loses at most a few seconds (see `mslive recover`).
+TAP_RECORDER = RecorderConfig(flush="interval", flush_interval_s=1.0, fsync_interval_s=5.0, version=2,
+                              seal_interval_s=1.0)
+
+
+class RecordingTap:
+    """
+    Raw TX/RX recording for a DS2 (set `d.tap`). tx()/rx() run on the
+    acquisition thread and only append (frame, monotonic time) to a deque:
+    no lock, no syscall. A background thread drains it into a buffered
+    Recorder.
+
+    Both clocks are kept: the wall and monotonic time read together when
+    the tap starts go into the file header (see core.mslr), and each frame
+    is stamped with its monotonic time moved onto wall time by that anchor.
+    Intervals are exact, NTP steps mid-drive do not bend them, and
+    Replayer.clock gives every frame's monotonic time back.
+
+    At most `max_pending` frames wait for the writer. Past that, new frames
+    are dropped and counted in `dropped` (also in DS2.stats() and reported
+    by the writer as it happens), or, with `lossless`, tx()/rx() wait for
+    the writer to catch up: nothing is lost, the poll loop slows instead.
+    """
+    def __init__(
+        self,
+        f: BinaryIO,
+        cfg: RecorderConfig = TAP_RECORDER,
+        max_pending: int = 65536,
+        poll_s: float = 0.05,
+        own_file: bool = False,
+        lossless: bool = False,
+    ):
+        self.f = f
+        self.poll_s = poll_s
+        self.own_file = own_file
+        self.max_pending = max_pending
+        self.lossless = lossless
+        self._q: deque = deque()
+        self._mono0 = time.monotonic()
+        self._wall0 = time.time()
+        self.rec = Recorder(f, cfg, clock=(self._wall0, self._mono0))
+        self.dropped = 0
+        self.stalls = 0  # lossless: times tx()/rx() had to wait for the writer
+        self._reported = 0
+        self._stop = threading.Event()
+        self._kick = threading.Event()  # full queue: drain now, not at the next poll
+        self._room = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mslive-tap", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def open(cls, path: str, cfg: RecorderConfig = TAP_RECORDER, lossless: bool = False) -> "RecordingTap":
+        return cls(open(path, "wb"), cfg, own_file=True, lossless=lossless)
+
+    # --- acquisition thread -----------------------------------------------
+
+    def _full(self) -> bool:
+        """The queue is full: wait for room (lossless) or count a drop. True if the frame must go."""
+        if not self.lossless or not self._thread.is_alive():
+            self.dropped += 1
+            return True
+        self.stalls += 1
+        while len(self._q) >= self.max_pending and self._thread.is_alive():
+            self._room.clear()
+            self._kick.set()
+            self._room.wait(self.poll_s)
+        return False
+
+    def tx(self, frame: bytes, mono: float) -> None:
+        q = self._q
+        if len(q) >= self.max_pending and self._full():
+            return
+        q.append((0, frame, mono))
+
+    def rx(self, frame, mono: float) -> None:
+        """`frame` may be a view into the receive buffer: it is copied here."""
+        q = self._q
+        if len(q) >= self.max_pending and self._full():
+            return
+        q.append((1, bytes(frame), mono))
+
+    # --- writer thread ----------------------------------------------------
+
+    def _drain(self) -> None:
+        q = self._q
+        off = self._wall0 - self._mono0
+        batch = []
+        while q:
+            dir_b, frame, mono = q.popleft()
+            batch.append(("rx" if dir_b else "tx", frame, mono + off))
+        self._room.set()
+        if batch:
+            self.rec.write_many(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._kick.wait(self.poll_s)
+            self._kick.clear()
+            self._drain()
+            self.rec.maybe_flush()  # quiet periods still reach the disk
+            dropped = self.dropped
+            if dropped != self._reported:
+                print(f"[tap] recorder behind: {dropped - self._reported} frame(s) dropped "
+                      f"({dropped} in total)", file=sys.stderr)
+                self._reported = dropped
+
+    @property
+    def pending(self) -> int:
+        return len(self._q)
+
+    @property
+    def frames(self) -> int:
+        return self.rec.frames
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._kick.set()
+        self._thread.join()
+        self._drain()
+        self.rec.close()
+        if self.own_file:
+            self.f.close()
+
+    def __enter__(self) -> "RecordingTap":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import select
+import selectors
+import socket
+import threading
 import time
 from dataclasses import dataclass
-from typing import Optional, Protocol
+from typing import Callable, Optional, Protocol
 
 import serial
 from serial.tools import list_ports
 
+from .lowlatency import LowLatencyReport, apply_low_latency
+
 
 class Transport(Protocol):
     def open(self) -> None: ...
@@ -14,6 +20,11 @@ class Transport(Protocol):
     def write(self, data: bytes) -> int: ...
     def read(self, max_bytes: int = 4096) -> bytes: ...
     def flush(self) -> None: ...
+    # used by DS2:
+    def readinto(self, buf: memoryview) -> int: ...  # block up to the read timeout
+    def available(self) -> int: ...                   # bytes readable right now
+    def drain(self) -> None: ...                      # wait until written bytes are out
+    def wait_readable(self, deadline: float) -> bool: ...  # block until readable or time.monotonic() >= deadline
 
 
 @dataclass
@@ -23,12 +34,38 @@ class SerialConfig:
     timeout_s: float = 0.1  # read timeout
     write_timeout_s: float = 0.2
     inter_byte_timeout_s: Optional[float] = None
+    parity: str = serial.PARITY_NONE
+    settle_s: float = 0.05
+    low_latency: bool = False  # FTDI/CH340 receive-latency tuning, see core.lowlatency
+
+    @staticmethod
+    def ds2(
+        port: str,
+        baud: int = 9600,
+        timeout_s: float = 1.5,
+        inter_byte_timeout_s: float = 0.05,
+        low_latency: bool = False,
+        settle_s: float = 0.5,
+    ) -> "SerialConfig":
+        """DS2 line settings: 8E1, K+DCAN cables want ~0.5 s to settle after open."""
+        return SerialConfig(
+            port=port,
+            baud=baud,
+            timeout_s=timeout_s,
+            write_timeout_s=max(timeout_s, 0.2),
+            inter_byte_timeout_s=inter_byte_timeout_s,
+            parity=serial.PARITY_EVEN,
+            settle_s=settle_s,
+            low_latency=low_latency,
+        )
 
 
 class SerialTransport:
     def __init__(self, cfg: SerialConfig):
         self.cfg = cfg
         self.ser: Optional[serial.Serial] = None
+        self._sel: Optional[selectors.BaseSelector] = None
+        self.low_latency_report: Optional[LowLatencyReport] = None
 
     def open(self) -> None:
         if self.ser and self.ser.is_open:
@@ -40,19 +77,39 @@ class SerialTransport:
             write_timeout=self.cfg.write_timeout_s,
             inter_byte_timeout=self.cfg.inter_byte_timeout_s,
             bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_NONE,
+            parity=self.cfg.parity,
             stopbits=serial.STOPBITS_ONE,
         )
+        # Wait for input on the fd (epoll/kqueue/poll) where the platform has
+        # one; Windows ports have no fileno() and fall back to short sleeps.
+        try:
+            fd = self.ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None
+        if fd is not None:
+            self._sel = selectors.DefaultSelector()
+            self._sel.register(fd, selectors.EVENT_READ)
+        if self.cfg.low_latency:
+            self.low_latency_report = apply_low_latency(self.ser, self.cfg.port)
         # Small settling delay is often helpful for USB serial
-        time.sleep(0.05)
+        time.sleep(self.cfg.settle_s)
 
     def close(self) -> None:
+        if self._sel:
+            self._sel.close()
+            self._sel = None
         if self.ser:
             try:
                 self.ser.close()
             finally:
                 self.ser = None
 
+    def set_timeout(self, timeout_s: float) -> None:
+        """Change the read timeout, on the open port too."""
+        self.cfg.timeout_s = timeout_s
+        if self.ser:
+            self.ser.timeout = timeout_s
+
     def flush(self) -> None:
         if not self.ser:
             return
@@ -64,13 +121,252 @@ class SerialTransport:
             raise RuntimeError("Serial not open")
         return self.ser.write(data)
 
+    def drain(self) -> None:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        self.ser.flush()
+
+    def available(self) -> int:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        return self.ser.in_waiting
+
+    def wait_readable(self, deadline: float) -> bool:
+        """
+        Sleep in the kernel until input arrives or time.monotonic() reaches
+        `deadline`. True when bytes are readable.
+        """
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        while True:
+            remaining = deadline - time.monotonic()
+            if self._sel is not None:
+                if self._sel.select(max(remaining, 0.0)):
+                    return True
+            elif self.ser.in_waiting:
+                return True
+            elif remaining > 0:
+                time.sleep(min(remaining, 0.002))
+                continue
+            if remaining <= 0:
+                return False
+
     def read(self, max_bytes: int = 4096) -> bytes:
+        """Whatever is available up to max_bytes, waiting up to the read timeout for the first byte."""
         if not self.ser:
             raise RuntimeError("Serial not open")
-        # Read whatever is available up to max_bytes
-        waiting = self.ser.in_waiting
-        n = min(max_bytes, waiting if waiting > 0 else max_bytes)
-        return self.ser.read(n)
+        if not self.wait_readable(time.monotonic() + self.cfg.timeout_s):
+            return b""
+        return self.ser.read(min(max_bytes, max(self.ser.in_waiting, 1)))
+
+    def readinto(self, buf: memoryview) -> int:
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        return self.ser.readinto(buf)
+
+    def set_break(self, level: bool) -> None:
+        """Hold the line low (True) or release it; used for the 5-baud wake."""
+        if not self.ser:
+            raise RuntimeError("Serial not open")
+        self.ser.break_condition = level
+
+
+class LoopbackTransport:
+    """
+    In-memory transport. Written bytes are echoed (like the K-line) and
+    passed to `responder`; its reply becomes readable. No I/O, no timing:
+    what remains of a round trip is pure protocol overhead.
+    """
+    def __init__(
+        self,
+        responder: Optional[Callable[[bytes], bytes]] = None,
+        echo: bool = True,
+        timeout_s: float = 0.1,
+    ):
+        self.responder = responder
+        self.echo = echo
+        self.timeout_s = timeout_s
+        self._rx = bytearray()
+        self._cv = threading.Condition()
+        self.is_open = False
+
+    def open(self) -> None:
+        self.is_open = True
+
+    def close(self) -> None:
+        self.is_open = False
+        self.flush()
+
+    def feed(self, data: bytes) -> None:
+        """Make bytes readable (from any thread)."""
+        with self._cv:
+            self._rx += data
+            self._cv.notify_all()
+
+    def flush(self) -> None:
+        with self._cv:
+            self._rx.clear()
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise RuntimeError("Loopback not open")
+        reply = self.responder(data if isinstance(data, bytes) else bytes(data)) if self.responder else b""
+        with self._cv:
+            if self.echo:
+                self._rx += data
+            if reply:
+                self._rx += reply
+            self._cv.notify_all()
+        return len(data)
+
+    def drain(self) -> None:
+        pass
+
+    def available(self) -> int:
+        return len(self._rx)
+
+    def _wait(self) -> None:
+        if not self._rx:
+            self._cv.wait(self.timeout_s)
+
+    def wait_readable(self, deadline: float) -> bool:
+        with self._cv:
+            while not self._rx:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cv.wait(remaining)
+            return True
+
+    def read(self, max_bytes: int = 4096) -> bytes:
+        with self._cv:
+            self._wait()
+            out = bytes(self._rx[:max_bytes])
+            del self._rx[:max_bytes]
+            return out
+
+    def readinto(self, buf: memoryview) -> int:
+        with self._cv:
+            self._wait()
+            n = min(len(buf), len(self._rx))
+            buf[:n] = self._rx[:n]
+            del self._rx[:n]
+            return n
+
+
+class TcpTransport:
+    """
+    Raw TCP byte stream to a K-line adapter shared over the network
+    (ser2net-style bridge: line settings such as 8E1 are configured on the
+    bridge side). Port strings look like tcp://host:port.
+    """
+    def __init__(self, host: str, port: int, timeout_s: float = 0.1, connect_timeout_s: float = 3.0):
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self.connect_timeout_s = connect_timeout_s
+        self.sock: Optional[socket.socket] = None
+
+    @staticmethod
+    def from_url(url: str, timeout_s: float = 0.1) -> "TcpTransport":
+        rest = url[len("tcp://"):] if url.startswith("tcp://") else url
+        host, _, port = rest.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Expected tcp://host:port, got {url!r}")
+        return TcpTransport(host.strip("[]"), int(port), timeout_s=timeout_s)
+
+    def open(self) -> None:
+        if self.sock:
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout_s)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout_s)
+        self.sock = sock
+
+    def close(self) -> None:
+        if self.sock:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+    def _sock(self) -> socket.socket:
+        if not self.sock:
+            raise RuntimeError("Socket not open")
+        return self.sock
+
+    def flush(self) -> None:
+        if not self.sock:
+            return
+        while self.available():
+            self.sock.recv(4096)
+
+    def write(self, data: bytes) -> int:
+        self._sock().sendall(data)
+        return len(data)
+
+    def drain(self) -> None:
+        pass
+
+    def available(self) -> int:
+        sock = self._sock()
+        r, _, _ = select.select([sock], [], [], 0)
+        if not r:
+            return 0
+        try:
+            n = len(sock.recv(4096, socket.MSG_PEEK))
+        except (BlockingIOError, socket.timeout):
+            return 0
+        if n == 0:
+            raise ConnectionError("TCP peer closed the connection")
+        return n
+
+    def wait_readable(self, deadline: float) -> bool:
+        r, _, _ = select.select([self._sock()], [], [], max(deadline - time.monotonic(), 0.0))
+        return bool(r)
+
+    def read(self, max_bytes: int = 4096) -> bytes:
+        try:
+            data = self._sock().recv(max_bytes)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise ConnectionError("TCP peer closed the connection")
+        return data
+
+    def readinto(self, buf: memoryview) -> int:
+        sock = self._sock()
+        try:
+            n = sock.recv_into(buf, len(buf))
+        except socket.timeout:
+            return 0
+        if n == 0 and len(buf):
+            raise ConnectionError("TCP peer closed the connection")
+        return n
+
+
+def read_until_deadline(t: Transport, deadline: float, max_bytes: int = 4096) -> bytes:
+    """
+    Return as soon as any bytes arrive (up to max_bytes), or b"" once
+    time.monotonic() reaches `deadline`. Idles in the kernel, not in a sleep loop.
+    """
+    if not t.wait_readable(deadline):
+        return b""
+    n = t.available()
+    return t.read(min(max_bytes, n)) if n else b""
+
+
+def open_transport(port: str, cfg: Optional[SerialConfig] = None) -> Transport:
+    """
+    Transport for a --port string: tcp://host:port for a network bridge,
+    anything else is a serial device (cfg gives its line settings).
+    """
+    if port.startswith("tcp://"):
+        timeout_s = cfg.timeout_s if cfg else 0.1
+        return TcpTransport.from_url(port, timeout_s=timeout_s)
+    if cfg is None:
+        cfg = SerialConfig(port=port)
+    return SerialTransport(cfg)
 
 
 def list_serial_ports(include_all: bool = False) -> list[dict]:
@@ -26,7 +26,8 @@ def hex_to_bytes(s: str) -> bytes:
 
 
 def bytes_to_hex(b: bytes) -> str:
-    return " ".join(f"{x:02X}" for x in b)
+    # bytes, bytearray and memoryview all have .hex(sep)
+    return b.hex(" ").upper()
 
 
 def clamp(n: float, lo: float, hi: float) -> float:
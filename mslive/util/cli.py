@@ -2,11 +2,16 @@ from __future__ import annotations
 
 import argparse
 import sys
+import time
 from typing import Optional
 
 import serial
 
+from mslive.core.autodetect import ProbeConfig, autodetect
+from mslive.core.daemon import DaemonDS2, default_socket_path
 from mslive.core.ds2 import DS2, DS2Config
+from mslive.core.ratectl import AdaptiveRate, RateConfig
+from mslive.core.tap import RecordingTap
 from mslive.core.transport import list_serial_ports
 from mslive.util.paths import default_log_name, resolve_log_path
 
@@ -23,6 +28,11 @@ def add_common_args(
 ) -> None:
     ap.add_argument("--baud", type=int, default=default_baud)
     ap.add_argument("--hz", type=float, default=default_hz)
+    ap.add_argument("--adaptive-hz", action="store_true",
+                    help="adapt the poll rate to the bus (AIMD); --hz is the starting rate")
+    ap.add_argument("--max-hz", type=float, default=20.0, help="upper bound for --adaptive-hz")
+    ap.add_argument("--low-latency", action="store_true",
+                    help="Linux FTDI/CH340 cables: set ASYNC_LOW_LATENCY and a 1 ms latency_timer")
     ap.add_argument("--debug", action="store_true")
     add_profile_arg(ap)
 
@@ -30,12 +40,54 @@ def add_common_args(
 def add_port_or_replay(
     ap: argparse.ArgumentParser,
     *,
-    port_help: str = "COMx on Windows or /dev/ttyUSB0 on Linux",
+    port_help: str = "COMx on Windows, /dev/ttyUSB0 on Linux, tcp://host:port for a network bridge, "
+                     "or 'auto' to find the cable",
     replay_help: str = "Path to CSV log with b0..b31 to simulate MS42",
 ) -> None:
     group = ap.add_mutually_exclusive_group(required=True)
     group.add_argument("--port", help=port_help)
     group.add_argument("--replay", help=replay_help)
+    group.add_argument("--daemon", nargs="?", const=default_socket_path(), metavar="SOCKET",
+                       help="Attach to a running `mslive daemon` (default socket: %(const)s)")
+
+
+def add_record_raw_arg(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--record-raw", nargs="?", const="", default=None, metavar="FILE",
+                    help="also record every raw TX/RX DS2 frame to an .mslr file "
+                         "(default: logs/<profile>_raw_YYYYmmdd_HHMMSS.mslr)")
+    ap.add_argument("--record-raw-lossless", action="store_true",
+                    help="never drop raw frames: if the disk falls behind, slow polling down instead")
+
+
+def open_record_tap(args: argparse.Namespace, ds2: Optional[DS2]) -> Optional[RecordingTap]:
+    """--record-raw: hang a RecordingTap on ds2 (a real port; replay/daemon have no raw frames)."""
+    if getattr(args, "record_raw", None) is None:
+        return None
+    if ds2 is None:
+        print("--record-raw needs --port: replay and daemon sessions have no raw frames.", file=sys.stderr)
+        return None
+    profile = getattr(args, "profile", "ms42")
+    path = resolve_log_path(args.record_raw or None, default_log_name(profile, "raw", suffix=".mslr"))
+    tap = RecordingTap.open(str(path), lossless=getattr(args, "record_raw_lossless", False))
+    ds2.tap = tap
+    print(f"Recording raw frames to {path}")
+    return tap
+
+
+def close_record_tap(tap: Optional[RecordingTap]) -> None:
+    if tap is None:
+        return
+    tap.close()
+    dropped = f", {tap.dropped} dropped" if tap.dropped else ""
+    if tap.stalls:
+        dropped += f", polling held back {tap.stalls} time(s)"
+    print(f"Wrote {tap.f.name}: {tap.frames} raw frames{dropped}")
+
+
+def rate_from_args(args: argparse.Namespace) -> Optional[AdaptiveRate]:
+    if not getattr(args, "adaptive_hz", False):
+        return None
+    return AdaptiveRate(RateConfig(start_hz=args.hz, max_hz=max(args.max_hz, args.hz)))
 
 
 def resolve_log_path_from_args(args: argparse.Namespace, arg_name: str, mode: str) -> str:
@@ -46,7 +98,7 @@ def resolve_log_path_from_args(args: argparse.Namespace, arg_name: str, mode: st
 
 
 def _print_port_help() -> None:
-    print("Port examples: Windows COM3, Linux /dev/ttyUSB0.", file=sys.stderr)
+    print("Port examples: Windows COM3, Linux /dev/ttyUSB0, or auto.", file=sys.stderr)
     ports = list_serial_ports(include_all=True)
     if not ports:
         print("Available ports: (none found)", file=sys.stderr)
@@ -58,6 +110,24 @@ def _print_port_help() -> None:
         print(f"- {p['device']}: {desc} {hwid}".rstrip(), file=sys.stderr)
 
 
+def _autodetect_or_exit(*, baud: int, debug: bool, timeout: float, low_latency: bool) -> DS2:
+    t0 = time.monotonic()
+    res = autodetect(ProbeConfig(baud=baud, low_latency=low_latency), debug=debug)
+    if res is None:
+        print("--port auto: no ECU answered on any serial port.", file=sys.stderr)
+        _print_port_help()
+        raise SystemExit(1)
+    d = res.d
+    # back to normal settings for the session (and for any reopen)
+    d.cfg.timeout = timeout
+    d.cfg.settle_s = DS2Config.settle_s
+    d.transport.set_timeout(timeout)  # still open with the probe's short read timeout
+    print(f"Found ECU on {res.port} in {time.monotonic() - t0:.2f} s (IDENT {res.rtt_s * 1000:.0f} ms)")
+    if d.low_latency_report:
+        print(f"Low latency: {d.low_latency_report.summary()}")
+    return d
+
+
 def open_ds2_or_exit(
     *,
     port: str,
@@ -65,12 +135,35 @@ def open_ds2_or_exit(
     debug: bool,
     timeout: float = 1.5,
     inter_byte_timeout: float = 0.05,
+    low_latency: bool = False,
 ) -> DS2:
-    d = DS2(DS2Config(port=port, baud=baud, debug=debug, timeout=timeout, inter_byte_timeout=inter_byte_timeout))
+    if port == "auto":
+        return _autodetect_or_exit(baud=baud, debug=debug, timeout=timeout, low_latency=low_latency)
+    d = DS2(DS2Config(
+        port=port,
+        baud=baud,
+        debug=debug,
+        timeout=timeout,
+        inter_byte_timeout=inter_byte_timeout,
+        low_latency=low_latency,
+    ))
     try:
         d.open()
-    except serial.SerialException as exc:
+    except (serial.SerialException, OSError) as exc:
         print(f"Failed to open serial port '{port}': {exc}", file=sys.stderr)
         _print_port_help()
         raise SystemExit(1)
+    if d.low_latency_report:
+        print(f"Low latency: {d.low_latency_report.summary()}")
+    return d
+
+
+def attach_daemon_or_exit(socket_path: str) -> DaemonDS2:
+    d = DaemonDS2(socket_path)
+    try:
+        d.open()
+    except (OSError, TimeoutError) as exc:
+        print(f"Failed to attach to mslive daemon on '{socket_path}': {exc}", file=sys.stderr)
+        print("Start one with: mslive daemon --port /dev/ttyUSB0", file=sys.stderr)
+        raise SystemExit(1)
     return d
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the DS2 request/response hot path.
+
+Runs DS2 over a LoopbackTransport that answers instantly with an echo
+plus a 38-byte REQ_GENERAL response, so only protocol overhead is
+measured (no serial I/O, no baud-rate limit).
+
+  python scripts/bench_ds2.py [-n 20000]
+
+Reports requests/s and the transient memory (tracemalloc peak) per
+request for send() (returns bytes) and send_view() (returns a memoryview),
+and send() again with a RecordingTap attached (--record-raw in the apps),
+dropping frames when it falls behind and lossless.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from mslive.core.ds2 import DS2, DS2Config
+from mslive.core.framing import xor_checksum
+from mslive.core.tap import RecordingTap
+from mslive.core.transport import LoopbackTransport
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+# a real REQ_GENERAL answer from logs/ms42_20260113_171146.csv (checksum included)
+RESP_GENERAL = bytes.fromhex(
+    "12 26 a0 00 00 00 00 00 00 00 70 89 75 68 b0 00 00 19 a4 87 "
+    "16 a0 78 72 80 00 80 00 00 00 00 00 00 00 07 07 00 46"
+)
+
+
+def _make_ds2() -> DS2:
+    assert len(RESP_GENERAL) == RESP_GENERAL[1] and xor_checksum(RESP_GENERAL) == 0
+    d = DS2(DS2Config(port="bench"), transport=LoopbackTransport(responder=lambda _req: RESP_GENERAL))
+    d.open()
+    d.initialized = True
+    return d
+
+
+def bench(name: str, fn, n: int) -> None:
+    for _ in range(200):  # warm caches
+        fn(REQ_GENERAL)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(REQ_GENERAL)
+    dt = time.perf_counter() - t0
+
+    tracemalloc.start()
+    peak_total = 0
+    m = min(n, 2000)
+    for _ in range(m):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(REQ_GENERAL)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - base
+    tracemalloc.stop()
+
+    print(f"{name:10s} {n / dt:10.0f} req/s  {dt / n * 1e6:7.2f} us/req  {peak_total / m:7.0f} B transient/req")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=20000)
+    args = ap.parse_args()
+
+    d = _make_ds2()
+    bench("send", d.send, args.n)
+    bench("send_view", d.send_view, args.n)
+
+    for name, lossless in (("send+tap", False), ("send+tapLL", True)):
+        with open(os.devnull, "wb") as f, RecordingTap(f, lossless=lossless) as tap:
+            d.tap = tap
+            bench(name, d.send, args.n)
+            d.tap = None
+        print(f"tap: {tap.frames} frames recorded, {tap.dropped} dropped, {tap.stalls} stalls")
+
+
+if __name__ == "__main__":
+    main()
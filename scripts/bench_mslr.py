@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Size and speed of the MSLR recording formats on real data.
+
+Builds a recording from the GEN responses in the CSV logs (a TX
+REQ_GENERAL and its RX answer per sample, 20 samples/s, as the poll loop
+writes them), then writes and reads it once per format:
+
+  python scripts/bench_mslr.py [--logs logs] [--repeat 4]
+
+Reports the file size, the ratio against raw v1, and write/read MB/s
+(MB of raw record data per second, so the codecs compare directly).
+
+The "live" rows write the same frames one write() at a time on a
+simulated 20 Hz clock, as `poll --record` does, so the flush policy and
+block sealing (by size or age) shape the file the way they do in the car.
+"""
+import argparse
+import io
+import time
+
+from mslive.core import mslr
+from mslive.core.emulator import load_seed_frames
+from mslive.core import record
+from mslive.core.record import Recorder, RecorderConfig, Replayer
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+
+FORMATS = [
+    ("v1", RecorderConfig(flush="close")),
+    ("v2 raw", RecorderConfig(flush="close", version=2)),
+    ("v2 zlib", RecorderConfig(flush="close", codec="zlib")),
+    ("v2 zlib/1", RecorderConfig(flush="close", codec="zlib", compress_level=1)),
+    ("v2 zlib sync", RecorderConfig(flush="close", codec="zlib", compress_thread=False)),
+    ("v2 zstd", RecorderConfig(flush="close", codec="zstd")),
+    ("v2 delta", RecorderConfig(flush="close", delta=True)),
+    ("v2 delta+zlib", RecorderConfig(flush="close", codec="zlib", delta=True)),
+    ("v2 delta+zstd", RecorderConfig(flush="close", codec="zstd", delta=True)),
+]
+
+LIVE = [
+    ("v1 frame", RecorderConfig(flush="frame")),
+    ("v2 raw frame", RecorderConfig(flush="frame", version=2)),
+    ("v2 d+zlib frame", RecorderConfig(flush="frame", codec="zlib", delta=True)),
+    ("v2 d+zlib 0.25s", RecorderConfig(flush="interval", codec="zlib", delta=True)),
+]
+
+
+class _SimClock:
+    """Stands in for the time module inside the recorder: monotonic() is the recording's own clock."""
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return time.time()
+
+
+def write_live(frames, cfg: RecorderConfig) -> bytes:
+    clock = _SimClock()
+    real, record.time = record.time, clock
+    try:
+        out = io.BytesIO()
+        rec = Recorder(out, cfg)
+        t0 = frames[0][2]
+        for direction, payload, ts in frames:
+            clock.now = ts - t0
+            rec.write(direction, payload, ts)
+        rec.close()
+        return out.getvalue()
+    finally:
+        record.time = real
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logs", default="logs", help="CSV log file or directory")
+    ap.add_argument("--repeat", type=int, default=4, help="Replay the logs N times (longer file)")
+    args = ap.parse_args()
+
+    resps = load_seed_frames([args.logs])
+    if not resps:
+        raise SystemExit(f"No GEN responses found in {args.logs}")
+    frames = []
+    ts = 1.7e9
+    for _ in range(args.repeat):
+        for r in resps:
+            frames.append(("tx", REQ_GENERAL, ts))
+            frames.append(("rx", r, ts + 0.03))
+            ts += 0.05
+    raw_mb = sum(mslr.REC_HDR.size + len(p) for _, p, _ in frames) / 1e6
+    print(f"{len(resps)} responses from {args.logs} x{args.repeat}: {len(frames)} frames, {raw_mb:.1f} MB raw")
+
+    base = None
+    for name, cfg in FORMATS:
+        try:
+            mslr.resolve_codec(cfg.codec)
+        except ValueError as e:
+            print(f"{name:13s} skipped: {e}")
+            continue
+        out = io.BytesIO()
+        t0 = time.perf_counter()
+        rec = Recorder(out, cfg)
+        rec.write_many(frames)
+        rec.close()
+        t_write = time.perf_counter() - t0
+        size = len(out.getvalue())
+        base = base or size
+
+        out.seek(0)
+        t0 = time.perf_counter()
+        n = sum(1 for _ in Replayer(out))
+        t_read = time.perf_counter() - t0
+        assert n == len(frames)
+        print(f"{name:13s} {size / 1e6:8.2f} MB  ratio {base / size:5.1f}x  "
+              f"write {raw_mb / t_write:7.1f} MB/s  read {raw_mb / t_read:7.1f} MB/s")
+
+    print("live, 20 Hz:")
+    for name, cfg in LIVE:
+        data = write_live(frames, cfg)
+        n = sum(1 for _ in Replayer(io.BytesIO(data)))
+        assert n == len(frames)
+        print(f"{name:15s} {len(data) / 1e6:6.2f} MB  ratio {base / len(data):5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
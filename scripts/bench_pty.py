@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+End-to-end DS2 latency/throughput against the pty MS42 emulator (Linux).
+
+Exercises the real serial path (pyserial, termios, echo, framing) at a
+simulated baud rate, or the TCP transport with --tcp:
+
+  python scripts/bench_pty.py [-n 200] [--baud 9600] [--seed logs/] [--tcp]
+"""
+import argparse
+import statistics
+import time
+
+from mslive.core.ds2 import DS2, DS2Config
+from mslive.core.emulator import EmulatorConfig, MS42Emulator, PtyECU, TcpECU, load_seed_frames
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=200)
+    ap.add_argument("--baud", type=int, default=9600)
+    ap.add_argument("--delay-ms", type=float, default=10.0)
+    ap.add_argument("--seed", nargs="*", default=["logs"])
+    ap.add_argument("--tcp", action="store_true", help="Serve the emulator over TCP instead of a pty")
+    args = ap.parse_args()
+
+    frames = load_seed_frames(args.seed)
+    emu = MS42Emulator(frames)
+    cfg = EmulatorConfig(baud=args.baud, response_delay_s=args.delay_ms / 1000.0)
+    ecu = (TcpECU(emu, cfg) if args.tcp else PtyECU(emu, cfg)).start()
+    port = ecu.url if args.tcp else ecu.slave_name
+    d = DS2(DS2Config(port=port, baud=args.baud, timeout=1.0))
+    d.open()
+    d.initialized = True
+
+    rtts = []
+    errors = 0
+    t0 = time.perf_counter()
+    try:
+        for _ in range(args.n):
+            t = time.perf_counter()
+            try:
+                d.send(REQ_GENERAL)
+                rtts.append(time.perf_counter() - t)
+            except (TimeoutError, ValueError):
+                errors += 1
+    finally:
+        dt = time.perf_counter() - t0
+        d.close()
+        ecu.stop()
+
+    if not rtts:
+        print(f"no responses ({errors} errors)")
+        return
+    rtts.sort()
+    q = statistics.quantiles(rtts, n=100) if len(rtts) > 1 else [rtts[0]] * 99
+    # ideal wire time: echo (5 bytes) + response (38 bytes) + ECU delay
+    wire = (5 + 38) * 11 / args.baud + args.delay_ms / 1000.0
+    print(f"{port}: {len(frames)} seed frames, {args.n} requests @ {args.baud} baud, {errors} errors")
+    print(f"throughput {len(rtts) / dt:6.1f} req/s   (wire limit {1 / wire:5.1f} req/s)")
+    print(f"rtt p50 {q[49] * 1000:6.1f} ms  p95 {q[94] * 1000:6.1f} ms  p99 {q[98] * 1000:6.1f} ms  (wire {wire * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Optional
+
+from mslive.core.acquisition import AcquisitionWorker, LatestSlot
+
+RESP = b"\x12\x04\xa0\xb6"
+
+
+class FakeDS2:
+    def __init__(self, delay_s: float = 0.0, fail: Optional[Exception] = None):
+        self.delay_s = delay_s
+        self.fail = fail
+        self.calls = 0
+
+    def send(self, payload: bytes) -> bytes:
+        self.calls += 1
+        time.sleep(self.delay_s)
+        if self.fail is not None:
+            raise self.fail
+        return RESP + bytes([self.calls & 0xFF])
+
+
+def _wait_for(cond, timeout_s: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while not cond():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_latest_slot_keeps_only_the_newest():
+    slot = LatestSlot()
+    assert slot.latest() is None
+    slot.publish(1)
+    slot.publish(2)
+    assert slot.latest() == 2 and slot.latest() == 2
+
+
+def test_reader_sees_the_newest_sample():
+    w = AcquisitionWorker(FakeDS2(), b"\x12\x05\x0b\x03", hz=200, decode=len)
+    w.start()
+    try:
+        _wait_for(lambda: w.slot.latest() is not None and w.slot.latest().seq >= 10)
+        s = w.slot.latest()
+        assert s.resp == RESP + bytes([s.seq & 0xFF]) and s.decoded == 5 and s.error is None
+        _wait_for(lambda: w.slot.latest().seq > s.seq)      # overwritten, not queued
+    finally:
+        w.stop()
+
+
+def test_errors_become_samples():
+    timeouts = AcquisitionWorker(FakeDS2(fail=TimeoutError("No DS2 response header received")), b"", hz=5)
+    s1 = timeouts.poll_once(1)
+    s2 = timeouts.poll_once(2)
+    assert s1.is_timeout and s1.error == "No DS2 response header received" and s1.resp is None
+    assert (s1.timeouts, s2.timeouts) == (1, 2)
+
+    broken = AcquisitionWorker(FakeDS2(fail=OSError("port gone")), b"", hz=5)
+    s = broken.poll_once(1)
+    assert s.error == "port gone" and not s.is_timeout and s.timeouts == 0
+
+
+def test_failing_subscriber_does_not_stop_polling():
+    seen = []
+
+    def on_sample(s):
+        seen.append(s.seq)
+        raise ValueError("log disk full")
+
+    w = AcquisitionWorker(FakeDS2(), b"", hz=200, on_sample=on_sample)
+    w.start()
+    try:
+        _wait_for(lambda: len(seen) >= 3)
+    finally:
+        w.stop()
+
+
+def test_stop_waits_for_a_send_in_flight():
+    done = threading.Event()
+
+    def on_sample(s):
+        done.set()
+
+    d = FakeDS2(delay_s=2.2)   # longer than a fixed 2 s join would wait
+    w = AcquisitionWorker(d, b"", hz=5, on_sample=on_sample)
+    w.start()
+    _wait_for(lambda: d.calls == 1)
+    w.stop()
+    assert not w.is_alive() and done.is_set()           # the last sample was handled before stop() returned
+    assert d.calls == 1
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from mslive.core.aio import AsyncDS2, MemoryTransport
+from mslive.core.framing import xor_checksum
+
+
+def answer(req: bytes) -> bytes:
+    """A short ECU answer that names the request it belongs to (its service byte)."""
+    body = bytes([req[0], 5, 0xA0, req[2]])
+    return body + bytes([xor_checksum(body)])
+
+
+class SlowECU:
+    """Answers each request after `delay_s`, and notes how many were on the line at once."""
+    def __init__(self, delay_s: float = 0.01):
+        self.delay_s = delay_s
+        self.t = MemoryTransport(responder=self._respond)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _respond(self, req: bytes) -> bytes:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        asyncio.get_running_loop().call_later(self.delay_s, self._reply, answer(req))
+        return b""
+
+    def _reply(self, resp: bytes) -> None:
+        self.in_flight -= 1
+        self.t.feed(resp)
+
+
+async def _client(t: MemoryTransport, timeout: float = 1.0) -> AsyncDS2:
+    d = AsyncDS2(t, timeout=timeout)
+    await d.open()
+    d.initialized = True
+    return d
+
+
+def test_concurrent_sends_are_serialised():
+    async def main():
+        ecu = SlowECU()
+        d = await _client(ecu.t)
+        reqs = [bytes([0x12, 4, svc]) for svc in range(0x20, 0x28)]
+        got = await asyncio.gather(*(d.send(r) for r in reqs))
+        assert [g[3] for g in got] == [r[2] for r in reqs]  # every caller gets its own answer
+        assert ecu.max_in_flight == 1                        # one request on the K-line at a time
+        assert len(ecu.t.written) == len(reqs)
+
+    asyncio.run(main())
+
+
+def test_cancelled_send_releases_the_line():
+    async def main():
+        silent = MemoryTransport()  # echoes, never answers
+        d = await _client(silent)
+        task = asyncio.create_task(d.send(bytes([0x12, 4, 0x20])))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not d._lock.locked()
+        silent.responder = answer
+        resp = await asyncio.wait_for(d.send(bytes([0x12, 4, 0x21])), 0.5)
+        assert resp[3] == 0x21                             # not confused by the cancelled exchange
+
+    asyncio.run(main())
+
+
+def test_timeout():
+    async def main():
+        d = await _client(MemoryTransport(), timeout=0.05)
+        t0 = time.monotonic()
+        with pytest.raises(TimeoutError, match="No DS2 response"):
+            await d.send(bytes([0x12, 4, 0x20]))
+        assert time.monotonic() - t0 < 0.5
+        assert not d._lock.locked()
+        with pytest.raises(TimeoutError):
+            await d.send(bytes([0x12, 4, 0x20]), timeout=0.01)  # per-call timeout
+
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, wait
+
+import pytest
+
+from mslive.core import autodetect
+from mslive.core.autodetect import ProbeResult, load_cached_port, rank_candidates, save_cached_port
+
+PORTS = [
+    {"device": "/dev/ttyS0", "vid": None},
+    {"device": "/dev/ttyACM0", "vid": 0x2341},          # some other USB serial device
+    {"device": "/dev/ttyUSB1", "vid": 0x1A86},          # CH340
+    {"device": "/dev/ttyUSB0", "vid": 0x0403},          # FTDI
+]
+
+
+class FakeDS2:
+    def __init__(self):
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+
+def test_rank_candidates():
+    assert rank_candidates(PORTS) == ["/dev/ttyUSB0", "/dev/ttyUSB1", "/dev/ttyACM0", "/dev/ttyS0"]
+    assert rank_candidates(PORTS, cached="/dev/ttyS0")[0] == "/dev/ttyS0"
+
+
+def test_last_port_cache():
+    assert load_cached_port() is None
+    save_cached_port("/dev/ttyUSB1")
+    assert load_cached_port() == "/dev/ttyUSB1"
+
+
+def _fake_probe(monkeypatch, answers: dict[str, float]) -> dict[str, ProbeResult]:
+    """probe() stand-in: ports in `answers` find the ECU after that many seconds, the rest after 0.05 s."""
+    hits: dict[str, ProbeResult] = {}
+    lock = threading.Lock()
+
+    def probe(port, cfg=None, debug=False):
+        time.sleep(answers.get(port, 0.05))
+        if port not in answers:
+            return None
+        r = ProbeResult(port=port, ident=b"\x12\x05\xa0\x01\xb6", rtt_s=0.03, d=FakeDS2())
+        with lock:
+            hits[port] = r
+        return r
+
+    monkeypatch.setattr(autodetect, "probe", probe)
+    return hits
+
+
+def test_first_answer_wins_and_is_cached(monkeypatch):
+    hits = _fake_probe(monkeypatch, {"/dev/ttyUSB1": 0.0, "/dev/ttyACM0": 0.3})
+    res = autodetect.autodetect(ports=PORTS)
+    assert res.port == "/dev/ttyUSB1" and not res.d.closed
+    assert load_cached_port() == "/dev/ttyUSB1"
+    # the slower hit finishes after the winner was picked: its port is closed, not leaked
+    deadline = time.monotonic() + 2.0
+    while not ("/dev/ttyACM0" in hits and hits["/dev/ttyACM0"].d.closed):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _wait_for_all(fs, return_when=None):
+    # every probe finishes in the same wait(): a tie, whatever the thread timing
+    return wait(fs, return_when=ALL_COMPLETED)
+
+
+def test_tie_goes_to_the_better_ranked_port(monkeypatch):
+    hits = _fake_probe(monkeypatch, {"/dev/ttyUSB0": 0.1, "/dev/ttyUSB1": 0.1, "/dev/ttyS0": 0.1})
+    monkeypatch.setattr(autodetect, "wait", _wait_for_all)
+    res = autodetect.autodetect(ports=PORTS, use_cache=False)
+    assert res.port == "/dev/ttyUSB0"
+    assert hits["/dev/ttyUSB1"].d.closed and hits["/dev/ttyS0"].d.closed
+    assert load_cached_port() is None
+
+
+def test_nothing_to_probe():
+    assert autodetect.autodetect(ports=[]) is None
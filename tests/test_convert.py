@@ -0,0 +1,61 @@
+import csv
+from pathlib import Path
+
+from mslive.core.convert import convert_file, convert_paths
+from mslive.core.framing import gen_frame_from_b
+from mslive.core.record import Replayer
+
+B_COLS = [f"b{i}" for i in range(32)]
+
+
+def write_log(path, n: int = 20) -> list[bytes]:
+    frames = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["ts", "rpm", "coolant_c"] + B_COLS)
+        for i in range(n):
+            b = [0x12, 0x26, 0xA0] + [i] * 29
+            w.writerow([1700000000 + i * 0.1, 800, 90] + b)
+            frames.append(gen_frame_from_b(b))
+    return frames
+
+
+def test_convert_and_skip_unchanged(tmp_path):
+    frames = write_log(tmp_path / "a.csv")
+    write_log(tmp_path / "b.csv", 5)
+    out = tmp_path / "out"
+    res = convert_paths([tmp_path], out_dir=out, jobs=2)
+    assert sorted(r.status for r in res) == ["converted", "converted"]
+    with open(out / "a.mslr", "rb") as f:
+        got = list(Replayer(f))
+    assert [fr.payload for fr in got if fr.direction == "rx"] == frames
+    # the request exactly as live `poll --ds2 --record` writes it, checksum included
+    assert {fr.payload for fr in got if fr.direction == "tx"} == {bytes.fromhex("12 05 0B 03 1F")}
+    assert [r.status for r in convert_paths([tmp_path], out_dir=out)] == ["up-to-date", "up-to-date"]
+
+
+def test_missing_source_is_an_error_result(tmp_path):
+    res = convert_file(str(tmp_path / "gone.csv"), str(tmp_path / "gone.mslr"))
+    assert res.status == "error" and "gone.csv" in res.error
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_missing_source_does_not_abort_the_batch(tmp_path):
+    write_log(tmp_path / "a.csv")
+    res = convert_paths([tmp_path / "a.csv", tmp_path / "gone.csv"], out_dir=tmp_path / "out", jobs=2)
+    assert {Path(r.src).name: r.status for r in res} == {"a.csv": "converted", "gone.csv": "error"}
+
+
+def test_failed_write_leaves_no_tmp(tmp_path):
+    write_log(tmp_path / "a.csv")
+    out = tmp_path / "a.mslr"
+    res = convert_file(str(tmp_path / "a.csv"), str(out), codec="no-such-codec")
+    assert res.status == "error"
+    assert not out.exists() and not (tmp_path / "a.mslr.tmp").exists()
+
+
+def test_malformed_csv_is_reported_not_raised(tmp_path):
+    src = tmp_path / "huge.csv"
+    src.write_text("ts," + ",".join(B_COLS) + "\n1,\"" + "x" * 200_000 + "\"\n", encoding="utf-8")
+    res = convert_file(str(src), str(tmp_path / "huge.mslr"))
+    assert res.status == "error" and "field larger" in res.error
@@ -0,0 +1,99 @@
+import socket
+import sys
+import time
+
+import pytest
+
+from mslive.core.acquisition import Sample
+from mslive.core.daemon import (
+    DaemonClient,
+    DaemonServer,
+    _Client,
+    decode_sample,
+    encode_hello,
+    encode_sample,
+)
+from mslive.core.ds2 import DS2, DS2Config
+from mslive.core.framing import gen_frame_from_b
+from mslive.core.transport import LoopbackTransport
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs Unix sockets")
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+RESP = gen_frame_from_b([0x12, 0x26, 0xA0] + list(range(29)))
+
+
+def test_sample_wire_round_trip():
+    s = Sample(seq=7, ts=1700000000.25, mono=12.5, resp=RESP, decoded={"rpm": 800.0, "clt": 90.5}, timeouts=3)
+    msg = encode_sample(s, ["rpm", "clt"])
+    assert decode_sample(msg[3:], ["rpm", "clt"]) == s
+    err = Sample(seq=8, ts=1.0, mono=2.0, error="No DS2 response header received", is_timeout=True, timeouts=4)
+    assert decode_sample(encode_sample(err, ["rpm", "clt"])[3:], ["rpm", "clt"]) == err
+
+
+def test_slow_client_loses_its_oldest_messages():
+    a, b = socket.socketpair()
+    try:
+        c = _Client(a, backlog=4)
+        msgs = [encode_hello(REQ_GENERAL, [str(i)]) for i in range(10)]
+        for m in msgs:
+            c.push(m)
+        assert c.dropped == 6 and list(c.queue) == msgs[6:]
+        c.flush()
+        b.settimeout(1.0)
+        assert b.recv(4096) == b"".join(msgs[6:])
+        assert not c.pending
+    finally:
+        a.close()
+        b.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+    d = DS2(DS2Config(port="loop", settle_s=0.0), transport=LoopbackTransport(responder=lambda _req: RESP))
+    d.open()
+    d.initialized = True
+    srv = DaemonServer(d, REQ_GENERAL, hz=50, socket_path=str(tmp_path / "d.sock"),
+                       decode=lambda resp: {"rpm": float(resp[3]), "clt": float(resp[4])}).start()
+    yield srv
+    srv.stop()
+    d.close()
+
+
+def test_hello_names_known_channels(server):
+    deadline = time.monotonic() + 2.0
+    while server.channels is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    c = DaemonClient(server.socket_path)
+    c.open()
+    try:
+        assert c.payload == REQ_GENERAL and c.channels == ["rpm", "clt"]  # straight from the first HELLO
+        first = c.recv()
+        later = [c.recv() for _ in range(5)]
+        assert first.resp == RESP and first.decoded == {"rpm": 0.0, "clt": 1.0}
+        # newest sample on attach, then every one after it, none missing
+        assert [s.seq for s in later] == list(range(first.seq + 1, first.seq + 6))
+    finally:
+        c.close()
+
+
+def test_stale_socket_file_is_replaced(tmp_path):
+    path = str(tmp_path / "d.sock")
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    dead.bind(path)
+    dead.close()  # what a crashed daemon leaves behind
+    d = DS2(DS2Config(port="loop", settle_s=0.0), transport=LoopbackTransport(responder=lambda _req: RESP))
+    d.open()
+    d.initialized = True
+    srv = DaemonServer(d, REQ_GENERAL, hz=50, socket_path=path).start()
+    try:
+        with pytest.raises(RuntimeError, match="already running"):
+            DaemonServer(d, REQ_GENERAL, hz=50, socket_path=path).start()
+        c = DaemonClient(path)
+        c.open()
+        assert c.recv().resp == RESP
+        c.close()
+    finally:
+        srv.stop()
+        d.close()
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from mslive.core import mslr
+from mslive.core.record import Replayer
+
+from test_record import as_tuples, make_frames, record
+
+REQ = bytes.fromhex("12 05 0B 03 1F")
+
+
+def plain(frames) -> bytes:
+    return b"".join(mslr.REC_HDR.pack(t, d, len(p)) + p for t, d, p in frames)
+
+
+def random_frames(rnd: random.Random, n: int):
+    out = []
+    for i in range(n):
+        ln = rnd.choice([0, 1, 5, 5, 9, 38, 38])
+        out.append((float(i), rnd.randint(0, 1), bytes(rnd.choice([0, 0, 0, rnd.randrange(256)]) for _ in range(ln))))
+    return out
+
+
+@pytest.fixture(params=["numpy", "python"])
+def coder(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(mslr, "_numpy", lambda: None)
+    return request.param
+
+
+def test_round_trip_random(coder):
+    rnd = random.Random(7)
+    for n in (0, 1, 2, 40, 300):
+        frames = random_frames(rnd, n)
+        data = mslr.xdelta_encode(plain(frames))
+        assert mslr.xdelta_records(data) == frames
+
+
+def test_both_coders_write_the_same_bytes(monkeypatch):
+    pytest.importorskip("numpy")
+    frames = random_frames(random.Random(3), 200)
+    with_np = mslr.xdelta_encode(plain(frames))
+    monkeypatch.setattr(mslr, "_numpy", lambda: None)
+    assert mslr.xdelta_encode(plain(frames)) == with_np
+
+
+def test_echoes_do_not_break_rx_chains():
+    # tx request, its echo, the answer: answers still delta against answers
+    frames = []
+    for i in range(100):
+        resp = bytes([0x12, 0x26, 0xA0, i & 0xFF]) + bytes(34)
+        frames += [(i, 0, REQ), (i + 0.001, 0, REQ), (i + 0.02, 1, resp)]
+    data = mslr.xdelta_encode(plain(frames))
+    assert mslr.xdelta_records(data) == frames
+    # each answer after the first costs its 5-byte bitmap plus the changed byte
+    assert len(data) < 4 + len(frames) * mslr.REC_HDR.size + 100 * (2 * 1 + 5 + 1) + 38
+
+
+def test_corrupt_block_raises_value_error(coder):
+    data = mslr.xdelta_encode(plain(random_frames(random.Random(1), 50)))
+    with pytest.raises(ValueError, match="delta"):
+        mslr.xdelta_records(data[:-3])
+
+
+@pytest.mark.parametrize("codec", ["raw", "zlib"])
+def test_recorder_round_trip(codec, coder):
+    frames = make_frames()
+    f = record(frames, version=2, codec=codec, delta=True, block_size=4096)
+    rp = Replayer(f)
+    assert all(mslr.read_block(f, b.offset)[0][2] == mslr.FLAG_XDELTA for b in rp.blocks)
+    assert as_tuples(rp) == frames
+    assert len(f.getvalue()) < len(record(frames, version=2, codec=codec, block_size=4096).getvalue())
+
+
+def test_unknown_block_flag_is_rejected():
+    block = mslr.encode_block(plain([(0.0, 0, REQ)]), 1, 0.0, 0.0)
+    h = mslr.BLOCK_HDR.unpack_from(block)
+    with pytest.raises(ValueError, match="flags"):
+        mslr.decode_block_data(h[1], 0x01, block[mslr.BLOCK_HDR.size:], h[5])
+
+
+def test_mapped_recording_reads_delta_blocks(tmp_path):
+    pytest.importorskip("numpy")
+    from mslive.core.mapped import MappedRecording
+
+    frames = make_frames()
+    path = tmp_path / "d.mslr"
+    path.write_bytes(record(frames, version=2, codec="zlib", delta=True).getvalue())
+    with MappedRecording(str(path)) as m:
+        assert [bytes(p) for _, _, p in m.frames()] == [p for _, p, _ in frames]
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from mslive.core.ds2 import DS2, DS2Config
+from mslive.core.emulator import EmulatorConfig, MS42Emulator, TcpECU
+from mslive.core.framing import gen_frame_from_b
+from mslive.core.transport import LoopbackTransport
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+RESP = gen_frame_from_b([0x12, 0x26, 0xA0] + list(range(29)))
+
+
+@pytest.fixture
+def loop_ds2():
+    d = DS2(DS2Config(port="loop", settle_s=0.0), transport=LoopbackTransport(responder=lambda _req: RESP))
+    d.open()
+    d.initialized = True
+    yield d
+    d.close()
+
+
+def test_send_and_send_view(loop_ds2):
+    assert loop_ds2.send(REQ_GENERAL) == RESP
+    view = loop_ds2.send_view(REQ_GENERAL)
+    assert isinstance(view, memoryview) and view == RESP
+    c = loop_ds2.stats()["counters"]
+    assert (c["requests"], c["ok"], c["echo_misses"], c["timeouts"]) == (2, 2, 0, 0)
+
+
+def test_steady_state_reuses_buffers(loop_ds2):
+    first = loop_ds2.send_view(REQ_GENERAL)
+    buf = first.obj
+    for _ in range(50):
+        assert loop_ds2.send_view(REQ_GENERAL).obj is buf  # same receive buffer every time
+
+
+@pytest.mark.parametrize("noise", [b"\x00\xff", b"\x12\xf0"], ids=["plausible-length", "corrupt-length"])
+def test_noise_before_the_answer_costs_bytes_not_the_timeout(noise):
+    d = DS2(DS2Config(port="loop", timeout=0.3, settle_s=0.0),
+            transport=LoopbackTransport(responder=lambda _req: noise + RESP))
+    d.open()
+    d.initialized = True
+    try:
+        t0 = time.monotonic()
+        assert d.send(REQ_GENERAL) == RESP
+        assert time.monotonic() - t0 < d.cfg.timeout / 2
+        assert d.stats()["counters"]["resync_bytes"] == 2
+    finally:
+        d.close()
+
+
+def test_paced_chunks_over_tcp():
+    # the emulator writes echo and answer 3 bytes at a time, as a slow cable would
+    emu = MS42Emulator([RESP])
+    ecu = TcpECU(emu, EmulatorConfig(baud=115200, chunk=3, response_delay_s=0.001)).start()
+    d = DS2(DS2Config(port=ecu.url, timeout=1.0, settle_s=0.0))
+    try:
+        d.open()
+        d.initialized = True
+        assert [d.send(REQ_GENERAL) for _ in range(5)] == [RESP] * 5
+        assert d.stats()["counters"]["echo_misses"] == 0
+    finally:
+        d.close()
+        ecu.stop()
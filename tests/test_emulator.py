@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+from mslive.core.ds2 import DS2, DS2Config
+from mslive.core.emulator import EmulatorConfig, MS42Emulator, PtyECU, TcpECU, ds2_frame
+from mslive.core.framing import gen_frame_from_b
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+SEED = [gen_frame_from_b([0x12, 0x26, 0xA0] + [i] * 29) for i in range(3)]
+FAST = EmulatorConfig(baud=0, response_delay_s=0.0)  # no pacing: protocol only
+
+
+def _poll(ecu, port: str) -> list[bytes]:
+    d = DS2(DS2Config(port=port, timeout=1.0, settle_s=0.0))
+    try:
+        d.open()
+        d.initialized = True
+        return [d.send(REQ_GENERAL) for _ in range(5)]
+    finally:
+        d.close()
+        ecu.stop()
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty") or sys.platform == "win32", reason="needs a pty")
+def test_pty_ecu_answers_with_seed_frames():
+    ecu = PtyECU(MS42Emulator(list(SEED)), FAST).start()
+    assert _poll(ecu, ecu.slave_name) == [SEED[0], SEED[1], SEED[2], SEED[0], SEED[1]]
+
+
+def test_tcp_ecu_answers_with_seed_frames():
+    ecu = TcpECU(MS42Emulator(list(SEED)), FAST).start()
+    assert _poll(ecu, ecu.url) == [SEED[0], SEED[1], SEED[2], SEED[0], SEED[1]]
+
+
+def test_unknown_request_gets_a_nak():
+    emu = MS42Emulator(list(SEED))
+    assert emu.respond(ds2_frame(0x12, b"\x99")) == ds2_frame(0x12, b"\xa2")
+    assert emu.requests == 1
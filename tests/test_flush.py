@@ -0,0 +1,93 @@
+import io
+import struct
+import time
+
+import pytest
+
+from mslive.core.record import Recorder, RecorderConfig
+
+from test_record import make_frames
+
+
+def baseline_v1(frames) -> bytes:
+    """What the original unbuffered Recorder wrote: magic, then ts/dir/len + payload per frame."""
+    out = bytearray(b"MSLR")
+    for direction, payload, ts in frames:
+        out += struct.pack("<dBI", ts, 0 if direction == "tx" else 1, len(payload)) + payload
+    return bytes(out)
+
+
+class CountingFile(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, b) -> int:
+        self.writes += 1
+        return super().write(b)
+
+    def flush(self) -> None:
+        self.flushes += 1
+        super().flush()
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["write", "write_many"])
+@pytest.mark.parametrize("policy", ["frame", "interval", "close"])
+def test_v1_bytes_match_the_baseline_writer(policy, bulk):
+    frames = make_frames(200)
+    f = io.BytesIO()
+    with Recorder(f, RecorderConfig(flush=policy, buffer_bytes=1000)) as rec:
+        if bulk:
+            rec.write_many(frames)
+        else:
+            for direction, payload, ts in frames:
+                rec.write(direction, payload, ts=ts)
+    assert f.getvalue() == baseline_v1(frames)
+
+
+def test_frame_policy_flushes_every_frame():
+    frames = make_frames(10)
+    f = CountingFile()
+    rec = Recorder(f, RecorderConfig(flush="frame"))
+    for i, (direction, payload, ts) in enumerate(frames, 1):
+        rec.write(direction, payload, ts=ts)
+        assert f.getvalue() == baseline_v1(frames[:i])   # on the file right away
+    assert f.flushes >= len(frames)
+    rec.close()
+
+
+def test_interval_policy_flushes_on_time_or_size():
+    frames = make_frames(10)
+    f = CountingFile()
+    rec = Recorder(f, RecorderConfig(flush="interval", flush_interval_s=3600, buffer_bytes=1 << 20))
+    for direction, payload, ts in frames:
+        rec.write(direction, payload, ts=ts)
+    assert f.getvalue() == b"" and f.flushes == 0          # all still buffered
+    rec.maybe_flush(now=time.monotonic() + 3600)
+    assert f.getvalue() == baseline_v1(frames) and f.writes == 1  # one write for the lot
+    rec.close()
+
+    f = CountingFile()
+    rec = Recorder(f, RecorderConfig(flush="interval", flush_interval_s=3600, buffer_bytes=200))
+    rec.write_many(frames[:2])
+    assert f.getvalue() == b""
+    rec.write_many(frames[2:])                             # past buffer_bytes: out without waiting
+    assert f.getvalue() == baseline_v1(frames)
+    rec.close()
+
+
+def test_close_policy_writes_when_full_and_on_close():
+    frames = make_frames(100)
+    f = CountingFile()
+    rec = Recorder(f, RecorderConfig(flush="close", buffer_bytes=1000))
+    for direction, payload, ts in frames[:10]:
+        rec.write(direction, payload, ts=ts)
+    assert f.getvalue() == b""
+    rec.maybe_flush(now=time.monotonic() + 3600)           # time alone never flushes
+    assert f.getvalue() == b""
+    for direction, payload, ts in frames[10:]:
+        rec.write(direction, payload, ts=ts)
+    assert 0 < len(f.getvalue()) < len(baseline_v1(frames))  # full buffers went out
+    rec.close()
+    assert f.getvalue() == baseline_v1(frames)
@@ -0,0 +1,61 @@
+from mslive.core.framing import DS2FrameParser, gen_frame_from_b, xor_checksum
+
+REQ = bytes.fromhex("12 05 0B 03")
+REQ_FRAME = REQ + bytes([xor_checksum(REQ)])
+RESP = gen_frame_from_b([0x12, 0x26, 0xA0] + list(range(29)))
+
+
+def test_back_to_back_echoes_are_all_swallowed():
+    p = DS2FrameParser()
+    p.expect_echo(REQ_FRAME)
+    p.expect_echo(REQ_FRAME)
+    # both echoes arrive before either answer
+    assert p.feed(REQ_FRAME + REQ_FRAME + RESP + RESP) == [RESP, RESP]
+    assert p.echoes == 2
+    assert p.pending == 0
+
+
+def test_echo_split_across_reads():
+    p = DS2FrameParser()
+    p.expect_echo(REQ_FRAME)
+    assert p.wanted() == len(REQ_FRAME)
+    assert p.feed(REQ_FRAME[:2]) == []
+    assert p.wanted() == len(REQ_FRAME) - 2
+    assert p.feed(REQ_FRAME[2:] + RESP[:10]) == []
+    assert p.feed(RESP[10:]) == [RESP]
+
+
+def test_cancelled_echo_is_returned_as_a_frame():
+    p = DS2FrameParser()
+    p.expect_echo(REQ_FRAME)
+    p.cancel_echoes()
+    assert p.feed(REQ_FRAME) == [REQ_FRAME]
+
+
+def test_resync_skips_garbage():
+    p = DS2FrameParser()
+    assert p.feed(b"\x00\x01" + RESP) == [RESP]
+    assert p.dropped == 2
+    # a length byte promising more than will ever come: resync() gives up on it
+    assert p.feed(b"\x00\xff" + RESP) == []
+    assert p.resync() == [RESP]
+
+
+def test_bad_checksum_is_skipped():
+    p = DS2FrameParser(addrs={0x12})
+    bad = bytearray(RESP)
+    bad[5] ^= 1
+    assert p.feed(bytes(bad) + RESP) == [RESP]
+    assert p.bad_checksum >= 1
+
+
+def test_salvage_looks_past_a_corrupt_length():
+    p = DS2FrameParser(addrs={0x12})
+    p.expect_echo(REQ_FRAME)
+    # 12 F0 claims 240 bytes; our echo sits complete behind it
+    assert p.feed(b"\x12\xf0" + REQ_FRAME + RESP[:20]) == []
+    assert [bytes(fr) for fr in p.salvage()] == []      # echo swallowed, answer not complete yet
+    assert p.echoes == 1 and p.dropped == 2
+    assert p.feed(RESP[20:]) == [RESP]
+    assert p.feed(b"\x12\xf0\x12") == [] and p.salvage() == []  # nothing complete: keep waiting
+    assert p.pending == 3
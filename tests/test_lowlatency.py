@@ -0,0 +1,68 @@
+import os
+
+from mslive.core.lowlatency import apply_low_latency, latency_timer_path, read_latency_timer
+
+PORT = "/dev/ttyUSB0"
+FTDI = [{"device": PORT, "vid": 0x0403}]
+CH340 = [{"device": PORT, "vid": 0x1A86}]
+
+
+class FakeSerial:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.low_latency = None
+
+    def set_low_latency_mode(self, on: bool) -> None:
+        if self.fail:
+            raise OSError("Operation not permitted")
+        self.low_latency = on
+
+
+def _sysfs(tmp_path, value: str = "16") -> str:
+    """A sysfs tree with just the ftdi_sio latency_timer of ttyUSB0."""
+    path = latency_timer_path(PORT, str(tmp_path))
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w", encoding="ascii") as f:
+        f.write(value + "\n")
+    return str(tmp_path)
+
+
+def test_ftdi_timer_lowered(tmp_path):
+    root = _sysfs(tmp_path)
+    ser = FakeSerial()
+    rep = apply_low_latency(ser, PORT, sysfs_root=root, ports=FTDI)
+    assert rep.adapter == "FTDI"
+    assert ser.low_latency is True and rep.async_low_latency is True
+    assert (rep.latency_timer_before, rep.latency_timer_after) == (16, 1)
+    assert read_latency_timer(PORT, root) == 1
+    assert rep.changed
+    assert "latency_timer 16 -> 1 ms" in rep.summary()
+
+
+def test_timer_already_low_is_left_alone(tmp_path):
+    root = _sysfs(tmp_path, "1")
+    rep = apply_low_latency(FakeSerial(), PORT, sysfs_root=root, ports=FTDI)
+    assert (rep.latency_timer_before, rep.latency_timer_after) == (1, 1)
+
+
+def test_ch340_has_no_timer(tmp_path):
+    rep = apply_low_latency(FakeSerial(), PORT, sysfs_root=str(tmp_path), ports=CH340)
+    assert rep.adapter == "CH340"
+    assert rep.latency_timer_before is None
+    assert rep.async_low_latency is True
+
+
+def test_failures_are_reported_not_raised(tmp_path):
+    root = _sysfs(tmp_path)
+    rep = apply_low_latency(FakeSerial(fail=True), PORT, sysfs_root=root, ports=FTDI)
+    assert rep.async_low_latency is False
+    assert any("ASYNC_LOW_LATENCY" in n for n in rep.notes)
+
+
+def test_unknown_adapter_untouched(tmp_path):
+    root = _sysfs(tmp_path)
+    ser = FakeSerial()
+    rep = apply_low_latency(ser, PORT, sysfs_root=root, ports=[{"device": PORT, "vid": 0x067B}])
+    assert rep.adapter is None and not rep.changed
+    assert ser.low_latency is None
+    assert read_latency_timer(PORT, root) == 16
@@ -0,0 +1,15 @@
+import sys
+
+import pytest
+
+from test_record import make_frames, record
+
+
+def test_missing_numpy_names_the_extra(tmp_path, monkeypatch):
+    from mslive.core.mapped import MappedRecording
+
+    path = tmp_path / "a.mslr"
+    path.write_bytes(record(make_frames(10), version=2).getvalue())
+    monkeypatch.setitem(sys.modules, "numpy", None)  # as if not installed
+    with pytest.raises(ImportError, match=r"mslive\[mapped\]"):
+        MappedRecording(str(path))
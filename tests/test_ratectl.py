@@ -0,0 +1,62 @@
+import pytest
+
+from mslive.core.ratectl import AdaptiveRate, RateConfig
+
+CFG = RateConfig(start_hz=5.0, min_hz=1.0, max_hz=8.0, add_hz=0.5, increase_every=4, decrease=0.5)
+
+
+def feed(r: AdaptiveRate, n: int, rtt_s=0.01, ok=True, t0=0.0) -> float:
+    t = t0
+    for _ in range(n):
+        t += r.period
+        r.observe(rtt_s, ok=ok, now=t)
+    return t
+
+
+def test_additive_increase_after_clean_round_trips():
+    r = AdaptiveRate(CFG)
+    feed(r, 3)
+    assert r.hz == 5.0                      # not yet: every 4th clean round trip
+    feed(r, 1)
+    assert r.hz == 5.5
+    feed(r, 4)
+    assert r.hz == 6.0 and r.ok == 8
+
+
+def test_multiplicative_decrease_on_timeout():
+    r = AdaptiveRate(CFG)
+    feed(r, 3)
+    r.observe(None, ok=False, now=10.0)
+    assert r.hz == 2.5 and r.timeouts == 1
+    feed(r, 3, t0=10.0)
+    assert r.hz == 2.5                      # the streak restarted with the cut
+    r.observe(0.01, ok=False, now=20.0)     # an error counts like a timeout, whatever the RTT
+    assert r.hz == 1.25
+    assert 0 < r.timeout_rate < 1
+
+
+def test_slow_bus_cuts_to_what_the_rtt_allows():
+    r = AdaptiveRate(CFG)
+    r.observe(0.3, now=1.0)                 # 0.3 s * 1.15 headroom does not fit in 0.2 s
+    assert r.hz == pytest.approx(2.5)
+    r = AdaptiveRate(RateConfig(start_hz=5.0, max_hz=8.0, decrease=0.9))
+    r.observe(0.3, now=1.0)
+    assert r.hz == pytest.approx(1 / (0.3 * 1.15))
+
+
+def test_rate_stays_between_min_and_max():
+    r = AdaptiveRate(CFG)
+    feed(r, 200)
+    assert r.hz == CFG.max_hz
+    for i in range(20):
+        r.observe(None, ok=False, now=100.0 + i)
+    assert r.hz == CFG.min_hz
+    assert AdaptiveRate(RateConfig(start_hz=50.0, max_hz=20.0)).hz == 20.0
+
+
+def test_achieved_rate_follows_observations():
+    r = AdaptiveRate(CFG)
+    for i in range(50):
+        r.observe(0.01, now=i * 0.25)
+    assert r.achieved_hz == pytest.approx(4.0)
+    assert "4.0 Hz achieved" in r.summary()
@@ -0,0 +1,91 @@
+import io
+
+import pytest
+
+from mslive.core import mslr
+from mslive.core.record import Recorder, RecorderConfig, Replayer, recover
+
+from test_record import as_tuples, make_frames, record
+
+
+def _v2(frames, **cfg) -> bytes:
+    return record(frames, version=2, block_size=2048, **cfg).getvalue()
+
+
+def test_torn_v2_tail_reads_up_to_the_damage():
+    frames = make_frames()
+    data = _v2(frames)
+    blocks = mslr.scan_blocks(io.BytesIO(data))
+    cut = blocks[3].offset + 10                 # power cut inside the 4th block
+    rp = Replayer(io.BytesIO(data[:cut]))
+    assert not rp.indexed
+    kept = sum(b.n_frames for b in blocks[:3])
+    assert as_tuples(rp) == frames[:kept]
+
+
+def test_garbled_block_is_skipped():
+    frames = make_frames()
+    data = bytearray(_v2(frames, codec="zlib"))
+    blocks = mslr.scan_blocks(io.BytesIO(bytes(data)))
+    data[blocks[1].offset + mslr.BLOCK_HDR.size + 5] ^= 0xFF    # flip a byte of block 1's data
+    del data[blocks[-1].offset + 1:]                            # and lose the footer
+    rp = Replayer(io.BytesIO(bytes(data)))
+    skip = range(blocks[0].n_frames, blocks[0].n_frames + blocks[1].n_frames)
+    assert as_tuples(rp) == [fr for i, fr in enumerate(frames[:-blocks[-1].n_frames]) if i not in skip]
+
+
+def test_recover_writes_clean_indexed_copy():
+    frames = make_frames()
+    data = _v2(frames)
+    blocks = mslr.scan_blocks(io.BytesIO(data))
+    torn = data[:blocks[-2].offset] + b"\0" * 100 + data[blocks[-2].offset:blocks[-1].offset + 20]
+    out = io.BytesIO()
+    rep = recover(io.BytesIO(torn), out)
+    assert rep.version == 2 and rep.blocks == len(blocks) - 1
+    assert rep.bytes_dropped == 100 + 20
+    out.seek(0)
+    rp = Replayer(out)
+    assert rp.indexed
+    assert as_tuples(rp) == frames[:-blocks[-1].n_frames]
+
+
+def test_recover_torn_v1():
+    frames = make_frames(100)
+    data = record(frames, version=1).getvalue()
+    out = io.BytesIO()
+    rep = recover(io.BytesIO(data[:-3]), out)   # last record cut short
+    assert rep.version == 1 and rep.frames == len(frames) - 1
+    out.seek(0)
+    assert as_tuples(Replayer(out)) == frames[:-1]
+
+
+def test_torn_v1_sets_truncated():
+    data = record(make_frames(10), version=1).getvalue()
+    rp = Replayer(io.BytesIO(data[:-1]))
+    assert len(list(rp)) == 19 and rp.truncated
+
+
+def test_blocks_reach_the_file_before_close():
+    f = io.BytesIO()
+    rec = Recorder(f, RecorderConfig(flush="frame", version=2, block_size=512))
+    rec.write_many(make_frames(50))
+    # never closed (crash): every full block is already on disk and readable
+    snapshot = io.BytesIO(f.getvalue())
+    n = Replayer(snapshot).count()
+    assert 0 < n <= rec.frames
+    rec.close()
+
+
+def test_mapped_recording_skips_bad_blocks(tmp_path):
+    pytest.importorskip("numpy")
+    from mslive.core.mapped import MappedRecording
+
+    frames = make_frames()
+    data = bytearray(_v2(frames))
+    blocks = mslr.scan_blocks(io.BytesIO(bytes(data)))
+    data[blocks[2].offset + mslr.BLOCK_HDR.size] ^= 0xFF
+    path = tmp_path / "bad.mslr"
+    path.write_bytes(bytes(data))
+    with MappedRecording(str(path)) as m:
+        assert m.bad_blocks == 1
+        assert len(m) == len(frames) - blocks[2].n_frames
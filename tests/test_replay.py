@@ -0,0 +1,88 @@
+import csv
+
+import pytest
+
+from mslive.core.replay import REQ_GENERAL, ReplayConfig, ReplayDS2
+
+B_COLS = [f"b{i}" for i in range(32)]
+
+
+def write_log(path, n: int, bad_row_at: int = -1) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["ts"] + B_COLS)
+        for i in range(n):
+            if i == bad_row_at:
+                w.writerow(["x"] + ["nope"] * 32)  # skipped, like a torn line
+            w.writerow([i * 0.01] + [i & 0xFF] * 32)
+    return str(path)
+
+
+def replay(path: str, n: int, **cfg) -> list[int]:
+    d = ReplayDS2(ReplayConfig(path, realtime=False, **cfg))
+    d.open()
+    try:
+        return [d.send(REQ_GENERAL)[0] for _ in range(n)]
+    finally:
+        d.close()
+
+
+@pytest.mark.parametrize("streaming", [True, False], ids=["streaming", "list"])
+def test_loop_wraps_to_first_row(tmp_path, streaming):
+    path = write_log(tmp_path / "a.csv", 5, bad_row_at=2)
+    assert replay(path, 12, streaming=streaming) == [0, 1, 2, 3, 4, 0, 1, 2, 3, 4, 0, 1]
+
+
+@pytest.mark.parametrize("streaming", [True, False], ids=["streaming", "list"])
+def test_end_holds_last_frame(tmp_path, streaming):
+    path = write_log(tmp_path / "a.csv", 3)
+    assert replay(path, 6, streaming=streaming, loop=False) == [0, 1, 2, 2, 2, 2]
+
+
+def test_small_read_ahead(tmp_path):
+    path = write_log(tmp_path / "a.csv", 300)
+    assert replay(path, 600, read_ahead=1) == [i % 300 & 0xFF for i in range(600)]
+
+
+def test_no_frames_is_rejected(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("ts," + ",".join(B_COLS) + "\n" + "x" + ",y" * 32 + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="No valid frames"):
+        replay(str(path), 1)
+    path.write_text("ts,rpm\n1,800\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="No valid frames"):
+        replay(str(path), 1)
+
+
+def test_reader_error_reaches_send(tmp_path):
+    path = write_log(tmp_path / "a.csv", 5000)
+    with open(path, "ab") as f:
+        f.write(b"\xff\xfe,1\n")  # not UTF-8: the reader thread fails here
+    d = ReplayDS2(ReplayConfig(path, realtime=False))
+    d.open()
+    try:
+        with pytest.raises(UnicodeDecodeError):
+            for _ in range(10000):
+                d.send(REQ_GENERAL)
+        with pytest.raises(UnicodeDecodeError):
+            d.send(REQ_GENERAL)  # and keeps failing, instead of blocking
+    finally:
+        d.close()
+
+
+def test_dead_reader_is_noticed(tmp_path):
+    path = write_log(tmp_path / "a.csv", 3)
+    d = ReplayDS2(ReplayConfig(path, realtime=False, loop=True))
+    d.open()
+    # the reader goes away without a word (e.g. killed by a BaseException)
+    d._stop.set()
+    d._reader.join()
+    d._stop.clear()
+    while not d._q.empty():
+        d._q.get_nowait()
+    try:
+        with pytest.raises(RuntimeError, match="stopped"):
+            for _ in range(10):
+                d.send(REQ_GENERAL)
+    finally:
+        d.close()
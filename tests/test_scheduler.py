@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from mslive.core import scheduler
+from mslive.core.scheduler import DS2Job, DS2Scheduler
+
+RESP = b"\x12\x04\xa0\xb6"
+
+
+class FakeClock:
+    """time.monotonic/time.time/time.sleep for the scheduler: only sends and sleeps move it."""
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, s: float) -> None:
+        self.now += s
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(scheduler, "time", SimpleNamespace(monotonic=c.monotonic, time=c.monotonic, sleep=c.sleep))
+    return c
+
+
+class FakeBus:
+    """DS2 stand-in: every request takes `rtt_s` of the fake clock."""
+    def __init__(self, clock: FakeClock, rtt_s: float = 0.05):
+        self.clock = clock
+        self.rtt_s = rtt_s
+        self.sent: list[bytes] = []
+
+    def send(self, payload: bytes) -> bytes:
+        self.clock.now += self.rtt_s
+        self.sent.append(payload)
+        return RESP
+
+
+def _job(name: str, interval_s: float, priority: int = 0) -> DS2Job:
+    return DS2Job(name=name, payload=name.encode(), interval_s=interval_s, priority=priority)
+
+
+def test_pick_prefers_priority_then_the_longest_due(clock):
+    s = DS2Scheduler(FakeBus(clock), [_job("a", 1.0), _job("b", 1.0, priority=1), _job("c", 1.0)])
+    now = clock.now
+    assert s._pick(now - 0.1) is None                      # nothing due yet
+    assert s._pick(now).name == "b"
+    s.job("b").next_due = now + 1.0
+    s.job("c").next_due = now - 0.1                        # due longer than a
+    assert s._pick(now).name == "c"
+
+
+def test_starving_job_beats_priority(clock):
+    s = DS2Scheduler(FakeBus(clock), [_job("rpm", 0.0, priority=5), _job("temps", 1.0)], slack=0.25)
+    now = clock.now
+    s.job("temps").next_due = now - 0.2                    # late, but within its slack
+    assert s._pick(now).name == "rpm"
+    s.job("temps").next_due = now - 0.3                    # past 25 % of its interval: starving
+    assert s._pick(now).name == "temps"
+
+
+def test_slow_job_keeps_its_rate_next_to_a_busy_one(clock):
+    bus = FakeBus(clock, rtt_s=0.05)
+    s = DS2Scheduler(bus, [_job("rpm", 0.0, priority=5), _job("temps", 0.5)])
+    s.run(stop_after_s=10.0)
+    assert s.job("temps").sent in (20, 21)                 # every 0.5 s over 10 s
+    assert s.job("rpm").sent == len(bus.sent) - s.job("temps").sent
+    assert s.job("rpm").sent >= 170                        # the rest of the bus time
+
+
+def test_deadlines_advance_without_drift_or_catch_up(clock):
+    bus = FakeBus(clock, rtt_s=0.01)
+    s = DS2Scheduler(bus, [_job("a", 0.1)])
+    job = s.job("a")
+    t0 = job.next_due
+    for i in range(1, 6):
+        s._run_job(job)
+        assert job.next_due == pytest.approx(t0 + i * 0.1)  # the RTT does not push the schedule
+    bus.rtt_s = 1.0                                         # a stall (timeout) of ten periods
+    s._run_job(job)
+    assert job.next_due == clock.now                        # restart from now, no burst of catch-up sends
+
+
+def test_errors_are_counted_and_published(clock):
+    class Dead:
+        def send(self, payload: bytes) -> bytes:
+            raise TimeoutError("No DS2 response header received")
+
+    s = DS2Scheduler(Dead(), [_job("a", 0.1)])
+    got = []
+    s.subscribe("a", got.append)
+    res = s.step()
+    assert res.error == "No DS2 response header received" and got == [res]
+    assert (s.job("a").sent, s.job("a").errors) == (1, 1)
@@ -0,0 +1,91 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mslive.core.session import DS2Session, LinkState, SessionConfig
+
+REQ_GENERAL = bytes.fromhex("12 05 0B 03")
+RESP = b"\x12\x04\xa0\xb6"
+FAST = dict(wake_after=2, reopen_after=4, backoff_initial_s=0.001, backoff_max_s=0.002)
+
+
+class FakeDS2:
+    """Stands in for DS2: fails while `dead`; init_ecu() takes `wake_s` like a real wake."""
+    def __init__(self, wake_s: float = 0.3):
+        self.cfg = SimpleNamespace(debug=False)
+        self.dead = True
+        self.wake_s = wake_s
+        self.inits = 0
+        self.opens = 0
+        self.woke = threading.Event()
+
+    def send(self, payload: bytes) -> bytes:
+        if self.dead:
+            raise TimeoutError("No DS2 response header received")
+        return RESP
+
+    def init_ecu(self) -> bool:
+        self.inits += 1
+        time.sleep(self.wake_s)
+        self.woke.set()
+        return True
+
+    def slow_init_5baud(self, addr: int) -> None:
+        pass
+
+    def open(self) -> None:
+        self.opens += 1
+
+    def close(self) -> None:
+        pass
+
+
+def _fail(s: DS2Session, n: int) -> None:
+    for _ in range(n):
+        with pytest.raises(TimeoutError):
+            s.send(REQ_GENERAL)
+
+
+def test_send_stays_bounded_while_waking():
+    d = FakeDS2(wake_s=0.3)
+    s = DS2Session(d, SessionConfig(**FAST))
+    _fail(s, 1)
+    assert s.state is LinkState.DEGRADED
+    t0 = time.monotonic()
+    _fail(s, 1)                                    # second failure starts the wake
+    assert s.state is LinkState.WAKING and s.recovering
+    with pytest.raises(RuntimeError, match="recovery in progress"):
+        s.send(REQ_GENERAL)
+    assert time.monotonic() - t0 < 0.1           # neither send waited for the wake
+    assert d.woke.wait(2.0)
+    d.dead = False
+    while s.recovering:
+        time.sleep(0.001)
+    assert s.send(REQ_GENERAL) == RESP
+    assert s.state is LinkState.CONNECTED
+    assert (s.recovery.outages, s.recovery.wakes) == (1, 1)
+    assert s.recovery.last_recover_s is not None
+    s.close()
+
+
+def test_reopen_after_more_failures():
+    d = FakeDS2(wake_s=0.0)
+    s = DS2Session(d, SessionConfig(**FAST))
+    for _ in range(FAST["reopen_after"]):
+        while s.recovering:
+            time.sleep(0.001)
+        _fail(s, 1)
+    assert s.state is LinkState.REOPENING
+    s.close()
+    assert d.opens == 1 and s.recovery.reopens == 1
+
+
+def test_inline_recovery():
+    d = FakeDS2(wake_s=0.05)
+    s = DS2Session(d, SessionConfig(background_recovery=False, **FAST))
+    _fail(s, 2)
+    assert not s.recovering and d.inits == 1   # the wake ran inside the failing send()
+    d.dead = False
+    assert s.send(REQ_GENERAL) == RESP
@@ -0,0 +1,95 @@
+import math
+
+import pytest
+
+from mslive.core.shmring import HEADER_SIZE, SampleRing
+
+RESP = bytes(range(38))
+
+
+@pytest.fixture
+def ring():
+    r = SampleRing.create(None, capacity=4, channels=("rpm", "clt"))
+    yield r
+    r.close()
+
+
+def test_write_and_read_back(ring):
+    assert ring.write_seq == 0 and ring.read(1) is None
+    seq = ring.write(1.0, 1700000000.0, RESP, (800.0, 90.0))
+    rec = ring.read(seq)
+    assert (rec.seq, rec.mono, rec.ts, rec.resp) == (1, 1.0, 1700000000.0, RESP)
+    assert rec.values == (800.0, 90.0)
+
+
+def test_missing_channels_are_nan(ring):
+    rec = ring.read(ring.write(1.0, 2.0, RESP, (800.0,)))
+    assert rec.values[0] == 800.0 and math.isnan(rec.values[1])
+
+
+def test_lapped_records_are_gone(ring):
+    for i in range(6):
+        ring.write(float(i), float(i), RESP)
+    assert ring.read(2) is None          # overwritten by seq 6
+    assert ring.read(3).mono == 2.0
+    assert ring.read(7) is None          # not written yet
+
+
+def test_reader_sees_a_record_being_written_as_overrun(ring):
+    seq = ring.write(1.0, 1.0, RESP)
+    off = HEADER_SIZE + (seq - 1) % ring.capacity * ring.record_size
+    ring.buf[off:off + 8] = bytes(8)     # the writer's "busy" mark, as mid-write
+    assert ring.read(seq) is None
+    assert ring.overruns == 1
+
+
+def test_attached_reader_shares_records(ring):
+    ring.write(1.0, 1.0, RESP, (1.0, 2.0))
+    other = SampleRing.attach(ring.name)
+    try:
+        assert other.channels == ["rpm", "clt"]
+        assert other.read(1).values == (1.0, 2.0)
+        ring.write(2.0, 2.0, RESP)
+        assert other.write_seq == 2
+    finally:
+        other.close()
+
+
+def test_since_skips_and_counts_overwritten(ring):
+    np = pytest.importorskip("numpy")
+    for i in range(10):
+        ring.write(float(i), float(i), RESP, (float(i), 0.0))
+    got = ring.since(2)                   # 3..6 were lapped, 7..10 are left
+    assert got["seq"].tolist() == [7, 8, 9, 10]
+    assert ring.overruns == 4
+    assert np.array_equal(ring.latest(2)["ch"][:, 0], [8.0, 9.0])
+    assert bytes(ring.latest(1)["raw"][0][:len(RESP)]) == RESP
+
+
+def test_concurrent_reader_never_sees_a_torn_record(ring):
+    import threading
+
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            ring.write(float(i), float(i), bytes([i & 0xFF]) * 38, (float(i), float(-i)))
+
+    t = threading.Thread(target=writer)
+    t.start()
+    good = 0
+    try:
+        for _ in range(20000):
+            w = ring.write_seq
+            rec = ring.read(w) if w else None
+            if rec is None:
+                continue
+            assert rec.mono == rec.ts == rec.values[0] == -rec.values[1] == float(rec.seq)
+            assert rec.resp == bytes([rec.seq & 0xFF]) * 38
+            good += 1
+    finally:
+        stop.set()
+        t.join()
+    assert good
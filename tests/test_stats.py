@@ -0,0 +1,70 @@
+import pytest
+
+from mslive.core.ds2 import DS2, PHASES, DS2Config
+from mslive.core.framing import gen_frame_from_b
+from mslive.core.stats import DEFAULT_BOUNDS_MS, LatencyHistogram, format_phase
+from mslive.core.transport import LoopbackTransport
+
+RESP = gen_frame_from_b([0x12, 0x26, 0xA0] + list(range(29)))
+
+
+def test_bucket_boundaries():
+    h = LatencyHistogram()
+    h.record(0.001)        # exactly 1 ms: the bucket that ends at 1 ms
+    h.record(0.0010001)    # just over: the next one
+    h.record(6.0)          # past the last bound: overflow
+    h.record(0.0)
+    i = DEFAULT_BOUNDS_MS.index(1.0)
+    assert h.counts[i] == 1 and h.counts[i + 1] == 1
+    assert h.counts[-1] == 1 and h.counts[0] == 1
+    assert h.count == 4 and h.max_ms == 6000.0
+
+
+def test_percentiles_interpolate_inside_the_bucket():
+    h = LatencyHistogram()
+    for _ in range(5):
+        h.record(0.0015)   # (1, 2] ms
+    for _ in range(5):
+        h.record(0.004)    # (2, 5] ms
+    assert h.percentile(50) == pytest.approx(2.0)
+    assert h.percentile(70) == pytest.approx(3.2)   # 2/5 into (2, 5]
+    assert h.percentile(90) == pytest.approx(4.0)   # never past the slowest sample
+    assert h.percentile(10) == pytest.approx(1.2)
+    assert h.mean_ms == pytest.approx(2.75)
+
+
+def test_overflow_percentile_uses_the_max():
+    h = LatencyHistogram()
+    h.record(7.0)
+    h.record(9.0)
+    assert h.percentile(100) == pytest.approx(9000.0)
+    assert 5000.0 < h.percentile(50) <= 9000.0
+
+
+def test_empty_and_reset():
+    h = LatencyHistogram()
+    assert h.summary() == {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None,
+                           "mean_ms": None, "max_ms": None}
+    assert format_phase("total", h.summary()) == "total  n=0"
+    h.record(0.01)
+    assert format_phase("total", h.summary()) == "total  n=1  p50 7.5  p95 9.8  p99 9.9 ms"  # (5, 10] bucket
+    h.reset()
+    assert h.count == 0 and sum(h.counts) == 0 and h.percentile(50) is None
+
+
+def test_ds2_times_every_phase():
+    d = DS2(DS2Config(port="loop", settle_s=0.0), transport=LoopbackTransport(responder=lambda _req: RESP))
+    d.open()
+    d.initialized = True
+    try:
+        for _ in range(20):
+            d.send(bytes.fromhex("12 05 0B 03"))
+        st = d.stats()
+        assert list(st["phases"]) == list(PHASES) == ["tx", "echo", "header", "body", "total"]
+        assert all(s["count"] == 20 for s in st["phases"].values())
+        assert st["phases"]["total"]["max_ms"] >= st["phases"]["body"]["max_ms"]
+        d.reset_stats()
+        assert all(s["count"] == 0 for s in d.stats()["phases"].values())
+        assert d.stats()["counters"]["requests"] == 0
+    finally:
+        d.close()
@@ -0,0 +1,44 @@
+import io
+import time
+
+from mslive.core.record import Replayer
+from mslive.core.tap import RecordingTap
+
+REQ = bytes.fromhex("12 05 0B 03 1F")
+RESP = bytes.fromhex("12 04 A0 B6")
+
+
+def run_tap(n: int, **kw):
+    f = io.BytesIO()
+    tap = RecordingTap(f, **kw)
+    m0 = time.monotonic()
+    for i in range(n):
+        tap.tx(REQ, m0 + i * 0.01)
+        tap.rx(memoryview(bytearray(RESP)), m0 + i * 0.01 + 0.005)
+    tap.close()
+    f.seek(0)
+    return tap, m0, Replayer(f)
+
+
+def test_frames_carry_wall_time_and_monotonic_anchor():
+    tap, m0, rp = run_tap(100)
+    assert tap.dropped == 0
+    frames = list(rp)
+    assert len(frames) == 200
+    wall0, mono0 = rp.clock
+    assert abs(frames[0].ts - wall0 + mono0 - m0) < 1e-6           # back to the monotonic reading
+    assert abs((frames[-1].ts - frames[0].ts) - 0.995) < 1e-6       # intervals kept exactly
+    assert abs(frames[0].ts - time.time()) < 60
+    assert frames[1].direction == "rx" and frames[1].payload == RESP
+
+
+def test_full_queue_counts_drops():
+    tap, _, rp = run_tap(5000, max_pending=50, poll_s=10.0)
+    assert tap.dropped > 0
+    assert rp.count() + tap.dropped == 10000
+
+
+def test_lossless_waits_instead_of_dropping():
+    tap, _, rp = run_tap(5000, max_pending=50, poll_s=10.0, lossless=True)
+    assert tap.dropped == 0 and tap.stalls > 0
+    assert rp.count() == 10000
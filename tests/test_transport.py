@@ -0,0 +1,82 @@
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from mslive.core.transport import SerialConfig, SerialTransport, TcpTransport, read_until_deadline
+
+
+@pytest.fixture
+def pty_pair():
+    if not hasattr(os, "openpty") or sys.platform == "win32":
+        pytest.skip("needs a pty")
+    import tty
+
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    t = SerialTransport(SerialConfig(port=os.ttyname(slave), baud=9600, timeout_s=0.5, settle_s=0.0))
+    t.open()
+    yield t, master
+    t.close()
+    os.close(master)
+    os.close(slave)
+
+
+@pytest.fixture
+def tcp_pair():
+    server = socket.create_server(("127.0.0.1", 0))
+    t = TcpTransport(*server.getsockname()[:2], timeout_s=0.5)
+    t.open()
+    peer, _ = server.accept()
+    yield t, peer
+    t.close()
+    peer.close()
+    server.close()
+
+
+def _check_wait_and_read(t, send) -> None:
+    # nothing to read: wait_readable gives up at the deadline
+    t0 = time.monotonic()
+    assert not t.wait_readable(t0 + 0.1)
+    assert 0.09 <= time.monotonic() - t0 < 0.5
+    assert read_until_deadline(t, time.monotonic() + 0.05) == b""
+
+    # bytes arriving later wake the waiter right away, long before the deadline
+    threading.Timer(0.05, send, (b"\x12\x04\xa0\xb6",)).start()
+    t0 = time.monotonic()
+    got = read_until_deadline(t, t0 + 5.0)
+    assert time.monotonic() - t0 < 1.0
+    while len(got) < 4:
+        got += read_until_deadline(t, time.monotonic() + 1.0)
+    assert got == b"\x12\x04\xa0\xb6"
+
+    send(b"abcdef")
+    buf = bytearray(16)
+    n = 0
+    while n < 6:
+        n += t.readinto(memoryview(buf)[n:])
+    assert bytes(buf[:n]) == b"abcdef"
+
+
+def test_serial_transport_waits_on_the_fd(pty_pair):
+    t, master = pty_pair
+    _check_wait_and_read(t, lambda data: os.write(master, data))
+    t.write(b"\x12\x05")
+    assert os.read(master, 16) == b"\x12\x05"
+    t.set_timeout(0.05)                       # applies to the open port, not just the next open()
+    t0 = time.monotonic()
+    assert t.readinto(memoryview(bytearray(4))) == 0
+    assert time.monotonic() - t0 < 0.3
+
+
+def test_tcp_transport_waits_on_the_socket(tcp_pair):
+    t, peer = tcp_pair
+    _check_wait_and_read(t, peer.sendall)
+    peer.close()
+    with pytest.raises(ConnectionError):
+        while True:
+            t.read()